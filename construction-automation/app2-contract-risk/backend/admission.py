@@ -0,0 +1,187 @@
+"""
+admission.py — Token-budget admission control per client.
+
+Problem:
+  slowapi's "20/minute" counts requests, but a 5-page contract and a
+  300-page one differ ~50× in Claude tokens. A few large uploads from one
+  client can drain the shared Anthropic quota for everyone.
+
+Approach:
+  One token bucket per client, denominated in estimated Claude tokens.
+  The estimate is made after extraction and after every free path (result
+  cache, fingerprint reuse, clause index, prescreen) — from the exact
+  messages.create() parameters the analysis is about to send:
+    input   chars of system + messages / _CHARS_PER_TOKEN
+    output  max_tokens × _OUTPUT_FILL (the JSON prompts rarely use it all)
+  Admitted → the estimate is deducted and the analysis runs.
+  Not enough tokens → 429 with Retry-After = seconds until the bucket has
+  refilled enough at the configured rate.
+  An estimate larger than the whole bucket is admitted when the bucket is
+  full and leaves it in debt — a single huge contract must stay possible,
+  it just blocks that client for longer afterwards.
+
+Background jobs (as_job=true) are already accepted when they run, so they
+are charged without a check: the bucket may go negative and the client's
+next synchronous upload waits for it.
+
+Prewarming the suggested Path C questions after /init-nachtrag-session is
+speculative work nobody asked for yet: it is charged to the client that
+created the session, but only while its bucket still covers each call —
+it stops instead of putting the client into debt (spare()).
+
+Identical concurrent uploads share one analysis (singleflight.py), but
+every caller is charged the estimate through its own hook — and only the
+caller over budget gets the 429 (coalesce_admitted).
+
+Client identity:
+  X-API-Key if it is listed in ADMISSION_API_KEYS (comma-separated);
+  otherwise the client IP. Unlisted keys are ignored — there is no API
+  key auth in V1, and an unchecked header would mint fresh buckets.
+
+Config:
+  ADMISSION_TOKENS_PER_MIN   refill rate (default 200 000; 0 disables)
+  ADMISSION_BURST_TOKENS     bucket size (default 600 000 ≈ three large
+                             contracts back to back)
+  ADMISSION_API_KEYS         keys that get their own bucket
+
+Scope: process-local like singleflight.py and the result caches.
+"""
+
+import hashlib
+import math
+import os
+import time
+
+from fastapi import HTTPException, Request
+from slowapi.util import get_remote_address
+
+from ttl_cache import TTLCache
+
+_RATE_PER_S = float(os.getenv("ADMISSION_TOKENS_PER_MIN", "200000")) / 60
+_BURST = float(os.getenv("ADMISSION_BURST_TOKENS", "600000"))
+_API_KEYS = {k.strip() for k in os.getenv("ADMISSION_API_KEYS", "").split(",") if k.strip()}
+_ENABLED = _RATE_PER_S > 0
+
+# German legal text runs ~3.5 characters per Claude token; the JSON
+# answers fill roughly half to two thirds of max_tokens.
+_CHARS_PER_TOKEN = 3.5
+_OUTPUT_FILL = 0.6
+
+# A bucket idle long enough to refill completely is the same as a new one.
+# The TTL is a day rather than the refill time so job debt is not forgiven.
+_buckets = TTLCache(maxsize=10_000, ttl=24 * 3600)
+_stats = {"admitted": 0, "rejected": 0, "charged_tokens": 0}
+
+
+# ── Estimate ──────────────────────────────────────────────────────────────────
+
+def estimate(requests: list[dict]) -> int:
+    """Estimated input + output tokens for a list of messages.create() params."""
+    total = 0.0
+    for params in requests:
+        chars = len(params.get("system", ""))
+        for message in params.get("messages", []):
+            content = message.get("content", "")
+            chars += len(content) if isinstance(content, str) else len(str(content))
+        total += chars / _CHARS_PER_TOKEN + params.get("max_tokens", 0) * _OUTPUT_FILL
+    return math.ceil(total)
+
+
+# ── Buckets ───────────────────────────────────────────────────────────────────
+
+def client_key(request: Request) -> str:
+    api_key = request.headers.get("x-api-key")
+    if api_key and api_key in _API_KEYS:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return "ip:" + get_remote_address(request)
+
+
+def _bucket(client: str) -> dict:
+    now = time.monotonic()
+    bucket = _buckets.get(client)
+    if bucket is None:
+        bucket = {"level": _BURST, "updated": now}
+    else:
+        bucket["level"] = min(_BURST, bucket["level"] + (now - bucket["updated"]) * _RATE_PER_S)
+        bucket["updated"] = now
+    _buckets.set(client, bucket)
+    return bucket
+
+
+def try_acquire(client: str, tokens: int) -> float:
+    """Deduct tokens and return 0, or return seconds until they are available."""
+    if not _ENABLED or tokens <= 0:
+        return 0.0
+    bucket = _bucket(client)
+    if bucket["level"] >= min(tokens, _BURST):
+        bucket["level"] -= tokens
+        _stats["admitted"] += 1
+        _stats["charged_tokens"] += tokens
+        return 0.0
+    _stats["rejected"] += 1
+    return (min(tokens, _BURST) - bucket["level"]) / _RATE_PER_S
+
+
+def charge(client: str, tokens: int) -> None:
+    """Deduct without a check (background jobs) — the bucket may go negative."""
+    if not _ENABLED:
+        return
+    _bucket(client)["level"] -= tokens
+    _stats["charged_tokens"] += tokens
+
+
+# ── Hooks for the analysis pipelines ──────────────────────────────────────────
+# The pipelines call admit(requests) with the messages.create() params they
+# are about to send, once every free path has been taken.
+
+def admitter(client: str):
+    """admit() for synchronous requests: 429 + Retry-After when over budget."""
+    async def admit(requests: list[dict]) -> None:
+        tokens = estimate(requests)
+        wait = try_acquire(client, tokens)
+        if wait > 0:
+            retry_after = math.ceil(wait)
+            raise HTTPException(
+                status_code=429,
+                detail=(
+                    f"Token budget exceeded: this analysis needs ~{tokens:,} Claude tokens. "
+                    f"Retry in {retry_after} s."
+                ),
+                headers={"Retry-After": str(retry_after)},
+            )
+    return admit
+
+
+def charger(client: str | None):
+    """admit() for background jobs: always admitted, always charged."""
+    async def admit(requests: list[dict]) -> None:
+        if client:
+            charge(client, estimate(requests))
+    return admit
+
+
+def spare(client: str | None):
+    """
+    admit() for speculative background work (Q&A prewarm): charged like a
+    job, but raises 429 instead once the bucket cannot cover the estimate.
+    """
+    async def admit(requests: list[dict]) -> None:
+        if not _ENABLED or not client:
+            return
+        tokens = estimate(requests)
+        bucket = _bucket(client)
+        if bucket["level"] < tokens:
+            raise HTTPException(status_code=429, detail="Token budget exhausted — prewarming skipped.")
+        bucket["level"] -= tokens
+        _stats["charged_tokens"] += tokens
+    return admit
+
+
+def stats() -> dict:
+    return {
+        "enabled": _ENABLED,
+        "tokens_per_min": round(_RATE_PER_S * 60),
+        "burst_tokens": round(_BURST),
+        "clients": len(_buckets),
+        **_stats,
+    }
@@ -0,0 +1,86 @@
+"""
+answer_cache.py — Shared answer cache for /ask-contract and /ask-nachtrag.
+
+Teams ask the same things about the same contract, and the suggested
+questions in nachtrag_qa.py are clicked over and over. Every one of those
+was a fresh Claude call.
+
+Key: (namespace, session_id, normalized question, hash of retrieved context)
+  namespace   "contract" | "nachtrag" — the two Q&A modes never share answers
+  session_id  content hash of the analyzed documents (main.py)
+  question    NFKC, case-folded, whitespace collapsed, trailing ?!. stripped —
+              "Welche Fristen gelten?" and "welche fristen gelten" are one entry
+  context     SHA-256 of the exact context block sent to Claude. Retrieval is
+              deterministic, so this only changes when the session's content
+              does — but then a stale answer can never be served.
+
+Bounded by TTLCache: QA_CACHE_MAX entries (default 2000), QA_CACHE_TTL_S
+seconds (default 6 h). Only answers whose JSON parsed are stored — the
+"Manuelle Prüfung erforderlich" fallback is retried on the next ask.
+Concurrent identical questions (e.g. a click during background prewarming)
+share one call via singleflight.coalesce().
+"""
+
+import hashlib
+import os
+from typing import Awaitable, Callable
+
+from fingerprint import normalize_text
+from singleflight import coalesce
+from ttl_cache import TTLCache
+
+_answers = TTLCache(
+    maxsize=int(os.getenv("QA_CACHE_MAX", "2000")),
+    ttl=float(os.getenv("QA_CACHE_TTL_S", str(6 * 3600))),
+)
+
+
+def normalize_question(question: str) -> str:
+    return normalize_text(question).casefold().rstrip("?!. ")
+
+
+def _key(namespace: str, session_id: str, question: str, context: str) -> str:
+    raw = "\x1f".join((
+        namespace,
+        session_id,
+        normalize_question(question),
+        hashlib.sha256(context.encode()).hexdigest(),
+    ))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def cached_answer(
+    namespace: str,
+    session_id: str | None,
+    question: str,
+    context: str,
+    compute: Callable[[], Awaitable[tuple[dict, bool]]],
+) -> dict:
+    """
+    Return the cached answer or run compute() once and cache it.
+
+    compute  zero-arg coroutine function returning (result, parsed_ok);
+             only parsed_ok results are cached
+    Without a session_id the cache is bypassed. Always returns a fresh dict,
+    so callers may add per-request fields without touching the cached entry.
+    """
+    if session_id is None:
+        result, _ = await compute()
+        return result
+
+    key = _key(namespace, session_id, question, context)
+    hit = _answers.get(key)
+    if hit is not None:
+        return {**hit, "cached": True}
+
+    async def run() -> dict:
+        result, parsed_ok = await compute()
+        if parsed_ok:
+            _answers.set(key, result)
+        return result
+
+    return dict(await coalesce(f"qa:{key}", run))
+
+
+def stats() -> dict:
+    return _answers.stats()
@@ -0,0 +1,400 @@
+"""
+batch_runner.py — Offline batch scoring for large contract / Nachtrag sets.
+
+Overnight screening does not need interactive latency, and the Message
+Batches API costs half as much per token. This CLI turns documents into a
+batch request file, submits it through a transport, and merges the results
+back — using the same prompts and parsers as the live endpoints:
+
+  contracts  risk_scorer.prepare_clause()       → request (or no call needed)
+             risk_scorer.apply_clause_response() → scored clause + clause index
+  Nachträge  nachtrag_scorer.prepare_positions(position_cap=None)
+             nachtrag_scorer.build_position_request()
+             nachtrag_scorer.parse_position_response() / position_result()
+
+So pre-filtered and clause-index hits never reach the batch, identical
+clauses across documents share one request (custom_id = clause fingerprint),
+and batch scores seed the clause index for later interactive uploads.
+
+Run directory layout:
+  requests.jsonl  one {"custom_id", "params"} per line (Message Batches format)
+  manifest.json   documents and which custom_id belongs to which clause/position
+  state.json      transport + batch id after submit
+  scored.json     collect output — per document: clauses + summary, or
+                  positions + nachtrag_summary (no Stellungnahme — generate it
+                  interactively for the Nachträge you actually answer)
+
+Transports:
+  anthropic  Message Batches API (results within 24 h)
+  local      runs the request file line by line against the Messages API —
+             for small runs and testing. With ANTHROPIC_BASE_URL pointing at a
+             stub server it runs fully offline, and with LLM_CASSETTE_MODE=replay
+             from recorded responses (cassette.py).
+
+Usage:
+    python batch_runner.py build --contracts contracts/*.pdf --out runs/2026-10-19
+    python batch_runner.py build --nachtrag nt.pdf --lv lv.x83 --out runs/nt12
+    python batch_runner.py submit runs/2026-10-19 --transport anthropic
+    python batch_runner.py poll runs/2026-10-19
+    python batch_runner.py collect runs/2026-10-19
+
+    # All four steps, waiting for the batch:
+    python batch_runner.py run --contracts contracts/*.pdf --out runs/x --transport local
+
+Nachtrag build note: prepare_positions() may make one interactive call when
+the regex finds fewer than 2 positions, and one for a long Begründung
+summary. Anzeigen (Stage 1) are skipped — they are a single call anyway.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Iterator, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import clause_index
+from clause_patterns import CLAUSE_CONFIGS, ACTIVE_CONFIG, extract_clauses
+from fingerprint import clause_fingerprint
+from gaeb_parser import parse_gaeb_file
+from nachtrag_scorer import (
+    prepare_positions, build_position_request, parse_position_response,
+    position_result, aggregate_positions,
+)
+from parser import extract_text, is_scanned_pdf, extract_nachtrag_data
+from risk_scorer import prepare_clause, apply_clause_response, aggregate_risk_summary
+
+_MAX_REQUESTS = 100_000  # Message Batches limit per batch
+_LOCAL_CONCURRENCY = int(os.getenv("BATCH_LOCAL_CONCURRENCY", "3"))
+
+
+def _md5_file(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+def _write_json(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _read_json(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ── Transports ────────────────────────────────────────────────────────────────
+
+class AnthropicBatchTransport:
+    """Message Batches API."""
+
+    name = "anthropic"
+
+    def __init__(self, run_dir: str):
+        import anthropic
+        key = os.getenv("ANTHROPIC_API_KEY")
+        if not key:
+            raise RuntimeError("ANTHROPIC_API_KEY not set.")
+        self.client = anthropic.Anthropic(api_key=key)
+
+    def submit(self, requests: list[dict]) -> str:
+        return self.client.messages.batches.create(requests=requests).id
+
+    def status(self, batch_id: str) -> dict:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return {
+            "ended": batch.processing_status == "ended",
+            "status": batch.processing_status,
+            "counts": batch.request_counts.model_dump(),
+        }
+
+    def results(self, batch_id: str) -> Iterator[tuple[str, Optional[str], Optional[str]]]:
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                yield entry.custom_id, entry.result.message.content[0].text, None
+            else:
+                error = getattr(entry.result, "error", None)
+                yield entry.custom_id, None, f"{entry.result.type}: {error}" if error else entry.result.type
+
+
+class LocalTransport:
+    """
+    Stand-in that executes the request file itself, with the same concurrency
+    cap as the live scorers. Results are stored next to the request file in
+    the batch result shape, so collect() is identical for both transports.
+    """
+
+    name = "local"
+
+    def __init__(self, run_dir: str, client=None):
+        self.run_dir = run_dir
+        self.client = client
+
+    def _results_path(self, batch_id: str) -> str:
+        return os.path.join(self.run_dir, f"{batch_id}.results.jsonl")
+
+    def submit(self, requests: list[dict]) -> str:
+        batch_id = f"local-{uuid.uuid4().hex[:12]}"
+        results = asyncio.run(self._run_all(requests))
+        with open(self._results_path(batch_id), "w", encoding="utf-8") as f:
+            for line in results:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return batch_id
+
+    async def _run_all(self, requests: list[dict]) -> list[dict]:
+        client = self.client
+        if client is None:
+            from anthropic import AsyncAnthropic
+            import cassette
+            client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"),
+                                    http_client=cassette.async_http_client())
+        semaphore = asyncio.Semaphore(_LOCAL_CONCURRENCY)
+
+        async def one(req: dict) -> dict:
+            async with semaphore:
+                try:
+                    msg = await client.messages.create(**req["params"])
+                    return {"custom_id": req["custom_id"], "text": msg.content[0].text, "error": None}
+                except Exception as exc:
+                    return {"custom_id": req["custom_id"], "text": None,
+                            "error": f"{type(exc).__name__}: {exc}"}
+
+        return list(await asyncio.gather(*[one(r) for r in requests]))
+
+    def status(self, batch_id: str) -> dict:
+        ended = os.path.exists(self._results_path(batch_id))
+        return {"ended": ended, "status": "ended" if ended else "unknown", "counts": {}}
+
+    def results(self, batch_id: str) -> Iterator[tuple[str, Optional[str], Optional[str]]]:
+        with open(self._results_path(batch_id), encoding="utf-8") as f:
+            for line in f:
+                r = json.loads(line)
+                yield r["custom_id"], r["text"], r["error"]
+
+
+TRANSPORTS = {
+    AnthropicBatchTransport.name: AnthropicBatchTransport,
+    LocalTransport.name: LocalTransport,
+}
+
+
+# ── build ─────────────────────────────────────────────────────────────────────
+
+def _contract_document(path: str, config: dict, requests: dict[str, dict]) -> dict:
+    with open(path, "rb") as f:
+        content = f.read()
+    doc = {"type": "contract", "path": path, "session_id": _md5_file(content)}
+    text, page_count = extract_text(content)
+    if is_scanned_pdf(text, page_count):
+        return {**doc, "skipped": "scanned PDF — no text layer"}
+    clauses = extract_clauses(text, config)
+    if not clauses:
+        return {**doc, "skipped": "no §-numbered clauses found"}
+
+    items = []
+    for clause in clauses:
+        scored, request = prepare_clause(clause, config)
+        if scored is not None:
+            items.append({"clause": clause, "scored": scored})
+            continue
+        custom_id = f"c-{clause_fingerprint(clause)[:40]}"
+        requests.setdefault(custom_id, {"custom_id": custom_id, "params": request})
+        items.append({"clause": clause, "custom_id": custom_id})
+    return {**doc, "items": items}
+
+
+async def _nachtrag_document(path: str, lv_path: Optional[str], requests: dict[str, dict]) -> dict:
+    with open(path, "rb") as f:
+        content = f.read()
+    doc = {"type": "nachtrag", "path": path, "session_id": _md5_file(content)}
+
+    lv_positions: list[dict] = []
+    lv_pdf_bytes = None
+    if lv_path:
+        with open(lv_path, "rb") as f:
+            lv_bytes = f.read()
+        if os.path.splitext(lv_path.lower())[1] in (".x83", ".x84", ".gaeb"):
+            lv_positions = parse_gaeb_file(lv_bytes)
+        else:
+            lv_pdf_bytes = lv_bytes
+
+    prepared = await prepare_positions(
+        extract_nachtrag_data(content), lv_positions, lv_pdf_bytes, position_cap=None,
+    )
+    if prepared["is_stage1"]:
+        return {**doc, "skipped": "Anzeige (Stage 1) — use /analyze-nachtrag"}
+
+    items = []
+    for match in prepared["matched"]:
+        request = build_position_request(match, prepared["begründung"])
+        raw = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        custom_id = f"p-{hashlib.sha256(raw.encode()).hexdigest()[:40]}"
+        requests.setdefault(custom_id, {"custom_id": custom_id, "params": request})
+        items.append({"match": match, "custom_id": custom_id})
+    return {**doc, "total_claimed": prepared["total_claimed"], "items": items}
+
+
+def build(run_dir: str, contracts: list[str], nachtrag: Optional[str],
+          lv: Optional[str], config_name: str) -> dict:
+    config = CLAUSE_CONFIGS[config_name]
+    os.makedirs(run_dir, exist_ok=True)
+    requests: dict[str, dict] = {}
+    documents = [_contract_document(p, config, requests) for p in contracts]
+    if nachtrag:
+        documents.append(asyncio.run(_nachtrag_document(nachtrag, lv, requests)))
+    if len(requests) > _MAX_REQUESTS:
+        raise SystemExit(f"{len(requests)} requests — split the set (limit {_MAX_REQUESTS}).")
+
+    with open(os.path.join(run_dir, "requests.jsonl"), "w", encoding="utf-8") as f:
+        for req in requests.values():
+            f.write(json.dumps(req, ensure_ascii=False) + "\n")
+    _write_json(os.path.join(run_dir, "manifest.json"),
+                {"config": config_name, "documents": documents})
+
+    items = sum(len(d.get("items", [])) for d in documents)
+    stats = {"documents": len(documents), "items": items, "requests": len(requests),
+             "skipped": sum(1 for d in documents if "skipped" in d)}
+    print(f"built {run_dir}: {stats}")
+    return stats
+
+
+# ── submit / poll / collect ───────────────────────────────────────────────────
+
+def _transport(run_dir: str, name: Optional[str] = None):
+    if name is None:
+        name = _read_json(os.path.join(run_dir, "state.json"))["transport"]
+    return TRANSPORTS[name](run_dir)
+
+
+def submit(run_dir: str, transport_name: str, transport=None) -> str:
+    with open(os.path.join(run_dir, "requests.jsonl"), encoding="utf-8") as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    transport = transport or _transport(run_dir, transport_name)
+    batch_id = transport.submit(requests) if requests else "empty"
+    _write_json(os.path.join(run_dir, "state.json"),
+                {"transport": transport.name, "batch_id": batch_id, "submitted_at": time.time()})
+    print(f"submitted {len(requests)} requests as {batch_id} ({transport.name})")
+    return batch_id
+
+
+def poll(run_dir: str, transport=None) -> dict:
+    state = _read_json(os.path.join(run_dir, "state.json"))
+    if state["batch_id"] == "empty":
+        status = {"ended": True, "status": "ended", "counts": {}}
+    else:
+        status = (transport or _transport(run_dir)).status(state["batch_id"])
+    print(f"{state['batch_id']}: {status['status']} {status['counts']}")
+    return status
+
+
+def _failed_clause(error: str) -> dict:
+    return {
+        "risk_level": "medium",
+        "risk_category": "other",
+        "reason": f"Batch-Anfrage fehlgeschlagen ({error}).",
+        "suggestion": "Manuelle Überprüfung empfohlen — automatische Analyse unvollständig.",
+    }
+
+
+def collect(run_dir: str, transport=None) -> dict:
+    state = _read_json(os.path.join(run_dir, "state.json"))
+    manifest = _read_json(os.path.join(run_dir, "manifest.json"))
+    config = CLAUSE_CONFIGS[manifest["config"]]
+
+    results: dict[str, tuple[Optional[str], Optional[str]]] = {}
+    if state["batch_id"] != "empty":
+        transport = transport or _transport(run_dir)
+        if not transport.status(state["batch_id"])["ended"]:
+            raise SystemExit(f"{state['batch_id']} has not ended yet — poll again later.")
+        results = {cid: (text, err) for cid, text, err in transport.results(state["batch_id"])}
+
+    out, failed = [], 0
+    for doc in manifest["documents"]:
+        entry = {k: doc[k] for k in ("type", "path", "session_id")}
+        if "skipped" in doc:
+            out.append({**entry, "skipped": doc["skipped"]})
+            continue
+        if doc["type"] == "contract":
+            scored = []
+            for item in doc["items"]:
+                if "scored" in item:
+                    scored.append(item["scored"])
+                    continue
+                text, err = results.get(item["custom_id"], (None, "missing from results"))
+                if text is None:
+                    failed += 1
+                    scored.append({**item["clause"], **_failed_clause(err)})
+                else:
+                    scored.append(apply_clause_response(item["clause"], text, config))
+            out.append({**entry, "clauses": scored, "summary": aggregate_risk_summary(scored)})
+        else:
+            positions = []
+            for item in doc["items"]:
+                text, err = results.get(item["custom_id"], (None, "missing from results"))
+                if text is None:
+                    failed += 1
+                    text = ""  # parse_position_response → manual-review fallback
+                positions.append(position_result(item["match"], parse_position_response(text)))
+            out.append({**entry, "positions": positions,
+                        "nachtrag_summary": aggregate_positions(positions, doc["total_claimed"])})
+
+    asyncio.run(clause_index.save())
+    _write_json(os.path.join(run_dir, "scored.json"), {"documents": out})
+    print(f"collected {len(out)} documents into {run_dir}/scored.json ({failed} failed requests)")
+    return {"documents": len(out), "failed_requests": failed}
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _add_build_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--contracts", nargs="*", default=[], help="Contract PDFs (Mode A)")
+    p.add_argument("--nachtrag", help="Nachtrag PDF (Mode B)")
+    p.add_argument("--lv", help="Original LV for --nachtrag (PDF or GAEB)")
+    p.add_argument("--config", default=next(k for k, v in CLAUSE_CONFIGS.items() if v is ACTIVE_CONFIG),
+                   choices=sorted(CLAUSE_CONFIGS), help="Clause config (default: active config)")
+    p.add_argument("--out", required=True, help="Run directory")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline batch scoring (Mode A / Mode B).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    _add_build_args(sub.add_parser("build", help="Write requests.jsonl + manifest.json"))
+    p = sub.add_parser("submit", help="Submit requests.jsonl")
+    p.add_argument("run_dir")
+    p.add_argument("--transport", choices=sorted(TRANSPORTS), default="anthropic")
+    p = sub.add_parser("poll", help="Show batch status")
+    p.add_argument("run_dir")
+    p = sub.add_parser("collect", help="Merge results into scored.json + clause index")
+    p.add_argument("run_dir")
+    p = sub.add_parser("run", help="build + submit + wait + collect")
+    _add_build_args(p)
+    p.add_argument("--transport", choices=sorted(TRANSPORTS), default="anthropic")
+    p.add_argument("--poll-s", type=float, default=60.0, help="Seconds between polls")
+
+    args = parser.parse_args(argv)
+    if args.command in ("build", "run"):
+        if not args.contracts and not args.nachtrag:
+            parser.error("give --contracts and/or --nachtrag")
+        build(args.out, args.contracts, args.nachtrag, args.lv, args.config)
+    if args.command == "build":
+        return
+    run_dir = args.out if args.command == "run" else args.run_dir
+    if args.command in ("submit", "run"):
+        submit(run_dir, args.transport)
+    if args.command == "poll":
+        poll(run_dir)
+    if args.command == "run":
+        while not poll(run_dir)["ended"]:
+            time.sleep(args.poll_s)
+    if args.command in ("collect", "run"):
+        collect(run_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
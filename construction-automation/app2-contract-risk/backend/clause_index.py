@@ -0,0 +1,319 @@
+"""
+clause_index.py — Persistent clause-score cache with near-duplicate lookup.
+
+Two lookups, one store (one index per CLAUSE_CONFIGS entry):
+
+  Exact:  SHA-256 of normalized (number, title, text) → prior scoring.
+          Same clause in a different contract = zero API calls.
+
+  Near:   MinHash signature + LSH banding over word 3-gram shingles.
+          Many clauses differ only in a date, amount or project name
+          ("Vertragsstrafe 0,3 % je Werktag" vs "0,2 % je Werktag").
+          Digits are masked before shingling, so those variants collide.
+
+risk_scorer._score_one() uses the result in two tiers:
+  similarity ≥ CLAUSE_REUSE_THRESHOLD (0.95)     → reuse the prior score,
+  and the same numbers in the same order            marked "reused_from"
+  similarity ≥ CLAUSE_REFERENCE_THRESHOLD (0.70) → prior score passed to
+                                                    Claude as a reference
+The masking is only for finding the reference: in a Vertragsstrafe or
+Sicherheitsleistung the amounts, percentages and deadlines carry the risk
+(0,2 %/Werktag capped at 5 % vs. 3 %/Werktag capped at 50 %), so a
+clause whose numbers differ is always scored, never reused. Each entry
+keeps a hash of its number sequence for that check; entries saved before
+it existed only serve as references.
+
+Design decision — why hand-rolled MinHash over datasketch:
+  64 permutations × a few hundred shingles is ~20k integer ops per clause —
+  negligible next to one API call. No new dependency, and the on-disk
+  format stays plain JSON we control.
+
+LSH parameters: 16 bands × 4 rows. Candidate probability for Jaccard s is
+1 − (1 − s⁴)¹⁶: ≈ 0.99 at s = 0.7, ≈ 0.64 at s = 0.5, ≈ 0.10 at s = 0.3.
+Candidates are then ranked by estimated Jaccard (signature agreement).
+
+Each entry also keeps the clause's hashed term ids (lexical_index.
+hashed_features) — the training set of prescreen.py. Still no clause text.
+
+Bounded: LRU eviction at CLAUSE_INDEX_MAX entries per config (default 5000,
+≈ 6 MB JSON with term ids). Persisted to CLAUSE_INDEX_PATH (default
+backend/.cache/clause_index.json) with an atomic replace, so a crash during
+save never leaves a truncated index behind. Saves are serialized (one lock)
+and each writes its own temp file — concurrent batches finishing together
+never replace each other's half-written file.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+from collections import OrderedDict
+from typing import Optional
+
+from fingerprint import clause_fingerprint
+from lexical_index import hashed_features
+
+_NUM_PERM = 64
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_PRIME = 4294967311  # smallest prime > 2³²
+_MAX_HASH = (1 << 32) - 1
+
+REUSE_THRESHOLD = float(os.getenv("CLAUSE_REUSE_THRESHOLD", "0.95"))
+REFERENCE_THRESHOLD = float(os.getenv("CLAUSE_REFERENCE_THRESHOLD", "0.70"))
+_MAX_ENTRIES = int(os.getenv("CLAUSE_INDEX_MAX", "5000"))
+_INDEX_PATH = os.getenv(
+    "CLAUSE_INDEX_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "clause_index.json"),
+)
+
+# Fixed seed: signatures must be stable across restarts to stay comparable
+# with the persisted index.
+_rng = random.Random(20260518)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERM)]
+
+_TOKEN_RE = re.compile(r"\w+")
+_DIGITS_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+# Only the fields Claude produces are stored — clause text stays with the session
+_SCORE_FIELDS = ("risk_level", "risk_category", "reason", "suggestion")
+
+
+# ── MinHash ───────────────────────────────────────────────────────────────────
+
+def _shingles(text: str) -> set[int]:
+    """Word 3-grams over lower-cased, digit-masked tokens, hashed to 32 bit."""
+    tokens = _TOKEN_RE.findall(_DIGITS_RE.sub("0", text.lower()))
+    if len(tokens) < 3:
+        grams = tokens
+    else:
+        grams = [" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)]
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "big")
+        for g in grams
+    }
+
+
+def minhash(text: str) -> list[int]:
+    shingles = _shingles(text)
+    if not shingles:
+        return [_MAX_HASH] * _NUM_PERM
+    return [min((a * x + b) % _PRIME for x in shingles) for a, b in _PERMS]
+
+
+def _similarity(sig_a: list[int], sig_b: list[int]) -> float:
+    """Estimated Jaccard similarity = fraction of agreeing signature slots."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / _NUM_PERM
+
+
+def _band_keys(sig: list[int]) -> list[str]:
+    return [
+        f"{b}:" + ",".join(str(v) for v in sig[b * _ROWS:(b + 1) * _ROWS])
+        for b in range(_BANDS)
+    ]
+
+
+def _numbers_key(text: str) -> str:
+    """Hash of the numbers in text, in order — amounts, percentages, deadlines."""
+    numbers = "|".join(_DIGITS_RE.findall(text))
+    return hashlib.blake2b(numbers.encode(), digest_size=8).hexdigest()
+
+
+def _exact_key(clause: dict) -> str:
+    return clause_fingerprint(clause)
+
+
+def _shingle_source(clause: dict) -> str:
+    return f"{clause.get('title', '')}\n{clause.get('text', '')}"
+
+
+def prescreen_text(clause: dict) -> str:
+    # Same text the scoring prompt sees (risk_scorer truncates at 1500)
+    return f"{clause.get('title', '')}\n{clause.get('text', '')[:1500]}"
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+class ClauseIndex:
+    """One config's entries: exact-key → entry, LRU-ordered, plus LSH buckets."""
+
+    def __init__(self, max_entries: int = _MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, dict] = OrderedDict()
+        self.buckets: dict[str, set[str]] = {}
+
+    def lookup(self, clause: dict) -> Optional[dict]:
+        """
+        Return {"scoring", "number", "similarity", "exact", "same_numbers"}
+        for the best prior clause, or None if nothing reaches
+        REFERENCE_THRESHOLD. same_numbers: the prior clause has the same
+        number sequence (similarity is estimated on digit-masked text).
+        """
+        key = _exact_key(clause)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return {"scoring": entry["scoring"], "number": entry["number"],
+                    "similarity": 1.0, "exact": True, "same_numbers": True}
+
+        source = _shingle_source(clause)
+        sig = minhash(source)
+        numbers = _numbers_key(source)
+        candidates: set[str] = set()
+        for band_key in _band_keys(sig):
+            candidates |= self.buckets.get(band_key, set())
+
+        # Equally similar candidates: prefer one with the same numbers
+        best_key, best_rank = None, (0.0, False)
+        for cand in candidates:
+            rank = (_similarity(sig, self.entries[cand]["sig"]),
+                    self.entries[cand].get("numbers") == numbers)
+            if rank > best_rank:
+                best_key, best_rank = cand, rank
+
+        best_sim, same_numbers = best_rank
+        if best_key is None or best_sim < REFERENCE_THRESHOLD:
+            return None
+        self.entries.move_to_end(best_key)
+        entry = self.entries[best_key]
+        return {"scoring": entry["scoring"], "number": entry["number"],
+                "similarity": round(best_sim, 3), "exact": False,
+                "same_numbers": same_numbers}
+
+    def add(self, clause: dict, scoring: dict) -> None:
+        key = _exact_key(clause)
+        if key in self.entries:
+            self._remove(key)
+        source = _shingle_source(clause)
+        sig = minhash(source)
+        self.entries[key] = {
+            "number": clause.get("number", ""),
+            "sig": sig,
+            "numbers": _numbers_key(source),
+            "scoring": {f: scoring[f] for f in _SCORE_FIELDS if f in scoring},
+            # Training features for prescreen.py — hashed ids, not text
+            "terms": hashed_features(prescreen_text(clause)),
+        }
+        for band_key in _band_keys(sig):
+            self.buckets.setdefault(band_key, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key)
+        for band_key in _band_keys(entry["sig"]):
+            bucket = self.buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band_key]
+
+    def to_dict(self) -> dict:
+        return {"entries": [[k, e] for k, e in self.entries.items()]}
+
+    @classmethod
+    def from_dict(cls, data: dict, max_entries: int = _MAX_ENTRIES) -> "ClauseIndex":
+        idx = cls(max_entries)
+        for key, entry in data.get("entries", []):
+            idx.entries[key] = entry
+            for band_key in _band_keys(entry["sig"]):
+                idx.buckets.setdefault(band_key, set()).add(key)
+        while len(idx.entries) > max_entries:
+            idx._remove(next(iter(idx.entries)))
+        return idx
+
+
+# ── Module-level store (one index per CLAUSE_CONFIGS key) ─────────────────────
+
+_indexes: dict[str, ClauseIndex] | None = None
+_dirty = False
+_save_lock = asyncio.Lock()
+_save_errors: dict = {"count": 0, "last": None}
+
+
+def _load() -> dict[str, ClauseIndex]:
+    global _indexes
+    if _indexes is None:
+        _indexes = {}
+        try:
+            with open(_INDEX_PATH, encoding="utf-8") as f:
+                data = json.load(f)
+            for config_key, idx_data in data.items():
+                _indexes[config_key] = ClauseIndex.from_dict(idx_data)
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing or unreadable index: start empty, next save rewrites it
+            _indexes = {}
+    return _indexes
+
+
+def index_for(config_key: str) -> ClauseIndex:
+    return _load().setdefault(config_key, ClauseIndex())
+
+
+def lookup(clause: dict, config_key: str) -> Optional[dict]:
+    return index_for(config_key).lookup(clause)
+
+
+def add(clause: dict, scoring: dict, config_key: str) -> None:
+    global _dirty
+    index_for(config_key).add(clause, scoring)
+    _dirty = True
+
+
+def _write(payload: dict) -> None:
+    directory = os.path.dirname(_INDEX_PATH) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Unique temp file in the target directory (os.replace must not cross
+    # filesystems) — a batch_runner or warmup CLI process saving at the same
+    # time gets its own
+    fd, tmp = tempfile.mkstemp(prefix=".clause_index.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, _INDEX_PATH)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+async def save() -> None:
+    """
+    Persist the index if it changed since the last save.
+
+    The snapshot is taken on the event loop (entry dicts are never mutated
+    after insertion, so a shallow copy is consistent); serialization and
+    file I/O run in a worker thread. Concurrent calls wait for the running
+    save; the index stays dirty when a write fails, so the next save retries.
+    """
+    global _dirty
+    async with _save_lock:
+        if not _dirty or _indexes is None:
+            return
+        payload = {k: idx.to_dict() for k, idx in _indexes.items()}
+        _dirty = False
+        try:
+            await asyncio.to_thread(_write, payload)
+        except BaseException:
+            _dirty = True
+            raise
+
+
+def record_save_error(exc: BaseException) -> None:
+    """Note a failed save() that the caller chose not to raise (see stats())."""
+    _save_errors["count"] += 1
+    _save_errors["last"] = f"{type(exc).__name__}: {exc}"
+
+
+def stats() -> dict:
+    """Entries per config and failed saves (for /health)."""
+    return {
+        "entries": {k: len(idx.entries) for k, idx in (_indexes or {}).items()},
+        "save_errors": _save_errors["count"],
+        "last_save_error": _save_errors["last"],
+    }
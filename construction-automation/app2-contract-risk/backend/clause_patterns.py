@@ -71,11 +71,16 @@ for _key, _cfg in CLAUSE_CONFIGS.items():
     ]
 
 
-def _signals_for(config: dict) -> list:
+def config_key(config: dict) -> str:
+    """Return the CLAUSE_CONFIGS key for a config dict ("" if not registered)."""
     for key, cfg in CLAUSE_CONFIGS.items():
         if cfg is config:
-            return _compiled_signals.get(key, [])
-    return []
+            return key
+    return ""
+
+
+def _signals_for(config: dict) -> list:
+    return _compiled_signals.get(config_key(config), [])
 
 
 # ── Core functions ────────────────────────────────────────────────────────────
@@ -212,8 +217,26 @@ def has_risk_signals(clause_text: str, clause_number: str = "", config: dict = N
     if config is None:
         config = ACTIVE_CONFIG
 
-    for hr in config.get("high_risk_clauses", []):
-        if hr.lower() in clause_number.lower():
-            return True
+    if is_listed_high_risk(clause_number, config):
+        return True
+
+    return any(p.search(clause_text) for p in _signals_for(config))
+
+
+def is_listed_high_risk(clause_number: str, config: dict = None) -> bool:
+    """True if the clause number is in the config's high_risk_clauses list."""
+    if config is None:
+        config = ACTIVE_CONFIG
+    return any(hr.lower() in clause_number.lower() for hr in config.get("high_risk_clauses", []))
+
 
-    return any(p.search(clause_text) for p in _signals_for(config))
\ No newline at end of file
+def matched_signals(clause_text: str, config: dict = None) -> list[str]:
+    """Risk signal phrases found in the clause text, in config order."""
+    if config is None:
+        config = ACTIVE_CONFIG
+    hits = []
+    for p in _signals_for(config):
+        m = p.search(clause_text)
+        if m:
+            hits.append(m.group(0))
+    return hits
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+contract_diff.py — Clause-level diff between two revisions of a contract.
+
+Used by /analyze-contract when previous_session_id is given. During
+negotiation the same contract is uploaded revision after revision; most
+clauses are untouched between rounds. Only added or modified clauses go to
+Claude — the rest carry their previous score over.
+
+Matching (by clause number, then text hash):
+  same number, same hash       → unchanged  (score carried over)
+  same number, different hash  → modified   (re-scored)
+  new number,  hash seen before under a removed number
+                               → moved      (score carried over)
+  new number,  new hash        → added      (re-scored)
+  old number not in revision   → removed
+
+A carried-over score that was degraded (rule-based during an API outage,
+llm.py) is re-scored like a modified clause; its change stays "unchanged"
+or "moved".
+
+The text hash uses fingerprint.normalize_text(), so re-flowed line breaks or
+ligature differences from a re-export do not count as modifications.
+
+Redline: modified clauses carry a word-level diff in [-removed-] {+added+}
+notation (the same convention as `git diff --word-diff`), capped so a fully
+rewritten clause does not bloat the response.
+"""
+
+import hashlib
+from difflib import SequenceMatcher
+
+from fingerprint import normalize_text
+
+_REDLINE_MAX_CHARS = 1500
+
+
+def clause_hash(clause: dict) -> str:
+    return hashlib.sha256(normalize_text(clause.get("text", "")).encode()).hexdigest()
+
+
+def plan_revision(previous: list[dict], current: list[dict]) -> tuple[list[dict | None], list[str]]:
+    """
+    Decide per current clause whether its previous score can be carried over.
+
+    Returns (carried, changes):
+      carried  one entry per current clause — the merged scored dict if the
+               score carries over, None if the clause must be re-scored
+               (added, modified, or its previous score was degraded)
+      changes  one entry per current clause — "unchanged" | "moved" |
+               "modified" | "added"
+    """
+    prev_by_number = {c["number"]: c for c in previous}
+    current_numbers = {c["number"] for c in current}
+    # Removed clauses, indexed by text hash, for move detection
+    removed_by_hash = {
+        clause_hash(c): c for c in previous if c["number"] not in current_numbers
+    }
+
+    carried: list[dict | None] = []
+    changes: list[str] = []
+    for clause in current:
+        h = clause_hash(clause)
+        prev = prev_by_number.get(clause["number"])
+        if prev is not None:
+            if clause_hash(prev) == h:
+                carried.append(_carry(prev, clause))
+                changes.append("unchanged")
+            else:
+                carried.append(None)
+                changes.append("modified")
+        elif h in removed_by_hash:
+            carried.append(_carry(removed_by_hash.pop(h), clause))
+            changes.append("moved")
+        else:
+            carried.append(None)
+            changes.append("added")
+    return carried, changes
+
+
+def _carry(prev: dict, clause: dict) -> dict | None:
+    return None if prev.get("degraded") else {**prev, **clause}
+
+
+def _word_redline(old: str, new: str) -> str:
+    old_words, new_words = old.split(), new.split()
+    out: list[str] = []
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, old_words, new_words, autojunk=False).get_opcodes():
+        if op == "equal":
+            out.extend(old_words[i1:i2])
+            continue
+        if op in ("delete", "replace"):
+            out.append("[-" + " ".join(old_words[i1:i2]) + "-]")
+        if op in ("insert", "replace"):
+            out.append("{+" + " ".join(new_words[j1:j2]) + "+}")
+    text = " ".join(out)
+    return text if len(text) <= _REDLINE_MAX_CHARS else text[:_REDLINE_MAX_CHARS] + " …"
+
+
+def build_delta(previous: list[dict], current: list[dict]) -> dict:
+    """Redline-style delta between two scored clause lists."""
+    carried, changes = plan_revision(previous, current)
+    prev_by_number = {c["number"]: c for c in previous}
+    current_numbers = {c["number"] for c in current}
+    moved_hashes = {clause_hash(c) for c, ch in zip(current, changes) if ch == "moved"}
+
+    entries = []
+    for clause, change in zip(current, changes):
+        if change == "unchanged":
+            continue
+        prev = prev_by_number.get(clause["number"])
+        entry = {
+            "number": clause["number"],
+            "title": clause["title"],
+            "change": change,
+            "old_risk_level": prev.get("risk_level") if prev else None,
+            "new_risk_level": clause.get("risk_level"),
+        }
+        if change == "moved":
+            entry["old_risk_level"] = clause.get("risk_level")  # score carried over
+        if change == "modified":
+            entry["redline"] = _word_redline(prev.get("text", ""), clause.get("text", ""))
+        entries.append(entry)
+
+    for prev in previous:
+        if prev["number"] in current_numbers or clause_hash(prev) in moved_hashes:
+            continue
+        entries.append({
+            "number": prev["number"],
+            "title": prev["title"],
+            "change": "removed",
+            "old_risk_level": prev.get("risk_level"),
+            "new_risk_level": None,
+        })
+
+    counts = {k: 0 for k in ("added", "modified", "moved", "removed", "unchanged")}
+    for change in changes:
+        counts[change] += 1
+    counts["removed"] = sum(1 for e in entries if e["change"] == "removed")
+
+    return {
+        "counts": counts,
+        "rescored": carried.count(None),  # added + modified + degraded carry-overs
+        "changes": entries,
+    }
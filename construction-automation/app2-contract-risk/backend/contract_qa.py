@@ -3,11 +3,14 @@ contract_qa.py — Free-text Q&A over an analyzed contract (Mode A session).
 
 Architecture:
   No vector DB. Contracts are 20–50 clauses × 2000 chars ≈ 100k chars max.
-  This fits in a single Claude context window. "Retrieval" is keyword overlap
-  scoring — fast, zero dependencies, no embedding cost.
+  This fits in a single Claude context window. "Retrieval" is lexical BM25
+  (lexical_index.py) with German stemming and compound splitting — fast,
+  zero dependencies, no embedding cost.
 
-  User question → extract keywords → score clauses by overlap →
-  top-5 clauses as context → Claude answers with structured JSON.
+  /analyze-contract → build_clause_index() once per session (cached in main.py)
+  User question → BM25 lookup (sub-millisecond) →
+  top-5 clauses as context → answer cache (answer_cache.py) →
+  Claude answers with structured JSON.
 
 Supported question types (from field experience):
   - Scope: "Ist die Leistung im LV enthalten?"
@@ -18,22 +21,18 @@ Supported question types (from field experience):
 """
 
 import os
-import re
 import json
 import asyncio
-from anthropic import AsyncAnthropic
+from typing import TYPE_CHECKING
 
-_MODEL = "claude-haiku-4-5-20251001"
+if TYPE_CHECKING:  # the SDK itself is imported on first use
+    from anthropic import AsyncAnthropic
+
+import cassette
+from answer_cache import cached_answer
+from lexical_index import Bm25Index
 
-_STOPWORDS_DE = {
-    "der", "die", "das", "den", "dem", "des", "ein", "eine", "einen",
-    "einem", "eines", "und", "oder", "aber", "ist", "sind", "wird",
-    "werden", "hat", "haben", "für", "mit", "von", "zu", "an", "auf",
-    "im", "in", "bei", "nach", "aus", "durch", "über", "unter", "wie",
-    "was", "wer", "wo", "wenn", "ob", "dass", "nicht", "kann", "muss",
-    "soll", "darf", "alle", "auch", "noch", "nur", "sich", "dieser",
-    "diese", "dieses", "welche", "welcher", "welches",
-}
+_MODEL = "claude-haiku-4-5-20251001"
 
 _SYSTEM = (
     "Du bist ein erfahrener Baujurist und Bauüberwacher mit Spezialisierung "
@@ -64,42 +63,45 @@ Antworte mit exakt diesem JSON:
 }}"""
 
 
-def _extract_keywords(question: str) -> set[str]:
-    """Extract meaningful tokens from question for clause matching."""
-    tokens = re.findall(r'\b\w{3,}\b', question.lower())
-    return {t for t in tokens if t not in _STOPWORDS_DE}
+# Field weights as token repetition — same ratios as the former substring
+# scorer: number match = 5, title match = 3, text match = 1.
+_NUMBER_WEIGHT = 5
+_TITLE_WEIGHT = 3
 
 
-def _score_clause(clause: dict, keywords: set[str]) -> int:
-    """
-    Score a clause by keyword overlap with the question.
-    Weights: title match = 3, number match = 5, text match = 1 per keyword.
-    """
-    score = 0
-    text_lower = clause.get("text", "").lower()
-    title_lower = clause.get("title", "").lower()
-    number_lower = clause.get("number", "").lower()
-
-    for kw in keywords:
-        if kw in text_lower:
-            score += 1
-        if kw in title_lower:
-            score += 3
-        if kw in number_lower:
-            score += 5
-    return score
-
-
-def retrieve_relevant_clauses(clauses: list[dict], question: str, top_n: int = 5) -> list[dict]:
+def build_clause_index(clauses: list[dict]) -> Bm25Index:
+    """One BM25 document per clause, doc_id = position in `clauses`."""
+    return Bm25Index.build([
+        f"{c.get('number', '')} " * _NUMBER_WEIGHT
+        + f"{c.get('title', '')} " * _TITLE_WEIGHT
+        + c.get("text", "")
+        for c in clauses
+    ])
+
+
+def retrieve_relevant_clauses(
+    clauses: list[dict],
+    question: str,
+    top_n: int = 5,
+    index: Bm25Index | None = None,
+) -> list[dict]:
     """
     Return top-N clauses most relevant to the question.
     Always includes all HIGH risk clauses (capped at 3) regardless of score —
     they're likely relevant to any serious question about the contract.
+
+    index: prebuilt build_clause_index(clauses); built on the fly if None.
+    If fewer than top_n clauses match, the rest is filled in document order.
     """
-    keywords = _extract_keywords(question)
-    scored = sorted(clauses, key=lambda c: _score_clause(c, keywords), reverse=True)
+    if index is None:
+        index = build_clause_index(clauses)
 
-    top = scored[:top_n]
+    top = [clauses[doc_id] for doc_id, _ in index.search(question, top_n)]
+    for c in clauses:
+        if len(top) >= top_n:
+            break
+        if c not in top:
+            top.append(c)
 
     # Always include HIGH risk clauses not already in top
     high_risk = [c for c in clauses if c.get("risk_level") == "high" and c not in top]
@@ -121,21 +123,45 @@ def _build_context(clauses: list[dict]) -> str:
     return "\n\n---\n\n".join(parts)
 
 
-async def answer_question(clauses: list[dict], question: str) -> dict:
+async def answer_question(
+    clauses: list[dict],
+    question: str,
+    index: Bm25Index | None = None,
+    session_id: str | None = None,
+) -> dict:
     """
     Main entry point. Takes the full clause list from the session cache
-    and a free-text question. Returns structured JSON answer.
+    (plus its BM25 index, if cached) and a free-text question.
+    Returns structured JSON answer.
+
+    session_id: enables the answer cache (answer_cache.py) for this session.
     """
     key = os.getenv("ANTHROPIC_API_KEY")
     if not key:
         raise RuntimeError("ANTHROPIC_API_KEY not set.")
 
-    client = AsyncAnthropic(api_key=key)
-    relevant = retrieve_relevant_clauses(clauses, question)
+    relevant = retrieve_relevant_clauses(clauses, question, index=index)
     context = _build_context(relevant)
-
     prompt = _PROMPT_TEMPLATE.format(context=context, question=question)
 
+    result = await cached_answer(
+        "contract", session_id, question, context,
+        lambda: _ask_claude(_client(key), prompt),
+    )
+    result["question"] = question
+    result["clauses_consulted"] = [
+        f"{c['number']} {c['title']}" for c in relevant
+    ]
+    return result
+
+
+def _client(key: str) -> "AsyncAnthropic":
+    from anthropic import AsyncAnthropic  # on first question, not at startup
+    return AsyncAnthropic(api_key=key, http_client=cassette.async_http_client())
+
+
+async def _ask_claude(client: "AsyncAnthropic", prompt: str) -> tuple[dict, bool]:
+    """One Claude call → (answer dict, whether the JSON parsed)."""
     response = await client.messages.create(
         model=_MODEL,
         max_tokens=600,
@@ -157,8 +183,9 @@ async def answer_question(clauses: list[dict], question: str) -> dict:
                     "action_required", "confidence"):
             if key not in result:
                 raise KeyError(key)
+        return result, True
     except (json.JSONDecodeError, KeyError):
-        result = {
+        return {
             "answer": raw[:400],
             "relevant_clauses": [],
             "legal_basis": "Nicht ermittelbar",
@@ -166,10 +193,4 @@ async def answer_question(clauses: list[dict], question: str) -> dict:
             "action_required": "Manuelle Prüfung erforderlich",
             "confidence": "low",
             "confidence_note": "Automatische Analyse fehlgeschlagen",
-        }
-
-    result["question"] = question
-    result["clauses_consulted"] = [
-        f"{c['number']} {c['title']}" for c in relevant
-    ]
-    return result
\ No newline at end of file
+        }, False
@@ -10,11 +10,25 @@ Mode B: export_stellungnahme_docx(data) → bytes
 Design: uses python-docx (same library as App 4). No external template file
 needed — document structure is built programmatically. This keeps deployment
 simple (no template assets to manage on Render).
+
+Per-clause and per-position blocks (heading, meta line, reason, suggestion /
+Verhandlungsposition) are written as one WordprocessingML fragment, parsed
+once and inserted before the section properties. python-docx's object API
+scans the body for w:sectPr on every add_paragraph, so a 2,000-position
+Stellungnahme cost O(n²). The fragment builders mirror exactly what the
+object API writes (run splitting at tabs / line breaks, xml:space, rPr
+order); bulk_xml=False keeps the object-API path as the reference, and
+benchmarks/micro.py checks both produce the same document.xml.
 """
 
 import io
+import re
 from datetime import datetime
+from xml.sax.saxutils import escape
+
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from docx.shared import Pt, RGBColor, Inches, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
@@ -27,6 +41,10 @@ _DARK   = RGBColor(0x1F, 0x29, 0x37)  # near-black for body
 _RISK_COLOUR = {"HIGH": _RED, "MEDIUM": _AMBER, "LOW": _GREEN}
 _ASSESS_COLOUR = {"REJECT": _RED, "NEGOTIATE": _AMBER, "ACCEPT": _GREEN}
 
+# Part of the rendered-DOCX cache key (main.py) — bump it with every change
+# to the document layout so no render of the old layout is served.
+TEMPLATE_VERSION = 1
+
 
 def _set_font(run, size_pt: int = 11, bold: bool = False, colour: RGBColor = None):
     run.font.size = Pt(size_pt)
@@ -46,11 +64,12 @@ def _add_meta_line(doc, label: str, value: str, colour: RGBColor = None):
 
 # ── Mode A — Risk Report ──────────────────────────────────────────────────────
 
-def export_risk_report_docx(data: dict) -> bytes:
+def export_risk_report_docx(data: dict, bulk_xml: bool = True) -> bytes:
     """
     Export Mode A analysis result as a formatted DOCX.
 
     data keys: clauses (list), summary (dict)
+    bulk_xml: write the clause blocks as one XML fragment (see module docstring)
     """
     doc = Document()
     _set_page_margins(doc)
@@ -94,11 +113,21 @@ def export_risk_report_docx(data: dict) -> bytes:
     # ── Per-clause details ──
     doc.add_heading("Klauseldetails", level=2)
 
-    for clause in data.get("clauses", []):
+    clauses = data.get("clauses", [])
+    if bulk_xml:
+        _append_xml(doc, _clause_blocks_xml(doc, clauses))
+    else:
+        _add_clause_blocks(doc, clauses)
+
+    return _to_bytes(doc)
+
+
+def _add_clause_blocks(doc, clauses: list):
+    for clause in clauses:
         risk = clause.get("risk_level", "low").upper()
         colour = _RISK_COLOUR.get(risk, _DARK)
 
-        h = doc.add_heading(f"{clause['number']} — {clause['title']}", level=3)
+        doc.add_heading(f"{clause['number']} — {clause['title']}", level=3)
 
         meta = doc.add_paragraph()
         r_risk = meta.add_run(f"Risiko: {risk}")
@@ -117,16 +146,39 @@ def export_risk_report_docx(data: dict) -> bytes:
 
         doc.add_paragraph()
 
-    return _to_bytes(doc)
+
+def _clause_blocks_xml(doc, clauses: list) -> str:
+    """Fragment equivalent of _add_clause_blocks."""
+    heading = _style_id(doc, "Heading 3")
+    parts = []
+    for clause in clauses:
+        risk = clause.get("risk_level", "low").upper()
+        colour = _RISK_COLOUR.get(risk, _DARK)
+
+        parts.append(_p_xml(_r_xml(f"{clause['number']} — {clause['title']}"), heading))
+        parts.append(_p_xml(
+            _r_xml(f"Risiko: {risk}", bold=True, colour=colour, size_pt=11)
+            + _r_xml(f"  ·  Kategorie: {clause.get('risk_category', '').upper()}")
+            + _r_xml(f"  ·  Seite ~{clause.get('page_start', '?')}")
+        ))
+        if clause.get("reason"):
+            parts.append(_p_xml(_r_xml(clause["reason"])))
+        if clause.get("suggestion"):
+            parts.append(_p_xml(
+                _r_xml("Empfehlung: ", bold=True, size_pt=11) + _r_xml(clause["suggestion"])
+            ))
+        parts.append("<w:p/>")
+    return "".join(parts)
 
 
 # ── Mode B — Stellungnahme ────────────────────────────────────────────────────
 
-def export_stellungnahme_docx(data: dict) -> bytes:
+def export_stellungnahme_docx(data: dict, bulk_xml: bool = True) -> bytes:
     """
     Export Mode B result as a formal Stellungnahme DOCX.
 
     data keys: nachtrag_summary (dict), positions (list), stellungnahme (str)
+    bulk_xml: write the position blocks as one XML fragment (see module docstring)
     """
     doc = Document()
     _set_page_margins(doc)
@@ -189,7 +241,17 @@ def export_stellungnahme_docx(data: dict) -> bytes:
     doc.add_page_break()
     doc.add_heading("Positions-Bewertung", level=2)
 
-    for i, pos in enumerate(data.get("positions", []), 1):
+    positions = data.get("positions", [])
+    if bulk_xml:
+        _append_xml(doc, _position_blocks_xml(doc, positions))
+    else:
+        _add_position_blocks(doc, positions)
+
+    return _to_bytes(doc)
+
+
+def _add_position_blocks(doc, positions: list):
+    for i, pos in enumerate(positions, 1):
         oz = pos.get("oz") or pos.get("lv_oz") or f"Pos. {i}"
         desc = pos.get("nachtrag_description", "")[:70]
         doc.add_heading(f"OZ {oz} — {desc}", level=3)
@@ -214,7 +276,32 @@ def export_stellungnahme_docx(data: dict) -> bytes:
 
         doc.add_paragraph()
 
-    return _to_bytes(doc)
+
+def _position_blocks_xml(doc, positions: list) -> str:
+    """Fragment equivalent of _add_position_blocks."""
+    heading = _style_id(doc, "Heading 3")
+    parts = []
+    for i, pos in enumerate(positions, 1):
+        oz = pos.get("oz") or pos.get("lv_oz") or f"Pos. {i}"
+        desc = pos.get("nachtrag_description", "")[:70]
+        assessment = pos.get("assessment", "negotiate").upper()
+        a_colour = _ASSESS_COLOUR.get(assessment, _DARK)
+
+        parts.append(_p_xml(_r_xml(f"OZ {oz} — {desc}"), heading))
+        parts.append(_p_xml(
+            _r_xml(f"Bewertung: {assessment}", bold=True, colour=a_colour, size_pt=11)
+            + _r_xml(f"  ·  {pos.get('vob_paragraph', '')}")
+            + _r_xml(f"  ·  Forderung: EUR {_fmt(pos.get('nachtrag_claimed_total', 0))}")
+        ))
+        if pos.get("reason"):
+            parts.append(_p_xml(_r_xml(pos["reason"])))
+        if pos.get("negotiation_position"):
+            parts.append(_p_xml(
+                _r_xml("Verhandlungsposition: ", bold=True, size_pt=11)
+                + _r_xml(pos["negotiation_position"])
+            ))
+        parts.append("<w:p/>")
+    return "".join(parts)
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -237,6 +324,58 @@ def _set_page_margins(doc: Document, margin_cm: float = 2.5):
         section.right_margin = margin
 
 
+# ── Bulk XML ──────────────────────────────────────────────────────────────────
+
+_RUN_BREAKS = re.compile(r"([\t\r\n])")
+
+
+def _style_id(doc: Document, name: str) -> str:
+    return doc.styles[name].style_id
+
+
+def _r_xml(text: str, bold: bool = None, colour: RGBColor = None, size_pt: int = None) -> str:
+    """
+    w:r as Paragraph.add_run(text) + _set_font writes it: rPr children in
+    schema order (b, color, sz); \t → w:tab, \r / \n → w:br; xml:space on
+    w:t with leading or trailing whitespace.
+    """
+    rpr = ""
+    if bold is not None:
+        rpr += "<w:b/>" if bold else '<w:b w:val="0"/>'
+    if colour is not None:
+        rpr += f'<w:color w:val="{colour}"/>'
+    if size_pt is not None:
+        rpr += f'<w:sz w:val="{size_pt * 2}"/>'
+    content = []
+    for piece in _RUN_BREAKS.split(text):
+        if piece == "\t":
+            content.append("<w:tab/>")
+        elif piece in ("\r", "\n"):
+            content.append("<w:br/>")
+        elif piece:
+            space = ' xml:space="preserve"' if len(piece.strip()) < len(piece) else ""
+            content.append(f"<w:t{space}>{escape(piece)}</w:t>")
+    rpr = f"<w:rPr>{rpr}</w:rPr>" if rpr else ""
+    return f"<w:r>{rpr}{''.join(content)}</w:r>"
+
+
+def _p_xml(runs: str, style_id: str = None) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ""
+    return f"<w:p>{ppr}{runs}</w:p>"
+
+
+def _append_xml(doc: Document, fragment: str):
+    """Parse a run of body-level elements once and insert them before w:sectPr."""
+    body = doc.element.body
+    parsed = parse_xml(f"<w:body {nsdecls('w')}>{fragment}</w:body>")
+    sect_pr = body.sectPr
+    for element in list(parsed):
+        if sect_pr is not None:
+            sect_pr.addprevious(element)
+        else:
+            body.append(element)
+
+
 def _to_bytes(doc: Document) -> bytes:
     buf = io.BytesIO()
     doc.save(buf)
@@ -0,0 +1,63 @@
+"""
+fingerprint.py — Content-level document fingerprints for the Mode A cache.
+
+The primary cache key is MD5 of the raw PDF bytes. Re-saved, re-signed or
+re-printed copies of the same contract change the bytes (metadata, object
+order, signature dictionaries, producer strings) while extract_text() still
+yields the same text. Those copies always missed the cache.
+
+Content fingerprints, computed after extraction:
+
+  text_fingerprint(text)
+    SHA-256 of the normalized full text. Catches re-saves and re-signs:
+    identical text layer, different container.
+
+  clause_fingerprint(clause)
+    SHA-256 of one clause's normalized (number, title, text) — exactly what
+    the scoring prompt sees. Key of the clause index and of portfolio
+    deduplication.
+
+  clause_set_fingerprint(clauses)
+    SHA-256 over the ordered (number, title, normalized text) of the
+    extracted clauses. Catches re-prints whose headers/footers, page breaks
+    or cover pages differ but whose clause content is identical — that is
+    exactly what the scorer sees, so reusing the result is safe.
+
+Normalization: Unicode NFKC (ligatures, non-breaking spaces), soft hyphens
+removed, whitespace runs collapsed. Case and punctuation are kept — they can
+carry legal meaning ("Tage" vs "tage" does not, but "5 %" vs "5 ‰" does).
+"""
+
+import hashlib
+import re
+import unicodedata
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for hashing — not for display."""
+    text = unicodedata.normalize("NFKC", text).replace("\u00ad", "")
+    return _WS_RE.sub(" ", text).strip()
+
+
+def text_fingerprint(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode()).hexdigest()
+
+
+def clause_fingerprint(clause: dict) -> str:
+    """SHA-256 of one clause's normalized (number, title, text)."""
+    raw = "\x1f".join(
+        normalize_text(clause.get(f, "")) for f in ("number", "title", "text")
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def clause_set_fingerprint(clauses: list[dict]) -> str:
+    h = hashlib.sha256()
+    for c in clauses:
+        for part in (c.get("number", ""), c.get("title", ""), c.get("text", "")):
+            h.update(normalize_text(part).encode())
+            h.update(b"\x1f")  # unit separator — keeps field boundaries
+        h.update(b"\x1e")      # record separator — keeps clause boundaries
+    return h.hexdigest()
@@ -28,7 +28,6 @@ Known limitation (V1):
 
 import os
 from typing import Optional
-from lxml import etree
 
 
 # ── Public API ────────────────────────────────────────────────────────────────
@@ -52,6 +51,7 @@ def parse_gaeb_file(gaeb_bytes: bytes) -> list[dict]:
 
     Raises ValueError if bytes are not valid XML.
     """
+    from lxml import etree  # imported on the first GAEB upload, not at startup
     try:
         root = etree.fromstring(gaeb_bytes)
     except etree.XMLSyntaxError as exc:
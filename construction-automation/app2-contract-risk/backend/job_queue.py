@@ -0,0 +1,388 @@
+"""
+job_queue.py — Durable background jobs for long analyses (SQLite-backed).
+
+Problem:
+  A large contract or Nachtrag keeps the HTTP request open for minutes.
+  The hosting proxy cuts idle connections long before that, and everything
+  Claude already scored for the request is lost with it.
+
+Approach:
+  /analyze-contract and /analyze-nachtrag accept as_job=true. The uploads go
+  into a local SQLite file, the endpoint returns a job_id at once, and worker
+  tasks on the same event loop run the normal pipeline. Clients poll
+  GET /jobs/{id} (status + progress) and fetch GET /jobs/{id}/result.
+
+Tables:
+  jobs         one row per job: status, progress, result JSON or error
+  job_inputs   uploaded bytes — deleted as soon as the job finishes
+  checkpoints  one row per finished unit of work (clause, position)
+
+Checkpoints and resume:
+  score_clauses() and analyze_nachtrag() take an optional Checkpoint. Each
+  scored clause / position is written under a content key (Checkpoint.key)
+  the moment it finishes. Jobs that were "running" when the process stopped
+  are re-queued at startup; the rerun loads the checkpoint and only sends
+  the clauses / positions that are still missing to Claude. Content keys
+  rather than list positions: if a Claude extraction step returns a
+  slightly different position list on rerun, stale rows simply don't match.
+  A job that took the process down JOB_MAX_ATTEMPTS times is failed instead
+  of re-queued forever.
+
+Retention: finished jobs (done / failed) are deleted JOB_RETENTION_H hours
+after their last update — at startup and then by the workers every
+JOB_EXPIRE_EVERY_S seconds, so a long-running instance does not keep every
+result it ever produced.
+
+Why SQLite over Redis/Celery: one Render instance, no extra service to run
+or pay for, and the file survives process restarts on the persistent disk.
+Each operation opens its own short-lived connection in a worker thread
+(asyncio.to_thread) — the event loop never blocks on the database, and WAL
+mode lets status polls read while a worker writes.
+
+Scope: one process owns the queue. Several uvicorn workers sharing the file
+would each re-queue the others' running jobs at startup.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from typing import Any, Awaitable, Callable, Optional
+
+_DB_PATH = os.getenv(
+    "JOB_DB_PATH",
+    os.path.join(os.path.dirname(__file__), ".cache", "jobs.sqlite3"),
+)
+_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+_RETENTION_S = float(os.getenv("JOB_RETENTION_H", "24")) * 3600
+_EXPIRE_EVERY_S = float(os.getenv("JOB_EXPIRE_EVERY_S", "600"))
+_POLL_S = 5.0  # idle workers re-check the table even without a wakeup
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    status       TEXT NOT NULL,             -- queued | running | done | failed
+    params       TEXT NOT NULL,             -- JSON
+    stage        TEXT,
+    done         INTEGER NOT NULL DEFAULT 0,
+    total        INTEGER NOT NULL DEFAULT 0,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    result       TEXT,                      -- JSON, once done
+    error_status INTEGER,
+    error        TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_inputs (
+    job_id TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    data   BLOB NOT NULL,
+    PRIMARY KEY (job_id, name)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id TEXT NOT NULL,
+    stage  TEXT NOT NULL,
+    item   TEXT NOT NULL,
+    value  TEXT NOT NULL,
+    PRIMARY KEY (job_id, stage, item)
+);
+"""
+
+
+# ── SQLite (sync — always called via asyncio.to_thread) ──────────────────────
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _init_db() -> None:
+    """Create tables, re-queue interrupted jobs, purge expired ones."""
+    os.makedirs(os.path.dirname(_DB_PATH) or ".", exist_ok=True)
+    now = time.time()
+    with closing(_connect()) as conn, conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error_status = 500,"
+            " error = 'Job aborted the worker repeatedly — giving up.', updated_at = ?"
+            " WHERE status = 'running' AND attempts >= ?",
+            (now, _MAX_ATTEMPTS),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'",
+            (now,),
+        )
+        _delete_expired(conn, now)
+
+
+def _expire() -> int:
+    """Delete finished jobs past JOB_RETENTION_H; returns how many."""
+    with closing(_connect()) as conn, conn:
+        return _delete_expired(conn, time.time())
+
+
+def _delete_expired(conn: sqlite3.Connection, now: float) -> int:
+    expired = [r["id"] for r in conn.execute(
+        "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+        (now - _RETENTION_S,),
+    )]
+    for job_id in expired:
+        _purge(conn, job_id)
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+    return len(expired)
+
+
+def _purge(conn: sqlite3.Connection, job_id: str) -> None:
+    """Drop inputs and checkpoints — uploads must not outlive their job."""
+    conn.execute("DELETE FROM job_inputs WHERE job_id = ?", (job_id,))
+    conn.execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+
+
+def _insert(job_id: str, kind: str, params: dict, inputs: dict[str, bytes]) -> None:
+    now = time.time()
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, params, created_at, updated_at)"
+            " VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, kind, json.dumps(params, ensure_ascii=False), now, now),
+        )
+        conn.executemany(
+            "INSERT INTO job_inputs (job_id, name, data) VALUES (?, ?, ?)",
+            [(job_id, name, data) for name, data in inputs.items()],
+        )
+
+
+def _claim_next() -> Optional[sqlite3.Row]:
+    with closing(_connect()) as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?"
+            " WHERE id = ?",
+            (time.time(), row["id"]),
+        )
+        return row
+
+
+def _load_inputs(job_id: str) -> dict[str, bytes]:
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT name, data FROM job_inputs WHERE job_id = ?", (job_id,)
+        ).fetchall()
+    return {r["name"]: bytes(r["data"]) for r in rows}
+
+
+def _begin_stage(job_id: str, stage: str, total: int) -> dict[str, Any]:
+    with closing(_connect()) as conn, conn:
+        rows = conn.execute(
+            "SELECT item, value FROM checkpoints WHERE job_id = ? AND stage = ?",
+            (job_id, stage),
+        ).fetchall()
+        conn.execute(
+            "UPDATE jobs SET stage = ?, done = ?, total = ?, updated_at = ? WHERE id = ?",
+            (stage, len(rows), total, time.time(), job_id),
+        )
+    return {r["item"]: json.loads(r["value"]) for r in rows}
+
+
+def _save_item(job_id: str, stage: str, item: str, value: str) -> None:
+    with closing(_connect()) as conn, conn:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO checkpoints (job_id, stage, item, value) VALUES (?, ?, ?, ?)",
+            (job_id, stage, item, value),
+        )
+        if cur.rowcount:
+            conn.execute(
+                "UPDATE jobs SET done = done + 1, updated_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+
+def _finish(job_id: str, result: str) -> None:
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, updated_at = ? WHERE id = ?",
+            (result, time.time(), job_id),
+        )
+        _purge(conn, job_id)
+
+
+def _fail(job_id: str, error_status: int, error: str) -> None:
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error_status = ?, error = ?, updated_at = ?"
+            " WHERE id = ?",
+            (error_status, error, time.time(), job_id),
+        )
+        _purge(conn, job_id)
+
+
+def _get(job_id: str) -> Optional[dict]:
+    with closing(_connect()) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row is not None else None
+
+
+def counts() -> dict[str, int]:
+    """Jobs per status (for /health, /metrics). Sync — call via asyncio.to_thread."""
+    if not os.path.exists(_DB_PATH):
+        return {}
+    with closing(_connect()) as conn:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+    return {r["status"]: r["n"] for r in rows}
+
+
+# ── Job + Checkpoint handles (what handlers see) ──────────────────────────────
+
+class Checkpoint:
+    """Per-stage store of finished work items for one job."""
+
+    def __init__(self, job_id: str, stage: str):
+        self.job_id = job_id
+        self.stage = stage
+
+    @staticmethod
+    def key(item: Any) -> str:
+        """Content key for a work item (clause / matched position dict)."""
+        raw = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+    async def load(self, total: int) -> dict[str, Any]:
+        """Report the stage as started with `total` items; return items already done."""
+        return await asyncio.to_thread(_begin_stage, self.job_id, self.stage, total)
+
+    async def save(self, item: str, value: Any) -> None:
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        await asyncio.to_thread(_save_item, self.job_id, self.stage, item, payload)
+
+
+class Job:
+    def __init__(self, job_id: str, kind: str, params: dict, inputs: dict[str, bytes]):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.inputs = inputs
+
+    def checkpoint(self, stage: str) -> Checkpoint:
+        return Checkpoint(self.id, stage)
+
+
+# ── Queue API ─────────────────────────────────────────────────────────────────
+
+Handler = Callable[[Job], Awaitable[dict]]
+
+_handlers: dict[str, Handler] = {}
+_workers: list[asyncio.Task] = []
+_wakeup: asyncio.Event | None = None
+_next_expiry = 0.0  # time.monotonic() of the next retention sweep
+
+
+def register(kind: str, handler: Handler) -> None:
+    _handlers[kind] = handler
+
+
+async def enqueue(kind: str, params: dict, inputs: dict[str, bytes]) -> str:
+    job_id = uuid.uuid4().hex
+    await asyncio.to_thread(_insert, job_id, kind, params, inputs)
+    if _wakeup is not None:
+        _wakeup.set()
+    return job_id
+
+
+async def get(job_id: str) -> Optional[dict]:
+    """
+    Public view of a job: {job_id, kind, status, progress, created_at,
+    updated_at, error_status, error, result} — result parsed once done.
+    """
+    row = await asyncio.to_thread(_get, job_id)
+    if row is None:
+        return None
+    return {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "progress": {"stage": row["stage"], "done": row["done"], "total": row["total"]},
+        "attempts": row["attempts"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "error_status": row["error_status"],
+        "error": row["error"],
+        "result": json.loads(row["result"]) if row["result"] else None,
+    }
+
+
+async def _run(row: sqlite3.Row) -> None:
+    job_id = row["id"]
+    inputs = await asyncio.to_thread(_load_inputs, job_id)
+    job = Job(job_id, row["kind"], json.loads(row["params"]), inputs)
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise RuntimeError(f"No handler registered for job kind '{job.kind}'.")
+        result = await handler(job)
+    except Exception as exc:
+        # HTTPException carries status_code/detail; anything else is a 500
+        status = getattr(exc, "status_code", 500)
+        detail = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+        await asyncio.to_thread(_fail, job_id, status, str(detail))
+    else:
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        await asyncio.to_thread(_finish, job_id, payload)
+    # CancelledError (shutdown) is not caught: the row stays "running" and is
+    # re-queued by the next start() — its checkpoints make the rerun cheap.
+
+
+async def _expire_if_due() -> None:
+    """Retention sweep, at most every JOB_EXPIRE_EVERY_S across all workers."""
+    global _next_expiry
+    now = time.monotonic()
+    if now < _next_expiry:
+        return
+    _next_expiry = now + _EXPIRE_EVERY_S  # claimed before the await: one sweeper
+    try:
+        await asyncio.to_thread(_expire)
+    except sqlite3.Error:
+        pass  # e.g. locked past the timeout — the next sweep catches up
+
+
+async def _worker() -> None:
+    while True:
+        await _expire_if_due()
+        _wakeup.clear()
+        row = await asyncio.to_thread(_claim_next)
+        if row is None:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=_POLL_S)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await _run(row)
+
+
+async def start(workers: int = _WORKERS) -> None:
+    """Initialize the database and start worker tasks (app lifespan)."""
+    global _wakeup, _next_expiry
+    await asyncio.to_thread(_init_db)
+    _next_expiry = time.monotonic() + _EXPIRE_EVERY_S  # _init_db just swept
+    _wakeup = asyncio.Event()
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(workers))
+
+
+async def stop() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
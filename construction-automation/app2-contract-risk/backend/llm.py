@@ -0,0 +1,357 @@
+"""
+llm.py — Shared Claude call path for the parallel scorers: hedged requests
+and a circuit breaker.
+
+Problem:
+  risk_scorer.score_clauses() and nachtrag_scorer.analyze_nachtrag() fan out
+  15–40 messages.create() calls through asyncio.gather(). The response waits
+  for the slowest one — and haiku's p99 is several times its p50 (queueing
+  on the API side, not output length). One straggler sets the latency of
+  the whole upload.
+
+Hedging:
+  Each call kind ("clause", "position") keeps a ring buffer of its last
+  _WINDOW successful latencies. A call that has not returned after the
+  kind's p90 gets a duplicate request; whichever finishes first wins.
+  Below _MIN_SAMPLES observations there is no p90 yet and nothing is hedged.
+
+Budget:
+  Hedges may not exceed LLM_HEDGE_BUDGET × primary calls (default 5 %,
+  plus one so the first straggler can be hedged). By construction ~10 % of
+  calls pass p90, so the budget — not the delay — is the binding limit
+  under load; cost is bounded at +5 % calls either way.
+
+The loser is not cancelled. Anthropic keeps generating (and billing) a
+non-streaming request after the client disconnects, so cancelling saves
+nothing — and letting it finish records its latency. Dropping the slow
+half of every hedged pair would bias the ring buffer towards fast calls
+and pull p90 down until every call is hedged.
+
+Stats (GET /health → "llm", and as gauges on /metrics): calls, hedges,
+hedge wins, latency saved by winning hedges (loser latency − winner
+latency, known once the loser finishes), current p90 per kind. Per-call
+latency, tokens and retries go to metrics.py.
+
+Every Claude call of the analysis pipelines goes through create() — also
+the one-off calls of Mode B (position extraction fallback, Begründung
+summary, MKA review) under their own kinds, so they get the timeout, the
+breaker and the metrics too.
+
+Circuit breaker:
+  Without it, an API outage holds every upload for retries × SDK timeout
+  and then fails the whole request. Each call is capped at LLM_TIMEOUT_S;
+  timeouts, connection errors, 5xx/overloaded and rate limits that survive
+  the retries count as failures. LLM_BREAKER_FAILURES consecutive failures
+  open the breaker: create() raises Unavailable at once and the scorers
+  fall back to their rule-based score (marked degraded). After
+  LLM_BREAKER_COOLDOWN_S the breaker is half-open — the next call is let
+  through as a probe and concurrent calls wait for its outcome; a
+  successful probe closes it, a failed one reopens it for another cooldown;
+  a cancelled probe (job shutdown, client gone) hands the probe on.
+  Opening the breaker also releases calls still in flight, so under a
+  hanging API an upload waits about one timeout; once open, calls fail in
+  milliseconds.
+  Client errors (400, 401, …) are bugs, not outages — they propagate
+  unchanged and do not count.
+
+Config:
+  LLM_HEDGE              "1" (default) / "0" — switch hedging off entirely
+  LLM_HEDGE_BUDGET       max extra calls as a fraction of calls (default 0.05)
+  LLM_HEDGE_MIN_S        never hedge earlier than this (default 1.0 s)
+  LLM_TIMEOUT_S          per call, hedge included (default 15 s)
+  LLM_BREAKER_FAILURES   consecutive failures that open it (default 3)
+  LLM_BREAKER_COOLDOWN_S open → half-open after (default 30 s)
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+
+import metrics
+
+_HEDGE_ENABLED = os.getenv("LLM_HEDGE", "1") == "1"
+_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+_HEDGE_MIN_S = float(os.getenv("LLM_HEDGE_MIN_S", "1.0"))
+_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "15"))
+_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+
+_WINDOW = 200
+_MIN_SAMPLES = 20
+_RETRIES = 3
+
+_latencies: dict[str, deque] = {}
+_stats = {"calls": 0, "hedges": 0, "hedge_wins": 0, "saved_ms": 0.0,
+          "failures": 0, "rejected": 0, "trips": 0}
+_stragglers: set[asyncio.Task] = set()
+
+
+class Unavailable(Exception):
+    """The API is down, overloaded or timing out — or the breaker is open."""
+
+
+# ── Circuit breaker ───────────────────────────────────────────────────────────
+
+_breaker = {"state": "closed", "failures": 0, "opened_at": 0.0, "probing": False}
+
+
+def available() -> bool:
+    """False while the breaker is open (callers may skip work that needs the API)."""
+    return _breaker["state"] != "open" or (
+        time.monotonic() - _breaker["opened_at"] >= _BREAKER_COOLDOWN_S
+    )
+
+
+_probe_done: asyncio.Event | None = None
+_tripped = asyncio.Event()  # set while open — releases calls still in flight
+
+
+async def _admit() -> bool:
+    """
+    Whether a call may go out. Half-open: the first caller becomes the
+    probe; concurrent callers wait for its outcome (≤ one timeout) rather
+    than failing fast, so the upload that finds the API back up is fully
+    scored instead of mostly degraded.
+    """
+    global _probe_done
+    while True:
+        if _breaker["state"] == "closed":
+            return True
+        if _breaker["state"] == "open":
+            if time.monotonic() - _breaker["opened_at"] < _BREAKER_COOLDOWN_S:
+                return False
+            _breaker["state"] = "half_open"
+            _tripped.clear()
+        if not _breaker["probing"]:
+            _breaker["probing"] = True
+            _probe_done = asyncio.Event()
+            return True
+        try:
+            await asyncio.wait_for(_probe_done.wait(), _TIMEOUT_S)
+        except asyncio.TimeoutError:
+            return False
+
+
+def _end_probe() -> None:
+    if _breaker["probing"]:
+        _breaker["probing"] = False
+        _probe_done.set()
+
+
+def _on_success() -> None:
+    _breaker.update(state="closed", failures=0)
+    _tripped.clear()
+    _end_probe()
+
+
+def _on_failure() -> None:
+    _stats["failures"] += 1
+    _breaker["failures"] += 1
+    if _breaker["state"] == "half_open" or _breaker["failures"] >= _BREAKER_FAILURES:
+        if _breaker["state"] != "open":
+            _stats["trips"] += 1
+        _breaker.update(state="open", opened_at=time.monotonic())
+        _tripped.set()
+    _end_probe()
+
+
+def _is_outage(exc: Exception) -> bool:
+    import anthropic  # loaded by the client that raised exc — a dict lookup
+    if isinstance(exc, (asyncio.TimeoutError, anthropic.APIConnectionError)):
+        return True
+    return isinstance(exc, anthropic.APIStatusError) and exc.status_code >= 500
+
+
+# ── Latency window ────────────────────────────────────────────────────────────
+
+def _record(kind: str, seconds: float) -> None:
+    _latencies.setdefault(kind, deque(maxlen=_WINDOW)).append(seconds)
+
+
+def _p90(kind: str) -> float | None:
+    window = _latencies.get(kind)
+    if not window or len(window) < _MIN_SAMPLES:
+        return None
+    ordered = sorted(window)
+    return ordered[int(0.9 * (len(ordered) - 1))]
+
+
+def _hedge_delay(kind: str) -> float | None:
+    if not _HEDGE_ENABLED:
+        return None
+    p90 = _p90(kind)
+    return None if p90 is None else max(p90, _HEDGE_MIN_S)
+
+
+def _budget_left() -> bool:
+    return _stats["hedges"] < _HEDGE_BUDGET * _stats["calls"] + 1
+
+
+# ── Calls ─────────────────────────────────────────────────────────────────────
+
+async def _timed(client, kind: str, params: dict):
+    """messages.create() that records its latency and token usage on success."""
+    start = time.monotonic()
+    response = await client.messages.create(**params)
+    elapsed = time.monotonic() - start
+    _record(kind, elapsed)
+    metrics.observe("g2t_llm_call_seconds", elapsed, kind=kind)
+    metrics.add_stage("claude_call", elapsed)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        metrics.add_tokens(kind, usage.input_tokens, usage.output_tokens)
+    return response
+
+
+def _detach(task: asyncio.Task, on_done=None) -> None:
+    """Let a losing request finish in the background (see module docstring)."""
+    def done(t: asyncio.Task) -> None:
+        _stragglers.discard(t)
+        if not t.cancelled() and t.exception() is None and on_done:
+            on_done()
+    _stragglers.add(task)
+    task.add_done_callback(done)
+
+
+async def _hedged(client, kind: str, params: dict):
+    primary = asyncio.ensure_future(_timed(client, kind, params))
+    hedge = None
+    delay = _hedge_delay(kind)
+    try:
+        if delay is not None:
+            await asyncio.wait({primary}, timeout=delay)
+        if primary.done() or delay is None or not _budget_left():
+            return await primary
+
+        _stats["hedges"] += 1
+        hedge = asyncio.ensure_future(_timed(client, kind, params))
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((t for t in done if t.exception() is None), None)
+            if winner is not None:
+                break
+        else:
+            return primary.result()  # both failed — surface the primary's error
+
+        won_at = time.monotonic()
+
+        def saved() -> None:
+            _stats["saved_ms"] += 1000 * (time.monotonic() - won_at)
+
+        if winner is hedge:
+            _stats["hedge_wins"] += 1
+        for loser in pending:
+            _detach(loser, saved if winner is hedge else None)
+        return winner.result()
+    except asyncio.CancelledError:
+        for task in (primary, hedge):
+            if task is not None:
+                task.cancel()
+        raise
+
+
+async def _bounded(call):
+    """
+    Await call for at most _TIMEOUT_S — or until the breaker trips, so calls
+    already in flight when the API goes down don't each wait out a timeout.
+    """
+    task = asyncio.ensure_future(asyncio.wait_for(call, _TIMEOUT_S))
+    tripped = asyncio.ensure_future(_tripped.wait())
+    try:
+        await asyncio.wait({task, tripped}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        tripped.cancel()
+        released = not task.done()
+        if released:
+            task.cancel()
+    if released:
+        _stats["rejected"] += 1
+        raise Unavailable("circuit breaker opened")
+    return task.result()
+
+
+async def create(client, params: dict, kind: str):
+    """
+    messages.create(**params) behind the circuit breaker, with hedging and
+    rate-limit retries (3 attempts, 2 s / 3 s backoff — the scorers'
+    previous behaviour).
+
+    kind  latency class for the p90 window, e.g. "clause" or "position"
+
+    Raises Unavailable on timeout / outage / open breaker; other API
+    errors propagate as before.
+    """
+    import anthropic  # lazy (cold start) — already loaded by the caller's client
+    _stats["calls"] += 1
+    for attempt in range(_RETRIES):
+        if not await _admit():
+            _stats["rejected"] += 1
+            metrics.inc("g2t_llm_calls_total", kind=kind, outcome="rejected")
+            raise Unavailable("circuit breaker open")
+        # Half-open admits only the probe
+        probe = _breaker["state"] == "half_open"
+        try:
+            response = await _bounded(_hedged(client, kind, params))
+        except asyncio.CancelledError:
+            if probe:
+                _end_probe()  # the next caller probes instead of all waiting forever
+            raise
+        except anthropic.RateLimitError as exc:
+            if attempt == _RETRIES - 1:
+                _on_failure()
+                metrics.inc("g2t_llm_calls_total", kind=kind, outcome="failed")
+                raise Unavailable("rate limited") from exc
+            _end_probe()  # a 429 is not an outage; the retry probes again
+            metrics.inc("g2t_llm_retries_total", kind=kind)
+            with metrics.stage("retry_backoff"):
+                await asyncio.sleep(2 ** attempt + 1)
+            continue
+        except Unavailable:
+            metrics.inc("g2t_llm_calls_total", kind=kind, outcome="rejected")
+            raise
+        except Exception as exc:
+            metrics.inc("g2t_llm_calls_total", kind=kind, outcome="failed")
+            if not _is_outage(exc):
+                _end_probe()
+                raise
+            _on_failure()
+            raise Unavailable(type(exc).__name__) from exc
+        _on_success()
+        metrics.inc("g2t_llm_calls_total", kind=kind, outcome="ok")
+        return response
+
+
+def _gauges() -> list[tuple[str, str, dict, float]]:
+    s = stats()
+    return [
+        ("g2t_llm_breaker_open", "1 while the circuit breaker is open.", {}, int(s["breaker"] == "open")),
+        ("g2t_llm_breaker_trips", "Circuit breaker trips since start.", {}, s["trips"]),
+        ("g2t_llm_hedges", "Hedged duplicate requests since start.", {}, s["hedges"]),
+        ("g2t_llm_hedge_wins", "Hedges that returned first.", {}, s["hedge_wins"]),
+        ("g2t_llm_hedge_saved_seconds", "Latency saved by winning hedges.", {}, s["saved_ms"] / 1000),
+    ] + [
+        ("g2t_llm_p90_seconds", "Current p90 latency per call kind.", {"kind": k}, ms / 1000)
+        for k, ms in s["p90_ms"].items()
+    ]
+
+
+metrics.register_gauges(_gauges)
+
+
+def stats() -> dict:
+    calls = _stats["calls"]
+    return {
+        "breaker": "half_open" if _breaker["state"] == "open" and available() else _breaker["state"],
+        "failures": _stats["failures"],
+        "rejected": _stats["rejected"],
+        "trips": _stats["trips"],
+        "hedging": _HEDGE_ENABLED,
+        "calls": calls,
+        "hedges": _stats["hedges"],
+        "hedge_rate": round(_stats["hedges"] / calls, 4) if calls else 0.0,
+        "hedge_wins": _stats["hedge_wins"],
+        "saved_ms": round(_stats["saved_ms"]),
+        "p90_ms": {k: round(1000 * p) for k in _latencies if (p := _p90(k)) is not None},
+    }
@@ -2,10 +2,17 @@
 main.py — Ground2Tech Contract Risk API
 
 Mode A: POST /analyze-contract   — pre-signing VOB/B risk analysis
+        POST /analyze-portfolio  — ZIP of many contracts, deduplicated scoring
 Mode B: POST /analyze-nachtrag   — Nachtrag review + Stellungnahme
-        POST /export-report      — Mode A → DOCX
-        POST /export-stellungnahme — Mode B → DOCX
+Jobs:   GET  /jobs/{job_id}      — status/progress of an as_job=true analysis
+        GET  /jobs/{job_id}/result
+Detail: GET  /session/{session_id}/clause/{number}   — one clause, full text
+        GET  /session/{session_id}/position/{index}  — one Nachtrag position
+Export: GET  /export-report/{session_id}        — Mode A → DOCX
+        GET  /export-stellungnahme/{session_id} — Mode B → DOCX
+        POST /export-report, /export-stellungnahme — same, from a posted result
         GET  /health
+        GET  /metrics            — Prometheus text format (metrics.py)
 
 Security:
   - CORS: restricted to ALLOWED_ORIGINS env var (localhost:5173 dev, risk.ground2tech.com prod)
@@ -13,15 +20,61 @@ Security:
   - File type validation: extension check on all uploads
   - In-memory cache: keyed by MD5 hash of file bytes (avoids re-analyzing same doc)
     Not a security concern because cache is process-local and non-persistent.
-
-Rate limiting: V1 uses none (single-user assumption). Add slowapi in V2 before
-public launch — 20 req/min per IP is appropriate for an LLM-backed endpoint.
+    Results and Q&A sessions are held as compressed JSON blobs, decoded on
+    access (result_store.py).
+    Second level: content fingerprints (fingerprint.py) map re-saved /
+    re-signed copies with identical text or clause set onto the same result.
+  - Single-flight: concurrent identical requests share one running analysis
+    (singleflight.py) — keyed by the same content hashes as the caches.
+  - Q&A answers: TTL/LRU-bounded cache per session and question
+    (answer_cache.py); suggested Path C questions are prewarmed.
+  - Clause index warm-up: standard clauses from warmup_corpus/ are scored
+    in the background at startup (warmup.py, CLAUSE_WARMUP), so the first
+    uploads after a deploy hit warm clause-index entries.
+  - DOCX exports: rendered in a worker thread, once per session, export
+    type and exporter.TEMPLATE_VERSION (TTL/LRU-bounded) — repeated
+    downloads are served from memory.
+  - Static frontend: served precompressed (br/gzip) with immutable caching
+    of hashed assets and ETag revalidation of index.html (static_files.py).
+  - API outage: llm.py's circuit breaker fails fast and clauses/positions
+    get rule-based scores marked degraded — never cached past the outage.
+  - Background jobs (as_job=true) persist uploads in a local SQLite file
+    (job_queue.py) only until the job finishes; results are kept for
+    JOB_RETENTION_H hours, swept every JOB_EXPIRE_EVERY_S seconds.
+
+Payload size: analysis responses accept ?compact=true (drop per-clause /
+per-position free text, fetched lazily from /session/…) and ?fields=a,b
+(keep only these keys per clause / position). Responses above
+GZIP_MIN_BYTES are gzip-compressed — clause JSON shrinks about tenfold.
+Only JSON and text are: DOCX exports are ZIP containers already.
+
+Rate limiting: slowapi caps requests per IP; admission.py additionally
+charges each analysis's estimated Claude tokens to a per-client token bucket
+(429 + Retry-After when exhausted), since request counts say nothing about
+a 5- vs a 300-page upload.
+
+Cold start: the Anthropic SDK (~1.5 s), PyMuPDF and python-docx/lxml are
+imported on first use, not at startup, so the port opens and /health
+answers about two seconds sooner after a deploy or restart. With
+STARTUP_PRELOAD=1 (default) a worker thread imports them right after
+startup, so the first upload rarely waits either. Import profile and
+time-to-first-/health: benchmarks/startup.py.
+
+Scanned PDFs: pages without a text layer are OCR'd in a process pool
+(ocr.py — Tesseract via PyMuPDF, page cache by image hash) before clause /
+position extraction. Without Tesseract language data on the server,
+scanned contracts still get the 422. A 100-page scan takes minutes, so
+send it with as_job=true and follow the "ocr" stage in GET /jobs/{id}.
 """
 
 import os
+import asyncio
 import hashlib
-import io
+import importlib
+import time
 from contextlib import asynccontextmanager
+
+_IMPORT_STARTED = time.perf_counter()  # /health → startup.ready_s
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -31,16 +84,35 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
-from parser import extract_text, is_scanned_pdf, extract_nachtrag_data
+from parser import extract_text, extract_pages, is_scanned_pdf, extract_nachtrag_data
 from clause_patterns import extract_clauses
 from gaeb_parser import is_gaeb_file, parse_gaeb_file
-from risk_scorer import score_clauses, aggregate_risk_summary
+from risk_scorer import score_clauses, aggregate_risk_summary, planned_requests
 from nachtrag_scorer import analyze_nachtrag
-from exporter import export_risk_report_docx, export_stellungnahme_docx
-from contract_qa import answer_question
-from nachtrag_qa import answer_nachtrag_question
+from contract_qa import answer_question, build_clause_index
+from nachtrag_qa import (
+    answer_nachtrag_question, build_session_context, context_from_dict, context_to_dict, prewarm_suggested,
+)
+import answer_cache
+from singleflight import coalesce, coalesce_admitted, inflight_count
+import job_queue
+import llm
+import admission
+import cassette
+import clause_index
+import metrics
+import ocr
+import warmup
+from fingerprint import text_fingerprint, clause_set_fingerprint
+from contract_diff import plan_revision, build_delta
+from portfolio import read_zip, analyze_portfolio, shutdown_pool
+from result_store import CompressedStore
+from ttl_cache import TTLCache
 
 # ── Config ────────────────────────────────────────────────────────────────────
 
@@ -50,13 +122,61 @@ _ALLOWED_ORIGINS = os.getenv(
 ).split(",")
 
 _MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_MB", "20")) * 1024 * 1024
+_MAX_PORTFOLIO_ZIP_BYTES = int(os.getenv("PORTFOLIO_MAX_ZIP_MB", "200")) * 1024 * 1024
+
+# Answer the suggested Path C questions in the background after session init
+_QA_PREWARM = os.getenv("QA_PREWARM_SUGGESTED", "1") == "1"
+
+# Response compression — small bodies are not worth the CPU; level 6 gets
+# nearly all of level 9's ratio on JSON at a fraction of the time
+_GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+_GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+_GZIP_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# Imported in a worker thread after startup instead of by the first request
+# that needs them (cold start, see module docstring)
+_STARTUP_PRELOAD = os.getenv("STARTUP_PRELOAD", "1") == "1"
+_PRELOAD_MODULES = ("anthropic", "fitz", "exporter")
+
+# Per-item fields dropped by ?compact=true: long free text that list views
+# don't show. Clients fetch it per item from /session/{id}/clause|position.
+_BULKY_FIELDS = {
+    "clauses": ("text",),
+    "positions": ("lv_description", "vob_reasoning", "reason", "negotiation_position"),
+}
 
 # ── In-memory cache ───────────────────────────────────────────────────────────
 # Keyed by MD5(file_bytes). Survives within one Render dyno lifetime.
 # Cleared on restart. Acceptable for V1 — no user accounts yet.
-_cache: dict[str, dict] = {}
-# Clause-only cache for Q&A — keyed by same MD5 as _cache
-_clause_cache: dict[str, list] = {}
+# Compressed per entry, decoded on access (result_store.py) — Q&A and
+# version diffs read the clauses from here too.
+_cache = CompressedStore()
+# BM25 index over _cache[key]["clauses"] (contract_qa.py) — built with the
+# analysis, rebuilt on the next question once evicted
+_qa_index_cache = TTLCache(
+    maxsize=int(os.getenv("QA_INDEX_CACHE_MAX", "64")),
+    ttl=float(os.getenv("QA_INDEX_CACHE_TTL_S", str(6 * 3600))),
+)
+# Content fingerprint → MD5 key of the upload that produced the result.
+# "text:<sha>" for normalized full text, "clauses:<sha>" for the clause set.
+_fingerprint_index: dict[str, str] = {}
+# Mode B results by combined input hash — the session_id for DOCX export.
+# (Path C Q&A sessions are separate: _nachtrag_session_cache.)
+_nachtrag_cache = CompressedStore()
+# Path C Q&A contexts (page chunks + BM25 index) by session_id
+_nachtrag_session_cache = CompressedStore(to_json=context_to_dict, from_json=context_from_dict)
+_STORES = {"contract": _cache, "nachtrag": _nachtrag_cache, "nachtrag_session": _nachtrag_session_cache}
+# Rendered DOCX: (session_id, "report" | "stellungnahme", TEMPLATE_VERSION)
+# → (stored blob of the result, bytes). The blob is compared by identity
+# on lookup (CompressedStore.blob), so a session whose result was replaced
+# (degraded → rescored) is rendered again.
+_docx_cache = TTLCache(
+    maxsize=int(os.getenv("DOCX_CACHE_MAX", "200")),
+    ttl=float(os.getenv("DOCX_CACHE_TTL_S", str(6 * 3600))),
+)
+# Hits per cache level — bytes (MD5), text, clauses — plus full misses
+# (metrics.py counter g2t_cache_hits_total{layer})
+_CACHE_LAYERS = ("bytes", "text", "clauses", "miss")
 
 # ── Rate limiter ──────────────────────────────────────────────────────────────
 limiter = Limiter(key_func=get_remote_address, default_limits=[])
@@ -66,40 +186,220 @@ def _md5(data: bytes) -> str:
     return hashlib.md5(data).hexdigest()
 
 
+def _combined_md5(*parts: bytes | str | None) -> str:
+    """
+    Hash several inputs into one key. Each part is length-prefixed so
+    ("ab", "c") and ("a", "bc") produce different keys; None marks an
+    absent optional upload.
+    """
+    h = hashlib.md5()
+    for part in parts:
+        if part is None:
+            h.update(b"-")
+            continue
+        data = part.encode() if isinstance(part, str) else part
+        h.update(f"{len(data)}:".encode())
+        h.update(data)
+    return h.hexdigest()
+
+
+# ── Cold start ────────────────────────────────────────────────────────────────
+
+_startup: dict = {"preload": "pending" if _STARTUP_PRELOAD else "off", "preload_s": {}}
+
+
+def _preload() -> None:
+    """Import the lazily loaded heavy modules — runs in a worker thread."""
+    for name in _PRELOAD_MODULES:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        _startup["preload_s"][name] = round(time.perf_counter() - start, 3)
+    if _static_files is not None:
+        start = time.perf_counter()
+        _static_files.precompress()  # gzip/brotli of the frontend bundle
+        _startup["preload_s"]["static"] = round(time.perf_counter() - start, 3)
+
+
+async def _after_startup() -> None:
+    if _STARTUP_PRELOAD:
+        _startup["preload"] = "running"
+        try:
+            await asyncio.to_thread(_preload)
+        except Exception as exc:  # a missing library fails the first request that needs it, as before
+            _startup.update(preload="failed", error=f"{type(exc).__name__}: {exc}")
+        else:
+            _startup["preload"] = "done"
+    # Tesseract data lookup — imports fitz and may shell out to `whereis`;
+    # in a worker thread even without the preload
+    try:
+        await asyncio.to_thread(ocr.available)
+    except Exception:
+        pass  # no PyMuPDF — the first PDF upload reports it
+    # Standard clauses into the clause index (warmup.py) — after the preload,
+    # so the first scorer call does not import the SDK on the event loop
+    if warmup.enabled():
+        await warmup.run()
+
+
+def _exporter():
+    """exporter.py — python-docx + lxml, imported on the first export."""
+    import exporter
+    return exporter
+
+
 # ── App ───────────────────────────────────────────────────────────────────────
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers resume jobs interrupted by the last shutdown (job_queue.py)
+    await job_queue.start()
+    _startup["ready_s"] = round(time.perf_counter() - _IMPORT_STARTED, 3)
+    _spawn(_after_startup())
+    yield
+    await job_queue.stop()
+    shutdown_pool()
+    ocr.shutdown_pool()
+
+
 app = FastAPI(
     title="Ground2Tech Contract Risk API",
     version="1.0.0",
     docs_url="/docs",
     redoc_url=None,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_ALLOWED_ORIGINS,
     allow_methods=["GET", "POST"],
-    allow_headers=["Content-Type"],
+    allow_headers=["Content-Type", "X-API-Key"],
+    expose_headers=["Retry-After"],
     allow_credentials=False,
 )
 
+class _TextGZipResponder(GZipResponder):
+    """Passes every other content type through untouched, like a pre-encoded body."""
+
+    async def send_with_gzip(self, message) -> None:
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if not content_type.startswith(_GZIP_TYPES):
+                self.initial_message = message
+                self.content_encoding_set = True
+                return
+        await super().send_with_gzip(message)
+
+
+class _TextGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware for JSON and text only. DOCX exports are ZIP containers:
+    gzip-6 gains nothing on them and costs event-loop time per download.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _TextGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(_TextGZipMiddleware, minimum_size=_GZIP_MIN_BYTES, compresslevel=_GZIP_LEVEL)
+
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Request duration per route template + per-request stage timings (metrics.py)."""
+    metrics.begin_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.observe(
+        "g2t_http_request_seconds", time.perf_counter() - start,
+        path=getattr(route, "path", "unmatched"), status=str(response.status_code),
+    )
+    return response
+
+
 # ── Helpers
 
-async def _read_upload(file: UploadFile, label: str = "file") -> bytes:
+async def _read_upload(file: UploadFile, label: str = "file", max_bytes: int = _MAX_UPLOAD_BYTES) -> bytes:
     """Read upload and enforce size limit."""
     content = await file.read()
-    if len(content) > _MAX_UPLOAD_BYTES:
+    if len(content) > max_bytes:
         raise HTTPException(
             status_code=413,
-            detail=f"{label} exceeds {_MAX_UPLOAD_BYTES // (1024*1024)} MB limit."
+            detail=f"{label} exceeds {max_bytes // (1024*1024)} MB limit."
         )
     return content
 
 
+# Strong refs to fire-and-forget tasks — the loop only keeps weak ones
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _job_accepted(job_id: str) -> JSONResponse:
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result",
+    })
+
+
+def _with_timings(response: dict, enabled: bool) -> dict:
+    """Attach this request's metrics.py timings when the client asked for them."""
+    if not enabled:
+        return response
+    return {**response, "timings": metrics.request_timings()}
+
+
+def _shaped(response: dict, compact: bool, fields: str | None) -> dict:
+    """
+    Apply ?compact / ?fields to the clause or position list of a response.
+    fields is an exact whitelist of per-item keys and wins over compact.
+    Builds new dicts — the response shares its items with the caches.
+    """
+    if not compact and not fields:
+        return response
+    keep = {f.strip() for f in fields.split(",") if f.strip()} if fields else None
+    shaped = dict(response)
+    for list_key, bulky in _BULKY_FIELDS.items():
+        items = response.get(list_key)
+        if not isinstance(items, list):
+            continue
+        if keep is not None:
+            shaped[list_key] = [{k: v for k, v in item.items() if k in keep} for item in items]
+        else:
+            shaped[list_key] = [{k: v for k, v in item.items() if k not in bulky} for item in items]
+    return shaped
+
+
+async def _document_pages(content: bytes, checkpoint=None) -> list[str]:
+    """
+    Text per page. A scanned PDF's textless pages are OCR'd (ocr.py) when
+    the server has Tesseract language data; otherwise they stay empty.
+    checkpoint: job_queue.Checkpoint for the "ocr" stage of a background job.
+    """
+    pages = extract_pages(content)
+    if is_scanned_pdf("\n".join(pages), len(pages)) and await asyncio.to_thread(ocr.available):
+        try:
+            pages = await ocr.recognize(content, pages, checkpoint=checkpoint)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=f"OCR of the scanned PDF failed — {exc}")
+    return pages
+
+
 def _require_ext(filename: str, allowed: tuple[str, ...], label: str):
     ext = os.path.splitext(filename.lower())[1]
     if ext not in allowed:
@@ -112,20 +412,103 @@ def _require_ext(filename: str, allowed: tuple[str, ...], label: str):
 
 # ── Health ────────────────────────────────────────────────────────────────────
 
+# Both routes are async: the stats below read dicts the event loop mutates,
+# which is only safe on the loop itself. Only the SQLite job counts are
+# read in a worker thread.
+
 @app.get("/health")
-def health():
-    return {"status": "ok", "version": "1.0.0", "mode_a": True, "mode_b": True}
+async def health():
+    jobs = await asyncio.to_thread(job_queue.counts)
+    return {
+        "status": "ok",
+        "version": "1.0.0",
+        "mode_a": True,
+        "mode_b": True,
+        "inflight_analyses": inflight_count(),
+        "cache_hits": {
+            layer: int(metrics.value("g2t_cache_hits_total", layer=layer)) for layer in _CACHE_LAYERS
+        },
+        "qa_answer_cache": answer_cache.stats(),
+        "jobs": jobs,
+        "llm": llm.stats(),
+        "admission": admission.stats(),
+        "cassette": cassette.stats() if cassette.enabled() else None,
+        "warmup": warmup.status(),
+        "clause_index": clause_index.stats(),
+        "startup": _startup,
+        "result_store": {name: store.stats() for name, store in _STORES.items()},
+        "ocr": ocr.stats(),
+    }
+
+
+_job_counts: dict[str, int] = {}  # refreshed per scrape, read by _gauges()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus text format: stage timings, Claude calls/tokens, caches, jobs."""
+    counts = await asyncio.to_thread(job_queue.counts)
+    _job_counts.clear()
+    _job_counts.update(counts)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def _gauges() -> list[tuple[str, str, dict, float]]:
+    jobs = dict(_job_counts)
+    qa = answer_cache.stats()
+    return [
+        ("g2t_inflight_analyses", "Analyses currently running (singleflight).", {}, inflight_count()),
+        ("g2t_result_cache_entries", "Cached contract results.", {}, len(_cache)),
+        ("g2t_qa_answer_cache_entries", "Cached Q&A answers.", {}, qa.get("size", 0)),
+        ("g2t_docx_cache_entries", "Rendered DOCX exports in memory.", {}, len(_docx_cache)),
+        ("g2t_admission_clients", "Clients with a token bucket.", {}, admission.stats()["clients"]),
+        ("g2t_ocr_documents_running", "Scanned PDFs being OCR'd.", {}, ocr.stats()["running"]["documents"]),
+    ] + [
+        ("g2t_jobs", "Background jobs by status.", {"status": status}, n)
+        for status, n in jobs.items()
+    ] + [
+        ("g2t_result_store_bytes", "Compressed size of cached results and sessions.", {"store": name},
+         store.stats()["stored_bytes"])
+        for name, store in _STORES.items()
+    ]
+
+
+metrics.register_gauges(_gauges)
 
 
 # ── Mode A: Pre-signing VOB/B risk ────────────────────────────────────────────
 
 @app.post("/analyze-contract")
 @limiter.limit("20/minute")
-async def analyze_contract(request: Request, file: UploadFile = File(...)):
+async def analyze_contract(
+    request: Request,
+    file: UploadFile = File(...),
+    previous_session_id: str = Form(None),
+    as_job: bool = Form(False),
+    timings: bool = Form(False),
+    compact: bool = False,
+    fields: str = None,
+):
     """
     Accept a VOB/B contract PDF.
     Returns structured clause list with risk assessment.
 
+    compact / fields (optional, query): compact=true omits each clause's
+    "text" — fetch it from /session/{session_id}/clause/{number}.
+    fields=number,title,risk_level keeps only these keys per clause.
+
+    previous_session_id (optional): session_id of an earlier revision of the
+    same contract. Only added or modified clauses are re-scored; the
+    response gains a "delta" block (see contract_diff.py).
+
+    as_job (optional): run as a background job instead — returns 202 with
+    {"job_id", "status_url", "result_url"}; the result has the schema below.
+    Recommended for scanned PDFs: OCR progress is the "ocr" stage of the job.
+
+    timings (optional): add a "timings" block — seconds per stage
+    (pdf_extract, clause_parse, queue_wait, claude_call, …), Claude calls
+    and tokens for this request (metrics.py). Parallel stages are summed.
+
     Response schema:
       {
         "clauses": [
@@ -147,31 +530,139 @@ async def analyze_contract(request: Request, file: UploadFile = File(...)):
           "medium_risk_count": 3,
           "top_3_risky_clauses": [...],
           "summary_text": "..."
+        },
+        "delta": {                       — only with previous_session_id
+          "counts": {"added": 1, "modified": 2, "moved": 0, "removed": 0, "unchanged": 17},
+          "rescored": 3,
+          "previous_summary": {...},
+          "changes": [
+            {"number": "§ 16", "title": "...", "change": "modified",
+             "old_risk_level": "medium", "new_risk_level": "high",
+             "redline": "... [-30-] {+60+} Tage ..."}
+          ]
         }
       }
     """
     _require_ext(file.filename, (".pdf",), "Contract file")
     content = await _read_upload(file, "Contract PDF")
 
+    previous = previous_summary = None
+    if previous_session_id:
+        previous_result = _cache.get(previous_session_id)
+        if previous_result is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Previous session not found. Analyze the earlier revision first."
+            )
+        previous, previous_summary = previous_result["clauses"], previous_result["summary"]
+
+    if as_job:
+        job_id = await job_queue.enqueue(
+            "contract",
+            params={
+                "previous_session_id": previous_session_id,
+                "previous_clauses": previous,
+                "previous_summary": previous_summary,
+                "client": admission.client_key(request),
+            },
+            inputs={"contract": content},
+        )
+        return _job_accepted(job_id)
+
+    response = await _contract_response(
+        content, previous, previous_session_id, previous_summary,
+        admit=admission.admitter(admission.client_key(request)),
+    )
+    return _with_timings(_shaped(response, compact, fields), timings)
+
+
+async def _contract_response(
+    content: bytes,
+    previous: list[dict] | None,
+    previous_session_id: str | None,
+    previous_summary: dict | None,
+    checkpoint=None,
+    admit=None,
+    ocr_checkpoint=None,
+) -> dict:
+    """Cache lookup or analysis, plus the session_id / delta envelope."""
     # Cache hit
     key = _md5(content)
-    if key in _cache:
-        return {**_cache[key], "session_id": key}
+    result = _cache.get(key)
+    if result is not None and _usable(result):
+        metrics.inc("g2t_cache_hits_total", layer="bytes")
+    else:
+        # Identical uploads already being analyzed share that analysis —
+        # each caller is still charged through its own admit hook
+        result = await coalesce_admitted(
+            f"contract:{key}",
+            lambda flight_admit: _analyze_contract_bytes(
+                key, content, previous, checkpoint, flight_admit, ocr_checkpoint,
+            ),
+            admit,
+        )
+
+    response = {**result, "session_id": key}
+    if previous is not None:
+        response["delta"] = {
+            **build_delta(previous, result["clauses"]),
+            "previous_session_id": previous_session_id,
+            "previous_summary": previous_summary,
+        }
+    return response
+
+
+async def _contract_job(job: job_queue.Job) -> dict:
+    # Previous revision travels in the job params, not the in-memory cache,
+    # so a job resumed after a restart can still build its delta
+    return await _contract_response(
+        job.inputs["contract"],
+        job.params["previous_clauses"],
+        job.params["previous_session_id"],
+        job.params["previous_summary"],
+        checkpoint=job.checkpoint("score_clauses"),
+        admit=admission.charger(job.params.get("client")),
+        ocr_checkpoint=job.checkpoint("ocr"),
+    )
 
-    # Parse
-    text, page_count = extract_text(content)
+
+async def _analyze_contract_bytes(
+    key: str,
+    content: bytes,
+    previous: list[dict] | None = None,
+    checkpoint=None,
+    admit=None,
+    ocr_checkpoint=None,
+) -> dict:
+    """
+    Parse → score → cache. Runs once per content hash (see coalesce).
+
+    previous: scored clauses of an earlier revision — unchanged clauses
+    carry their score over, only added/modified ones are scored.
+    checkpoint: job_queue.Checkpoint when running as a background job.
+    admit: admission.py hook — charged with the planned Claude requests
+    after every cache level missed, before scoring (may raise 429).
+    ocr_checkpoint: job_queue.Checkpoint for the OCR pages of a scan.
+    """
+    pages = await _document_pages(content, ocr_checkpoint)
+    text, page_count = "\n".join(pages), len(pages)
 
     if is_scanned_pdf(text, page_count):
         raise HTTPException(
             status_code=422,
             detail=(
-                "Scanned PDF detected — no usable text layer found. "
-                "Please upload a searchable (digital/text-layer) PDF. "
-                "OCR support is planned for V2."
+                "Scanned PDF detected — OCR recognized too little text. "
+                "Please upload a searchable (digital/text-layer) PDF or a cleaner scan."
+                if ocr.available() else
+                "Scanned PDF detected — no usable text layer found, and OCR is not "
+                "available on this server. Please upload a searchable (digital/text-layer) PDF."
             )
         )
 
-    clauses = extract_clauses(text)
+    # Parsed before the fingerprint levels too: a reused result gets this
+    # upload's page_start (see _reuse_fingerprint)
+    with metrics.stage("clause_parse"):
+        clauses = extract_clauses(text)
     if not clauses:
         raise HTTPException(
             status_code=422,
@@ -181,14 +672,155 @@ async def analyze_contract(request: Request, file: UploadFile = File(...)):
             )
         )
 
-    # Score (parallel Claude calls)
-    scored = await score_clauses(clauses)
+    # Level 2a: same normalized text as an earlier upload
+    text_fp = f"text:{text_fingerprint(text)}"
+    hit = _reuse_fingerprint(key, text_fp, "text", clauses)
+    if hit is not None:
+        return hit
+
+    # Level 2b: same ordered clause set — consulted before any scoring
+    clause_fp = f"clauses:{clause_set_fingerprint(clauses)}"
+    hit = _reuse_fingerprint(key, clause_fp, "clauses", clauses)
+    if hit is not None:
+        _fingerprint_index[text_fp] = _fingerprint_index[clause_fp]
+        return hit
+
+    # Score (parallel Claude calls) — in version-diff mode only what changed
+    carried = None
+    to_score = clauses
+    if previous is not None:
+        carried, _ = plan_revision(previous, clauses)
+        to_score = [c for c, done in zip(clauses, carried) if done is None]
+
+    if admit is not None:
+        await admit(planned_requests(to_score))
+    metrics.inc("g2t_cache_hits_total", layer="miss")
+
+    if carried is not None:
+        fresh = iter(await score_clauses(to_score, checkpoint=checkpoint))
+        scored = [done if done is not None else next(fresh) for done in carried]
+    else:
+        scored = await score_clauses(clauses, checkpoint=checkpoint)
     summary = aggregate_risk_summary(scored)
 
     result = {"clauses": scored, "summary": summary}
     _cache[key] = result
-    _clause_cache[key] = scored  # for Q&A endpoint
-    return {**result, "session_id": key}
+    _qa_index_cache.set(key, build_clause_index(scored))
+    _fingerprint_index[text_fp] = key
+    _fingerprint_index[clause_fp] = key
+    return result
+
+
+def _usable(result: dict) -> bool:
+    """
+    Degraded results (rule-based scores during an API outage, llm.py) are
+    served from cache only while the API is still unavailable; afterwards
+    the next upload re-analyzes. Clauses Claude did score come straight
+    from the clause index, so only the degraded ones cost a call.
+    """
+    return not result["summary"].get("degraded_count") or not llm.available()
+
+
+def _reuse_fingerprint(key: str, fingerprint: str, level: str, clauses: list[dict]) -> dict | None:
+    """
+    If fingerprint maps to a cached result, return its scores for this
+    upload's clauses and store them under this upload's MD5 key (so the
+    next byte-identical upload is a level-1 hit).
+
+    Scores come from the cached result; number, title, text and page_start
+    from this upload's clauses (as in portfolio.py) — a re-print with a new
+    cover page has the same clauses on later pages. Only when that changes
+    nothing is the key an alias of the source's blob.
+    """
+    source_key = _fingerprint_index.get(fingerprint)
+    result = _cache.get(source_key) if source_key is not None else None
+    if result is None or not _usable(result):
+        return None
+    if [c["number"] for c in clauses] != [c["number"] for c in result["clauses"]]:
+        return None  # same normalized text, split differently — score normally
+    metrics.inc("g2t_cache_hits_total", layer=level)
+    reused = [{**scored, **clause} for scored, clause in zip(result["clauses"], clauses)]
+    if reused == result["clauses"]:
+        _cache.alias(key, source_key)
+    else:
+        result = {**result, "clauses": reused}
+        _cache[key] = result
+    index = _qa_index_cache.get(source_key)  # built from number/title/text — still valid
+    if index is not None:
+        _qa_index_cache.set(key, index)
+    return result
+
+# ── Mode A: Portfolio (ZIP of contracts) ──────────────────────────────────────
+
+@app.post("/analyze-portfolio")
+@limiter.limit("5/minute")
+async def analyze_portfolio_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    as_job: bool = Form(False),
+    timings: bool = Form(False),
+):
+    """
+    Accept a ZIP of contract PDFs. Identical clauses across all contracts
+    are scored once (portfolio.py).
+
+    Response schema:
+      {
+        "contracts": [
+          {"name": "NU_Erdbau.pdf", "session_id": "...", "status": "ok",
+           "page_count": 14, "clause_count": 22, "summary": {...}},
+          {"name": "Scan.pdf", "session_id": "...", "status": "scanned", "detail": "..."}
+        ],
+        "risk_matrix": {
+          "categories": ["payment", "liability", ...],
+          "rows": [{"name": "...", "session_id": "...",
+                    "cells": {"payment": "high", "liability": "medium", "scope": null, ...}}],
+          "high_by_category": {"payment": 7, ...}
+        },
+        "stats": {"files": 40, "analyzed": 38, "failed": 2,
+                  "total_clauses": 910, "unique_clauses": 212}
+      }
+    Each session_id works with /ask-contract and as previous_session_id.
+
+    as_job (optional): run as a background job (202 + job_id) — recommended
+    for more than a handful of contracts.
+    timings (optional): add per-stage timings (see /analyze-contract).
+    """
+    _require_ext(file.filename, (".zip",), "Portfolio file")
+    data = await _read_upload(file, "Portfolio ZIP", max_bytes=_MAX_PORTFOLIO_ZIP_BYTES)
+    try:
+        # Inflating up to the archive limit takes seconds — off the event loop
+        files = await asyncio.to_thread(read_zip, data)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if as_job:
+        job_id = await job_queue.enqueue(
+            "portfolio", params={"client": admission.client_key(request)}, inputs={"zip": data},
+        )
+        return _job_accepted(job_id)
+    response = await _portfolio_response(files, admit=admission.admitter(admission.client_key(request)))
+    return _with_timings(response, timings)
+
+
+async def _portfolio_response(files: list[tuple[str, bytes]], checkpoint=None, admit=None) -> dict:
+    response, sessions = await analyze_portfolio(files, checkpoint=checkpoint, admit=admit)
+    # Register every contract as a regular Mode A session
+    for s in sessions:
+        key = s["session_id"]
+        _cache[key] = {"clauses": s["clauses"], "summary": s["summary"]}
+        _fingerprint_index.setdefault(f"text:{s['text_fp']}", key)
+        _fingerprint_index.setdefault(f"clauses:{s['clause_fp']}", key)
+    return response
+
+
+async def _portfolio_job(job: job_queue.Job) -> dict:
+    return await _portfolio_response(
+        await asyncio.to_thread(read_zip, job.inputs["zip"]),
+        checkpoint=job.checkpoint("score_clauses"),
+        admit=admission.charger(job.params.get("client")),
+    )
+
 
 # ── Mode A: Q&A over analyzed contract ───────────────────────────────────────
 
@@ -206,7 +838,8 @@ async def ask_contract(req: QARequest):
     if not req.session_id or not req.question.strip():
         raise HTTPException(status_code=400, detail="session_id and question are required.")
 
-    clauses = _clause_cache.get(req.session_id)
+    result = _cache.get(req.session_id)
+    clauses = result["clauses"] if result is not None else None
     if not clauses:
         raise HTTPException(
             status_code=404,
@@ -216,7 +849,11 @@ async def ask_contract(req: QARequest):
     if len(req.question) > 500:
         raise HTTPException(status_code=400, detail="Question too long. Max 500 characters.")
 
-    return await answer_question(clauses, req.question)
+    index = _qa_index_cache.get(req.session_id)
+    if index is None:
+        index = build_clause_index(clauses)
+        _qa_index_cache.set(req.session_id, index)
+    return await answer_question(clauses, req.question, index=index, session_id=req.session_id)
 
 # ── Mode B: Nachtrag review ───────────────────────────────────────────────────
 
@@ -230,35 +867,42 @@ async def analyze_nachtrag_endpoint(
     begründung: UploadFile = File(None),
     kalkulation: UploadFile = File(None),
     stage_override: str = None,
+    as_job: bool = Form(False),
+    timings: bool = Form(False),
+    compact: bool = False,
+    fields: str = None,
 ):
     """
     Accept:
-      nachtrag         required  — contractor's Nachtrag PDF (any path)
+      nachtrag         required  — contractor's Nachtrag PDF (any path);
+                                   scans are OCR'd — send them with as_job
       original_lv      optional  — original LV (PDF or GAEB). Without it,
                                    review is limited to VOB/B principles only.
       baubeschreibung  optional  — Baubeschreibung PDF
       begründung       optional  — Nachtragsangebot / Begründung PDF
       kalkulation      optional  — Kalkulation PDF
       stage_override   optional  — "stage1" | "stage2" (overrides auto-detect)
+      as_job           optional  — run as a background job (202 + job_id)
+      timings          optional  — add per-stage timings (see /analyze-contract)
+      compact, fields  optional  — query; compact=true omits lv_description,
+                                   vob_reasoning, reason and negotiation_position
+                                   per position (/session/{id}/position/{index});
+                                   fields=… keeps only the listed keys
     """
     _require_ext(nachtrag.filename, (".pdf",), "Nachtrag")
     nachtrag_bytes = await _read_upload(nachtrag, "Nachtrag PDF")
-    nachtrag_data = extract_nachtrag_data(nachtrag_bytes)
 
-    # Build extra context from optional supporting PDFs
-    extra_texts = []
+    # Read optional supporting PDFs (validated here, extracted inside the flight)
+    extra_pdfs: list[bytes | None] = []
     for optional_file in [baubeschreibung, begründung, kalkulation]:
         if optional_file and optional_file.filename:
             _require_ext(optional_file.filename, (".pdf",), optional_file.filename)
-            b = await _read_upload(optional_file, optional_file.filename)
-            t, _ = extract_text(b)
-            extra_texts.append(t[:30000])
-    extra_context_text = "\n\n".join(extra_texts)
-
-    # Parse LV
-    lv_positions: list[dict] = []
-    lv_pdf_bytes = None
+            extra_pdfs.append(await _read_upload(optional_file, optional_file.filename))
+        else:
+            extra_pdfs.append(None)
 
+    lv_bytes = None
+    lv_ext = None
     if original_lv and original_lv.filename:
         lv_ext = _require_ext(
             original_lv.filename,
@@ -266,6 +910,95 @@ async def analyze_nachtrag_endpoint(
             "Original LV"
         )
         lv_bytes = await _read_upload(original_lv, "Original LV")
+
+    if as_job:
+        inputs = {"nachtrag": nachtrag_bytes}
+        if lv_bytes is not None:
+            inputs["original_lv"] = lv_bytes
+        for i, b in enumerate(extra_pdfs):
+            if b is not None:
+                inputs[f"extra_{i}"] = b
+        job_id = await job_queue.enqueue(
+            "nachtrag",
+            params={"lv_ext": lv_ext, "stage_override": stage_override,
+                    "extra_count": len(extra_pdfs), "client": admission.client_key(request)},
+            inputs=inputs,
+        )
+        return _job_accepted(job_id)
+
+    response = await _nachtrag_response(
+        nachtrag_bytes, lv_bytes, lv_ext, extra_pdfs, stage_override,
+        admit=admission.admitter(admission.client_key(request)),
+    )
+    return _with_timings(_shaped(response, compact, fields), timings)
+
+
+async def _nachtrag_response(
+    nachtrag_bytes: bytes,
+    lv_bytes: bytes | None,
+    lv_ext: str | None,
+    extra_pdfs: list[bytes | None],
+    stage_override: str | None,
+    checkpoint=None,
+    admit=None,
+    ocr_checkpoint=None,
+) -> dict:
+    # Identical input sets already being analyzed share that analysis —
+    # each caller is still charged through its own admit hook
+    key = _combined_md5(nachtrag_bytes, lv_bytes, lv_ext, *extra_pdfs, stage_override)
+    result = await coalesce_admitted(
+        f"nachtrag:{key}",
+        lambda flight_admit: _analyze_nachtrag_inputs(
+            nachtrag_bytes, lv_bytes, lv_ext, extra_pdfs, stage_override, checkpoint, flight_admit,
+            ocr_checkpoint,
+        ),
+        admit,
+    )
+    _nachtrag_cache[key] = result
+    return {**result, "session_id": key}
+
+
+async def _nachtrag_job(job: job_queue.Job) -> dict:
+    return await _nachtrag_response(
+        job.inputs["nachtrag"],
+        job.inputs.get("original_lv"),
+        job.params["lv_ext"],
+        [job.inputs.get(f"extra_{i}") for i in range(job.params["extra_count"])],
+        job.params["stage_override"],
+        checkpoint=job.checkpoint("score_positions"),
+        admit=admission.charger(job.params.get("client")),
+        ocr_checkpoint=job.checkpoint("ocr"),
+    )
+
+
+async def _analyze_nachtrag_inputs(
+    nachtrag_bytes: bytes,
+    lv_bytes: bytes | None,
+    lv_ext: str | None,
+    extra_pdfs: list[bytes | None],
+    stage_override: str | None,
+    checkpoint=None,
+    admit=None,
+    ocr_checkpoint=None,
+) -> dict:
+    """Extract → match → score. Runs once per combined input hash."""
+    # A scanned Nachtrag goes through OCR; the rest of the path is unchanged
+    pages = await _document_pages(nachtrag_bytes, ocr_checkpoint)
+    nachtrag_data = extract_nachtrag_data(nachtrag_bytes, text="\n".join(pages))
+
+    # Build extra context from optional supporting PDFs
+    extra_texts = []
+    for b in extra_pdfs:
+        if b is not None:
+            t, _ = extract_text(b)
+            extra_texts.append(t[:30000])
+    extra_context_text = "\n\n".join(extra_texts)
+
+    # Parse LV
+    lv_positions: list[dict] = []
+    lv_pdf_bytes = None
+
+    if lv_bytes is not None:
         if lv_ext in (".x83", ".x84", ".gaeb"):
             try:
                 lv_positions = parse_gaeb_file(lv_bytes)
@@ -280,49 +1013,154 @@ async def analyze_nachtrag_endpoint(
         lv_pdf_bytes,
         extra_context_text=extra_context_text,
         stage_override=stage_override,
+        checkpoint=checkpoint,
+        admit=admit,
     )
     return result
 
 
+job_queue.register("contract", _contract_job)
+job_queue.register("nachtrag", _nachtrag_job)
+job_queue.register("portfolio", _portfolio_job)
+
+
+# ── Background jobs ───────────────────────────────────────────────────────────
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status + progress: {"status": "queued|running|done|failed", "progress": {...}}."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    job.pop("result")
+    return job
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str, compact: bool = False, fields: str = None):
+    """Result of a finished job — same schema (and compact / fields) as the synchronous endpoint."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["error_status"] or 500, detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is {job['status']} — poll /jobs/{job_id} until status is done.",
+        )
+    return _shaped(job["result"], compact, fields)
+
+
+# ── Session detail (lazy fetch for compact responses) ─────────────────────────
+
+def _session_result(store: CompressedStore, session_id: str) -> dict:
+    result = store.get(session_id)
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Session not found. Analyze the document again (sessions are cleared on restart).",
+        )
+    return result
+
+
+@app.get("/session/{session_id}/clause/{number:path}")
+async def session_clause(session_id: str, number: str):
+    """One clause of a Mode A session, text included. "§4" matches "§ 4"."""
+    wanted = "".join(number.split())
+    for clause in _session_result(_cache, session_id)["clauses"]:
+        if "".join(clause["number"].split()) == wanted:
+            return clause
+    raise HTTPException(status_code=404, detail=f"Clause {number} not found in this session.")
+
+
+@app.get("/session/{session_id}/position/{index}")
+async def session_position(session_id: str, index: int):
+    """One position of a Mode B session by its index in "positions"."""
+    positions = _session_result(_nachtrag_cache, session_id).get("positions", [])
+    if not 0 <= index < len(positions):
+        raise HTTPException(status_code=404, detail=f"Position {index} not found in this session.")
+    return positions[index]
+
+
 # ── Export endpoints ──────────────────────────────────────────────────────────
 
-@app.post("/export-report")
-async def export_report(data: dict):
-    """Export Mode A result as DOCX risk report."""
+_DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+_EXPORTS = {
+    "report": ("export_risk_report_docx", "risk_report.docx"),
+    "stellungnahme": ("export_stellungnahme_docx", "stellungnahme.docx"),
+}
+
+
+async def _render_docx(kind: str, data: dict) -> bytes:
+    """python-docx in a worker thread — a 200-clause report would stall the event loop."""
+    render = getattr(_exporter(), _EXPORTS[kind][0])
     try:
-        buf = export_risk_report_docx(data)
+        with metrics.stage("export_docx"):
+            return await asyncio.to_thread(render, data)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"DOCX generation failed: {exc}")
 
-    return StreamingResponse(
-        io.BytesIO(buf),
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers={"Content-Disposition": 'attachment; filename="risk_report.docx"'},
+
+def _docx_response(kind: str, buf: bytes) -> Response:
+    return Response(
+        content=buf,
+        media_type=_DOCX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{_EXPORTS[kind][1]}"'},
     )
 
 
+async def _session_docx(kind: str, session_id: str, store: CompressedStore) -> Response:
+    result = _session_result(store, session_id)
+    blob = store.blob(session_id)
+    key = (session_id, kind, _exporter().TEMPLATE_VERSION)
+    cached = _docx_cache.get(key)
+    if cached is not None and cached[0] is blob:
+        metrics.inc("g2t_docx_exports_total", kind=kind, outcome="hit")
+        return _docx_response(kind, cached[1])
+
+    # Concurrent downloads of the same session share one render
+    buf = await coalesce(f"docx:{kind}:{session_id}", lambda: _render_docx(kind, result))
+    _docx_cache.set(key, (blob, buf))
+    metrics.inc("g2t_docx_exports_total", kind=kind, outcome="render")
+    return _docx_response(kind, buf)
+
+
+@app.get("/export-report/{session_id}")
+async def export_report_session(session_id: str):
+    """Mode A result as DOCX risk report — session_id from /analyze-contract."""
+    return await _session_docx("report", session_id, _cache)
+
+
+@app.get("/export-stellungnahme/{session_id}")
+async def export_stellungnahme_session(session_id: str):
+    """Mode B result as DOCX Stellungnahme — session_id from /analyze-nachtrag."""
+    return await _session_docx("stellungnahme", session_id, _nachtrag_cache)
+
+
+@app.post("/export-report")
+async def export_report(data: dict):
+    """
+    Export a posted Mode A result as DOCX risk report. Not cached — prefer
+    GET /export-report/{session_id}, which needs no upload of the result.
+    """
+    return _docx_response("report", await _render_docx("report", data))
+
+
 @app.post("/export-stellungnahme")
 async def export_stellungnahme(data: dict):
-    """Export Mode B result as DOCX Stellungnahme."""
-    try:
-        buf = export_stellungnahme_docx(data)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"DOCX generation failed: {exc}")
-
-    return StreamingResponse(
-        io.BytesIO(buf),
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers={"Content-Disposition": 'attachment; filename="stellungnahme.docx"'},
-    )
+    """Export a posted Mode B result as DOCX Stellungnahme (see GET variant)."""
+    return _docx_response("stellungnahme", await _render_docx("stellungnahme", data))
 
 class NachtragQARequest(BaseModel):
     session_id: str
     question: str
 
-_nachtrag_session_cache: dict[str, dict] = {}
 
 @app.post("/init-nachtrag-session")
 async def init_nachtrag_session(
+    request: Request,
     nachtrag_doc: UploadFile = File(None),
     original_lv: UploadFile = File(None),
     baubeschreibung: UploadFile = File(None),
@@ -332,26 +1170,55 @@ async def init_nachtrag_session(
     Path C: initialize a Q&A session from informal documents.
     Returns session_id for subsequent /ask-nachtrag calls.
     """
-    context_parts = []
-    if pasted_text:
-        context_parts.append(("nachtrag_text", pasted_text[:6000]))
-
+    uploads: list[tuple[str, bytes]] = []
     for label, upload in [("nachtrag_text", nachtrag_doc),
                            ("lv_text", original_lv),
                            ("baubeschreibung_text", baubeschreibung)]:
         if upload and upload.filename:
             _require_ext(upload.filename, (".pdf",), upload.filename)
-            b = await _read_upload(upload, upload.filename)
-            t, _ = extract_text(b)
-            context_parts.append((label, t[:6000]))
+            uploads.append((label, await _read_upload(upload, upload.filename)))
 
-    if not context_parts:
+    if not pasted_text and not uploads:
         raise HTTPException(status_code=400, detail="At least one document or pasted text is required.")
 
-    context = {k: v for k, v in context_parts}
-    session_id = _md5((pasted_text + "".join(v for _, v in context_parts)).encode())
-    _nachtrag_session_cache[session_id] = context
-    return {"session_id": session_id, "sources": list(context.keys())}
+    # Identical input sets already being extracted share that extraction
+    key = _combined_md5(pasted_text, *(part for label, b in uploads for part in (label, b)))
+    return await coalesce(
+        f"nachtrag-session:{key}",
+        lambda: _build_nachtrag_session(pasted_text, uploads, admission.client_key(request)),
+    )
+
+
+_PASTED_TEXT_MAX_CHARS = 200_000
+
+
+async def _build_nachtrag_session(pasted_text: str, uploads: list[tuple[str, bytes]],
+                                  client: str) -> dict:
+    """
+    Extract full documents, chunk + index them, register the session.
+    Runs once per combined input hash. The prewarm calls are charged to
+    `client`, the caller whose upload built the session.
+    """
+    sources: dict[str, list[str]] = {}
+    if pasted_text:
+        sources["nachtrag_text"] = [pasted_text[:_PASTED_TEXT_MAX_CHARS]]
+
+    for label, b in uploads:
+        # An uploaded Nachtrag doc extends pasted text under the same label
+        sources.setdefault(label, []).extend(await _document_pages(b))
+
+    # Chunking + BM25 build is CPU-bound (100-page LV ≈ 0.5 s) — off the loop
+    context = await asyncio.to_thread(build_session_context, sources)
+    all_text = "".join(p for pages in sources.values() for p in pages)
+    session_id = _md5((pasted_text + all_text).encode())
+    await _nachtrag_session_cache.aset(session_id, context)  # index JSON: tens of ms
+    if _QA_PREWARM:
+        _spawn(prewarm_suggested(context, session_id, admit=admission.spare(client)))
+    return {
+        "session_id": session_id,
+        "sources": context["sources"],
+        "chunk_count": len(context["chunks"]),
+    }
 
 
 @app.post("/ask-nachtrag")
@@ -364,10 +1231,12 @@ async def ask_nachtrag(req: NachtragQARequest):
         raise HTTPException(status_code=404, detail="Session not found. Upload documents first.")
     if len(req.question) > 500:
         raise HTTPException(status_code=400, detail="Question too long. Max 500 characters.")
-    return await answer_nachtrag_question(context, req.question)
+    return await answer_nachtrag_question(context, req.question, session_id=req.session_id)
 
 # ── Static frontend (production) ──────────────────────────────────────────────
-from fastapi.staticfiles import StaticFiles
+# Precompressed br/gzip variants, immutable hashed assets (static_files.py)
+from static_files import PrecompressedStaticFiles
 _static_dir = os.path.join(os.path.dirname(__file__), "static")
-if os.path.exists(_static_dir):
-    app.mount("/", StaticFiles(directory=_static_dir, html=True), name="static")
\ No newline at end of file
+_static_files = PrecompressedStaticFiles(directory=_static_dir, html=True) if os.path.exists(_static_dir) else None
+if _static_files is not None:
+    app.mount("/", _static_files, name="static")
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+metrics.py — Stage timers, counters and the Prometheus /metrics endpoint.
+
+Problem:
+  /analyze-contract and /analyze-nachtrag were a black box: a slow upload
+  could be PDF extraction, clause parsing, waiting on the scoring
+  semaphore, Claude latency, rate-limit retries or DOCX export — nothing
+  said which.
+
+Recording:
+  with metrics.stage("pdf_extract"): ...   histogram g2t_stage_seconds{stage}
+  metrics.inc("g2t_cache_hits_total", layer="text")
+  metrics.observe("g2t_llm_call_seconds", dt, kind="clause")
+  All process-local; a handful of dict updates per call, no dependency.
+  prometheus_client is not in requirements.txt — render() writes the text
+  exposition format (0.0.4) directly.
+
+Per-request timings:
+  begin_request() (HTTP middleware in main.py) puts a fresh dict into a
+  contextvar. stage() and add_tokens() also accumulate into it, so an
+  endpoint can return it as the optional "timings" block. asyncio tasks
+  copy the context but share the dict, so work inside gather() and
+  singleflight tasks is attributed to the request that started it.
+  Stages that run in parallel (claude_call, queue_wait) are summed across
+  calls — they can exceed the wall-clock total.
+
+Live gauges from other modules (job counts, breaker state, caches) are
+added via register_gauges() and read at scrape time.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_help: dict[str, tuple[str, str]] = {}
+_counters: dict[str, dict[tuple, float]] = {}
+_histograms: dict[str, dict[tuple, list]] = {}
+_gauge_sources: list[Callable[[], list[tuple[str, str, dict, float]]]] = []
+
+
+def counter(name: str, help_text: str) -> None:
+    _help[name] = ("counter", help_text)
+    _counters.setdefault(name, {})
+
+
+def histogram(name: str, help_text: str) -> None:
+    _help[name] = ("histogram", help_text)
+    _histograms.setdefault(name, {})
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    series = _counters[name]
+    key = _labels(labels)
+    series[key] = series.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    series = _histograms[name]
+    key = _labels(labels)
+    h = series.get(key)
+    if h is None:
+        h = series[key] = [0] * len(_BUCKETS) + [0.0, 0]  # buckets…, sum, count
+    for i, bound in enumerate(_BUCKETS):
+        if value <= bound:
+            h[i] += 1
+    h[-2] += value
+    h[-1] += 1
+
+
+def value(name: str, **labels) -> float:
+    return _counters[name].get(_labels(labels), 0)
+
+
+def register_gauges(source: Callable[[], list[tuple[str, str, dict, float]]]) -> None:
+    """source() → [(name, help, labels, value)], called on every scrape."""
+    _gauge_sources.append(source)
+
+
+counter("g2t_cache_hits_total", "Contract analyses answered per cache layer (miss = full analysis).")
+counter("g2t_llm_tokens_total", "Claude tokens used by scoring calls, hedges included.")
+counter("g2t_llm_calls_total", "Claude scoring calls by outcome.")
+counter("g2t_llm_retries_total", "Rate-limit retries of Claude scoring calls.")
+counter("g2t_positions_capped_total", "Nachtrag positions dropped by the per-request position cap.")
+counter("g2t_docx_exports_total", "Session DOCX downloads (hit = served from the rendered-document cache).")
+counter("g2t_clause_index_save_errors_total", "Clause index writes that failed (analysis still returned).")
+counter("g2t_ocr_pages_total", "Scanned pages by text source (ocr, page cache, job checkpoint).")
+histogram("g2t_stage_seconds", "Time per pipeline stage.")
+histogram("g2t_llm_call_seconds", "Latency of successful Claude calls.")
+histogram("g2t_http_request_seconds", "HTTP request duration.")
+
+
+# ── Per-request timings ───────────────────────────────────────────────────────
+
+_request: contextvars.ContextVar[dict | None] = contextvars.ContextVar("g2t_request", default=None)
+
+
+def begin_request() -> dict:
+    timings = {"stages": {}, "tokens": {"input": 0, "output": 0}, "claude_calls": 0}
+    _request.set(timings)
+    return timings
+
+
+def request_timings() -> dict | None:
+    """This request's timings block, stage seconds rounded to ms."""
+    t = _request.get()
+    if t is None:
+        return None
+    return {**t, "stages": {k: round(v, 3) for k, v in t["stages"].items()}}
+
+
+def add_stage(name: str, seconds: float) -> None:
+    observe("g2t_stage_seconds", seconds, stage=name)
+    t = _request.get()
+    if t is not None:
+        t["stages"][name] = t["stages"].get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage(name, time.perf_counter() - start)
+
+
+def add_tokens(kind: str, input_tokens: int, output_tokens: int) -> None:
+    inc("g2t_llm_tokens_total", input_tokens, kind=kind, direction="input")
+    inc("g2t_llm_tokens_total", output_tokens, kind=kind, direction="output")
+    t = _request.get()
+    if t is not None:
+        t["tokens"]["input"] += input_tokens
+        t["tokens"]["output"] += output_tokens
+        t["claude_calls"] += 1
+
+
+# ── Exposition ────────────────────────────────────────────────────────────────
+
+def _fmt_labels(labels: tuple | dict, extra: tuple = ()) -> str:
+    items = list(labels.items() if isinstance(labels, dict) else labels) + list(extra)
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def render() -> str:
+    lines = []
+    for name, series in _counters.items():
+        lines += [f"# HELP {name} {_help[name][1]}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_fmt_labels(k)} {v}" for k, v in series.items()]
+    for name, series in _histograms.items():
+        lines += [f"# HELP {name} {_help[name][1]}", f"# TYPE {name} histogram"]
+        for k, h in series.items():
+            for bound, count in zip(_BUCKETS, h):
+                lines.append(f"{name}_bucket{_fmt_labels(k, (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_fmt_labels(k, (('le', '+Inf'),))} {h[-1]}")
+            lines.append(f"{name}_sum{_fmt_labels(k)} {h[-2]}")
+            lines.append(f"{name}_count{_fmt_labels(k)} {h[-1]}")
+    gauges: dict[str, tuple[str, list]] = {}
+    for source in _gauge_sources:
+        for name, help_text, labels, v in source():
+            gauges.setdefault(name, (help_text, []))[1].append((labels, v))
+    for name, (help_text, series) in gauges.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [f"{name}{_fmt_labels(labels)} {v}" for labels, v in series]
+    return "\n".join(lines) + "\n"
@@ -13,13 +13,34 @@ Context sources (all optional, keyed by label):
 
 Without lv_text or baubeschreibung_text, answers are VOB/B-principles only.
 This limitation is surfaced in the response confidence field.
+
+Retrieval (build_session_context → _build_context_block):
+  Full documents are chunked once at session init — on page boundaries, and
+  within a page on OZ lines ("01.02.0030.") so one LV position stays one
+  chunk. Oversized chunks are split on paragraphs, tiny ones merged.
+  All chunks across sources go into one BM25 index (lexical_index.py).
+  Each question sends only the top-k chunks (≤ 5 × 1200 chars) instead of a
+  fixed 3000-char prefix per source — cheaper per question, and page 80 of
+  an LV is as reachable as page 1.
+
+Answer cache: answers are cached per (session, question, retrieved context)
+in answer_cache.py. prewarm_suggested() fills it for _SUGGESTED_QUESTIONS in
+the background after /init-nachtrag-session.
 """
 
 import os
 import re
 import json
 import asyncio
-from anthropic import AsyncAnthropic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # the SDK itself is imported on first use
+    from anthropic import AsyncAnthropic
+
+import cassette
+from answer_cache import cached_answer
+from lexical_index import Bm25Index
+from parser import _NT_LV_OZ_RE  # OZ-on-own-line marker, shared with LV parsing
 
 _MODEL = "claude-haiku-4-5-20251001"
 
@@ -63,17 +84,134 @@ _SUGGESTED_QUESTIONS = [
 ]
 
 
-def _build_context_block(context: dict) -> str:
+_LABEL_MAP = {
+    "nachtrag_text": "NACHTRAG / ANZEIGE (vom AN eingereicht)",
+    "lv_text": "ORIGINAL-LEISTUNGSVERZEICHNIS",
+    "baubeschreibung_text": "BAUBESCHREIBUNG",
+}
+
+_CHUNK_MAX_CHARS = 1200
+_CHUNK_MIN_CHARS = 100
+_TOP_K_CHUNKS = 5
+
+
+# ── Session build: chunk + index ──────────────────────────────────────────────
+
+def _split_oversized(text: str) -> list[str]:
+    """Split text > _CHUNK_MAX_CHARS on paragraph, then line boundaries."""
+    if len(text) <= _CHUNK_MAX_CHARS:
+        return [text]
+    pieces, current = [], ""
+    for unit in re.split(r"(\n\s*\n|\n)", text):
+        if len(current) + len(unit) > _CHUNK_MAX_CHARS and current.strip():
+            pieces.append(current)
+            current = ""
+        current += unit
+        while len(current) > _CHUNK_MAX_CHARS:  # single overlong line
+            pieces.append(current[:_CHUNK_MAX_CHARS])
+            current = current[_CHUNK_MAX_CHARS:]
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def chunk_source(label: str, pages: list[str]) -> list[dict]:
+    """
+    Chunk one source document. Returns chunk dicts:
+        source  label (key of _LABEL_MAP)
+        page    1-based page number
+        oz      OZ of the LV position the chunk starts with, or None
+        text    chunk text
+    """
+    chunks: list[dict] = []
+    for page_no, page_text in enumerate(pages, 1):
+        # OZ lines start new segments; text before the first OZ is its own
+        starts = [0] + [m.start() for m in _NT_LV_OZ_RE.finditer(page_text) if m.start() > 0]
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else len(page_text)
+            segment = page_text[start:end].strip()
+            if not segment:
+                continue
+            oz_match = _NT_LV_OZ_RE.match(segment)
+            oz = oz_match.group(1) if oz_match else None
+            prev = chunks[-1] if chunks else None
+            # Merge fragments into the previous chunk on the same page
+            if (prev and prev["source"] == label and prev["page"] == page_no
+                    and (len(segment) < _CHUNK_MIN_CHARS or len(prev["text"]) < _CHUNK_MIN_CHARS)
+                    and len(prev["text"]) + len(segment) <= _CHUNK_MAX_CHARS):
+                prev["text"] += "\n" + segment
+                prev["oz"] = prev["oz"] or oz
+                continue
+            for piece in _split_oversized(segment):
+                chunks.append({"source": label, "page": page_no, "oz": oz, "text": piece.strip()})
+    return chunks
+
+
+def build_session_context(sources: dict[str, list[str]]) -> dict:
+    """
+    sources: label → list of page texts (pasted text = one page).
+    Returns the session context stored by main.py and passed back to
+    answer_nachtrag_question():
+        sources  list of labels present
+        chunks   list of chunk dicts (see chunk_source)
+        index    Bm25Index over chunk texts, doc_id = chunk position
+    """
+    chunks = [c for label, pages in sources.items() for c in chunk_source(label, pages)]
+    return {
+        "sources": list(sources.keys()),
+        "chunks": chunks,
+        "index": Bm25Index.build([c["text"] for c in chunks]),
+    }
+
+
+def context_to_dict(context: dict) -> dict:
+    """JSON-serializable form of a session context (main.py stores it compressed)."""
+    return {**context, "index": context["index"].to_dict()}
+
+
+def context_from_dict(data: dict) -> dict:
+    return {**data, "index": Bm25Index.from_dict(data["index"])}
+
+
+# ── Context block for one question ────────────────────────────────────────────
+
+def _retrieve_chunks(context: dict, question: str) -> list[dict]:
+    """Top-k chunks across all sources; first chunk per source if nothing matches."""
+    chunks = context["chunks"]
+    hits = [chunks[doc_id] for doc_id, _ in context["index"].search(question, _TOP_K_CHUNKS)]
+    if hits:
+        return hits
+    seen, fallback = set(), []
+    for c in chunks:
+        if c["source"] not in seen:
+            seen.add(c["source"])
+            fallback.append(c)
+    return fallback
+
+
+def _build_context_block(context: dict, question: str = "") -> str:
     """Build context string from available sources."""
     parts = []
-    label_map = {
-        "nachtrag_text": "NACHTRAG / ANZEIGE (vom AN eingereicht)",
-        "lv_text": "ORIGINAL-LEISTUNGSVERZEICHNIS",
-        "baubeschreibung_text": "BAUBESCHREIBUNG",
-    }
-    for key, label in label_map.items():
-        if key in context and context[key]:
-            parts.append(f"--- {label} ---\n{context[key][:3000]}")
+    if "chunks" in context:
+        present = [_LABEL_MAP.get(k, k) for k in context["sources"]]
+        if present:
+            parts.append(
+                "Vorhandene Unterlagen: " + ", ".join(present)
+                + " — nachfolgend die zur Frage relevantesten Auszüge."
+            )
+        selected = _retrieve_chunks(context, question)
+        for key, label in _LABEL_MAP.items():
+            excerpts = sorted(
+                (c for c in selected if c["source"] == key),
+                key=lambda c: (c["page"], c["oz"] or ""),
+            )
+            for c in excerpts:
+                where = f"S. {c['page']}" + (f", OZ {c['oz']}" if c["oz"] else "")
+                parts.append(f"--- {label} ({where}) ---\n{c['text']}")
+    else:
+        for key, label in _LABEL_MAP.items():
+            if key in context and context[key]:
+                parts.append(f"--- {label} ---\n{context[key][:3000]}")
 
     if not parts:
         parts.append("Keine Unterlagen hochgeladen. Antwort basiert ausschließlich auf VOB/B-Grundsätzen.")
@@ -81,28 +219,59 @@ def _build_context_block(context: dict) -> str:
     return "\n\n".join(parts)
 
 
-async def answer_nachtrag_question(context: dict, question: str) -> dict:
+async def answer_nachtrag_question(
+    context: dict,
+    question: str,
+    session_id: str | None = None,
+    admit=None,
+) -> dict:
     """
-    Main entry point. Takes session context dict and a free-text question.
-    Returns structured JSON answer.
+    Main entry point. Takes session context dict (build_session_context)
+    and a free-text question. Returns structured JSON answer.
+
+    session_id: enables the answer cache (answer_cache.py) for this session.
+    admit: admission.py hook, awaited with the request before Claude is
+    called — cached answers are free.
     """
     key = os.getenv("ANTHROPIC_API_KEY")
     if not key:
         raise RuntimeError("ANTHROPIC_API_KEY not set.")
 
-    client = AsyncAnthropic(api_key=key)
-    context_block = _build_context_block(context)
+    context_block = _build_context_block(context, question)
     prompt = _PROMPT.format(context_block=context_block, question=question)
 
-    response = await client.messages.create(
-        model=_MODEL,
-        max_tokens=1200,
-        system=_SYSTEM,
-        messages=[
+    async def ask() -> tuple[dict, bool]:
+        if admit is not None:
+            await admit([_request(prompt)])
+        return await _ask_claude(_client(key), prompt)
+
+    result = await cached_answer("nachtrag", session_id, question, context_block, ask)
+    result["question"] = question
+    result["suggested_questions"] = _SUGGESTED_QUESTIONS
+    return result
+
+
+def _client(key: str) -> "AsyncAnthropic":
+    from anthropic import AsyncAnthropic  # on first question, not at startup
+    return AsyncAnthropic(api_key=key, http_client=cassette.async_http_client())
+
+
+def _request(prompt: str) -> dict:
+    """messages.create() parameters for one question."""
+    return {
+        "model": _MODEL,
+        "max_tokens": 1200,
+        "system": _SYSTEM,
+        "messages": [
             {"role": "user", "content": prompt},
             {"role": "assistant", "content": "{"},
         ],
-    )
+    }
+
+
+async def _ask_claude(client: "AsyncAnthropic", prompt: str) -> tuple[dict, bool]:
+    """One Claude call → (answer dict, whether the JSON parsed)."""
+    response = await client.messages.create(**_request(prompt))
 
     raw = "{" + response.content[0].text.strip()
     clean = raw
@@ -118,8 +287,9 @@ async def answer_nachtrag_question(context: dict, question: str) -> dict:
         for k in ("answer", "legal_basis", "risk_flag", "action_required", "confidence"):
             if k not in result:
                 raise KeyError(k)
+        return result, True
     except (json.JSONDecodeError, KeyError):
-        result = {
+        return {
             "answer": raw[:400],
             "legal_basis": "Nicht ermittelbar",
             "risk_flag": "medium",
@@ -127,8 +297,19 @@ async def answer_nachtrag_question(context: dict, question: str) -> dict:
             "confidence": "low",
             "confidence_note": "Automatische Analyse fehlgeschlagen",
             "missing_context": None,
-        }
+        }, False
 
-    result["question"] = question
-    result["suggested_questions"] = _SUGGESTED_QUESTIONS
-    return result
\ No newline at end of file
+
+async def prewarm_suggested(context: dict, session_id: str, admit=None) -> None:
+    """
+    Answer _SUGGESTED_QUESTIONS into the answer cache right after session
+    init, so clicking one returns instantly. Sequential — five parallel
+    calls per new session would eat the rate-limit budget of real questions.
+    Best effort: stops at the first failure (no key, rate limit, outage,
+    admit() refusing — admission.spare() once the client's budget is spent).
+    """
+    for question in _SUGGESTED_QUESTIONS:
+        try:
+            await answer_nachtrag_question(context, question, session_id=session_id, admit=admit)
+        except Exception:
+            return
@@ -6,7 +6,7 @@ Pipeline:
   [Step 1] Extract structured positions from Nachtrag text (regex → Claude fallback)
   [Step 2] If LV is PDF (not GAEB), extract LV positions via Claude
   [Step 3] Match Nachtrag positions to LV positions (OZ exact → text similarity)
-  [Step 4] Score each matched position in parallel (Claude)
+  [Step 4] Score each matched position in parallel (Claude, hedged — llm.py)
   [Step 5] Aggregate: totals, recommendation
   [Step 6] Generate Stellungnahme (one Claude call)
   → NachtragResult dict
@@ -29,18 +29,24 @@ import json
 import asyncio
 import re
 from difflib import SequenceMatcher
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:  # the SDK itself is imported on first use
+    from anthropic import AsyncAnthropic
 
-from anthropic import AsyncAnthropic
 from parser import extract_text, extract_lv_positions_regex  # needed for PDF LV fallback
+import cassette
+import llm
+import metrics
 
-def _get_client() -> AsyncAnthropic:
+def _get_client() -> "AsyncAnthropic":
+    from anthropic import AsyncAnthropic  # ~1.5 s to import — on first use, not at startup
     key = os.getenv("ANTHROPIC_API_KEY")
     if not key:
         raise RuntimeError("ANTHROPIC_API_KEY not set.")
-    return AsyncAnthropic(api_key=key)
+    return AsyncAnthropic(api_key=key, http_client=cassette.async_http_client())
 
-_client: AsyncAnthropic | None = None
+_client: "AsyncAnthropic | None" = None
 _MODEL = "claude-haiku-4-5-20251001"
 
 # ── Language helpers ──────────────────────────────────────────────────────────
@@ -120,16 +126,19 @@ Hinweise:
 
 
 async def _extract_nachtrag_positions_via_claude(text: str) -> dict:
-    """Claude fallback: extract positions when regex yielded < 2 results."""
+    """
+    Claude fallback: extract positions when regex yielded < 2 results.
+    Raises llm.Unavailable — the caller keeps the regex positions.
+    """
     global _client
     if _client is None:
         _client = _get_client()
-    msg = await _client.messages.create(
-        model=_MODEL,
-        max_tokens=2000,
-        system=_EXTRACT_SYSTEM,
-        messages=[{"role": "user", "content": _EXTRACT_PROMPT.format(text=text[:15000])}],
-    )
+    msg = await llm.create(_client, {
+        "model": _MODEL,
+        "max_tokens": 2000,
+        "system": _EXTRACT_SYSTEM,
+        "messages": [{"role": "user", "content": _EXTRACT_PROMPT.format(text=text[:15000])}],
+    }, kind="extract")
     raw = msg.content[0].text.strip()
     try:
         return json.loads(raw)
@@ -165,12 +174,15 @@ async def _extract_lv_from_pdf_text(lv_text: str) -> list[dict]:
     global _client
     if _client is None:
         _client = _get_client()
-    msg = await _client.messages.create(
-        model=_MODEL,
-        max_tokens=3000,
-        system=_EXTRACT_SYSTEM,
-        messages=[{"role": "user", "content": _LV_EXTRACT_PROMPT.format(text=lv_text[:8000])}],
-    )
+    try:
+        msg = await llm.create(_client, {
+            "model": _MODEL,
+            "max_tokens": 3000,
+            "system": _EXTRACT_SYSTEM,
+            "messages": [{"role": "user", "content": _LV_EXTRACT_PROMPT.format(text=lv_text[:8000])}],
+        }, kind="extract")
+    except llm.Unavailable:
+        return []
     raw = msg.content[0].text.strip()
     try:
         data = json.loads(raw)
@@ -351,12 +363,12 @@ async def _extract_begründung_summary(text: str) -> str:
     text_for_summary = text[:15000]
 
     try:
-        msg = await _client.messages.create(
-            model=_MODEL,
-            max_tokens=600,
-            system=_BEGR_SUMMARY_SYSTEM,
-            messages=[{"role": "user", "content": _BEGR_SUMMARY_PROMPT.format(text=text_for_summary)}],
-        )
+        msg = await llm.create(_client, {
+            "model": _MODEL,
+            "max_tokens": 600,
+            "system": _BEGR_SUMMARY_SYSTEM,
+            "messages": [{"role": "user", "content": _BEGR_SUMMARY_PROMPT.format(text=text_for_summary)}],
+        }, kind="begruendung")
         raw = msg.content[0].text.strip()
         clean = raw
         if clean.startswith("```"):
@@ -379,7 +391,7 @@ async def _extract_begründung_summary(text: str) -> str:
             parts.append(data["summary_text"])
         return "\n".join(parts)
     except Exception:
-        # Fallback: return truncated raw text — same as current behavior
+        # Fallback (also llm.Unavailable): truncated raw text — same as current behavior
         return text[:2000]
 
 
@@ -455,8 +467,11 @@ def _qty_delta_pct(lp: dict, np_: dict) -> str:
     return f"{delta:+.1f}"
 
 
-async def _score_position(match: dict, begründung: str) -> dict:
-    """Score one matched position pair. Returns flat result dict."""
+def build_position_request(match: dict, begründung: str) -> dict:
+    """
+    messages.create() parameters for one matched position pair.
+    Shared by the interactive path and batch_runner.py.
+    """
     np_ = match["nachtrag"]
     lp  = match.get("lv")
 
@@ -488,24 +503,17 @@ async def _score_position(match: dict, begründung: str) -> dict:
             begruendung=begründung[:8000],
         )
 
-    global _client
-    if _client is None:
-        _client = _get_client()
-    import anthropic as _anthropic
-    for attempt in range(3):
-        try:
-            msg = await _client.messages.create(
-                model=_MODEL,
-                max_tokens=800,
-                system=_position_system(),
-                messages=[{"role": "user", "content": prompt}],
-            )
-            break
-        except _anthropic.RateLimitError:
-            if attempt == 2:
-                raise
-            await asyncio.sleep(2 ** attempt + 1)
-    raw = msg.content[0].text.strip()
+    return {
+        "model": _MODEL,
+        "max_tokens": 800,
+        "system": _position_system(),
+        "messages": [{"role": "user", "content": prompt}],
+    }
+
+
+def parse_position_response(raw: str) -> dict:
+    """Claude's raw text → scoring fields (manual-review fallback on bad JSON)."""
+    raw = raw.strip()
     clean = raw
     if clean.startswith("```"):
         clean = clean.split("```")[1]
@@ -519,7 +527,7 @@ async def _score_position(match: dict, begründung: str) -> dict:
             if k not in scoring:
                 raise KeyError(k)
     except (json.JSONDecodeError, KeyError):
-        reason_text = clean if 'clean' in dir() else raw
+        reason_text = clean
         if reason_text.startswith("```"):
             reason_text = reason_text.split("```")[1]
             if reason_text.startswith("json"):
@@ -535,7 +543,45 @@ async def _score_position(match: dict, begründung: str) -> dict:
             "reason": reason_text[:300],
             "negotiation_position": "Manuelle Überprüfung erforderlich.",
         }
+    return scoring
+
+
+def degraded_position_scoring(match: dict) -> dict:
+    """
+    Rule-based stand-in for parse_position_response() while the API is
+    unavailable (llm.Unavailable). Never "accept": without Claude nothing
+    counts towards accepted_total. Risk "high" for new positions (no LV
+    reference) and unit prices > 20 % above the LV, else "medium".
+    """
+    np_ = match["nachtrag"]
+    lp  = match.get("lv")
+    claimed = _safe_float(_normalize_field(np_.get("claimed_unit_price")))
+    lv_up = _safe_float(_normalize_field(lp.get("unit_price"))) if lp else 0.0
+    delta = round(100 * (claimed - lv_up) / lv_up, 1) if lv_up and claimed else None
+
+    if lp is None:
+        reason = "Neue Position ohne LV-Bezug — Anspruch dem Grunde nach ungeprüft."
+    elif delta is None:
+        reason = "Einheitspreise nicht vergleichbar — Höhe ungeprüft."
+    else:
+        reason = f"Einheitspreis {delta:+.1f} % gegenüber LV-Position {lp.get('oz', '')}."
+    return {
+        "assessment": "negotiate",
+        "vob_paragraph": "§2 Abs. 6 VOB/B (vorläufig)" if lp is None else "§2 VOB/B (vorläufig)",
+        "vob_reasoning": "Regelbasierte Vorprüfung — KI-Analyse derzeit nicht verfügbar.",
+        "price_assessment": "justified" if delta is not None and delta <= 5 else "overstated",
+        "price_delta_percent": delta,
+        "risk_level": "high" if lp is None or delta is None or delta > 20 else "medium",
+        "reason": reason,
+        "negotiation_position": "Manuelle Prüfung erforderlich; Analyse später erneut ausführen.",
+        "degraded": True,
+    }
+
 
+def position_result(match: dict, scoring: dict) -> dict:
+    """Flat result dict for one position: Nachtrag/LV fields + scoring."""
+    np_ = match["nachtrag"]
+    lp  = match.get("lv")
     return {
         "oz": np_.get("oz"),
         "nachtrag_description": np_.get("description"),
@@ -552,6 +598,20 @@ async def _score_position(match: dict, begründung: str) -> dict:
     }
 
 
+async def _score_position(match: dict, begründung: str) -> dict:
+    """Score one matched position pair. Returns flat result dict."""
+    params = build_position_request(match, begründung)
+
+    global _client
+    if _client is None:
+        _client = _get_client()
+    try:
+        msg = await llm.create(_client, params, kind="position")
+    except llm.Unavailable:
+        return position_result(match, degraded_position_scoring(match))
+    return position_result(match, parse_position_response(msg.content[0].text))
+
+
 # ── Step 5 + 6: Aggregate + Stellungnahme ────────────────────────────────────
 
 _RESPONSE_LABEL = {
@@ -618,14 +678,29 @@ async def _generate_stellungnahme(
     global _client
     if _client is None:
         _client = _get_client()
-    msg = await _client.messages.create(
-        model=_MODEL,
-        max_tokens=1200,
-        system=_stell_system(),
-        messages=[{"role": "user", "content": prompt}],
-    )
+    try:
+        msg = await llm.create(_client, {
+            "model": _MODEL,
+            "max_tokens": 1200,
+            "system": _stell_system(),
+            "messages": [{"role": "user", "content": prompt}],
+        }, kind="stellungnahme")
+    except llm.Unavailable:
+        return _DEGRADED_STELLUNGNAHME.format(
+            total_claimed=f"{total_claimed:,.2f}",
+            contested_total=f"{contested_total:,.2f}",
+        )
     return msg.content[0].text.strip()
 
+
+_DEGRADED_STELLUNGNAHME = (
+    "Der Nachtrag mit einer Gesamtforderung von {total_claimed} EUR wurde "
+    "vorläufig geprüft. Die automatische Bewertung war zum Zeitpunkt der "
+    "Prüfung nicht verfügbar; die Positionsbewertung beruht auf einer "
+    "regelbasierten Vorprüfung. Strittig sind vorläufig {contested_total} EUR. "
+    "Eine abschließende Stellungnahme folgt nach vollständiger Prüfung."
+)
+
 # ── Stage 1: MKA / Anzeige analysis (no positions) ───────────────────────────
 
 _MKA_SYSTEM = (
@@ -666,12 +741,15 @@ async def _analyze_mka(full_text: str, begründung: str) -> dict:
         _client = _get_client()
 
     text_for_analysis = begründung if len(begründung) > 200 else full_text
-    msg = await _client.messages.create(
-        model=_MODEL,
-        max_tokens=1500,
-        system=_MKA_SYSTEM,
-        messages=[{"role": "user", "content": _MKA_PROMPT.format(text=text_for_analysis[:5000])}],
-    )
+    try:
+        msg = await llm.create(_client, {
+            "model": _MODEL,
+            "max_tokens": 1500,
+            "system": _MKA_SYSTEM,
+            "messages": [{"role": "user", "content": _MKA_PROMPT.format(text=text_for_analysis[:5000])}],
+        }, kind="mka")
+    except llm.Unavailable:
+        return _mka_response(_DEGRADED_MKA, degraded=True)
     raw = msg.content[0].text.strip()
     clean = raw
     if clean.startswith("```"):
@@ -695,34 +773,61 @@ async def _analyze_mka(full_text: str, begründung: str) -> dict:
             "reason": raw[:300],
             "stellungnahme": "Die eingereichte Mehrkostenanzeige konnte nicht vollständig analysiert werden. Bitte vollständige Unterlagen nachreichen.",
         }
+    return _mka_response(result)
+
+
+def _mka_response(result: dict, degraded: bool = False) -> dict:
+    summary = {
+        "total_claimed": None,
+        "principal_assessment": result["principal_assessment"],
+        "preliminary_position": result["preliminary_position"],
+        "vob_paragraph": result["vob_paragraph_primary"],
+        "position_count": 0,
+    }
+    if degraded:
+        summary["degraded"] = True
     return {
         "stage": "mka",
-        "nachtrag_summary": {
-            "total_claimed": None,
-            "principal_assessment": result["principal_assessment"],
-            "preliminary_position": result["preliminary_position"],
-            "vob_paragraph": result["vob_paragraph_primary"],
-            "position_count": 0,
-        },
+        "nachtrag_summary": summary,
         "positions": [],
         "missing_documentation": result.get("missing_documentation", []),
         "reason": result.get("reason", ""),
         "stellungnahme": result["stellungnahme"],
     }
 
+
+# API unavailable (llm.Unavailable): no assessment dem Grunde nach
+_DEGRADED_MKA = {
+    "vob_paragraph_primary": "§2 VOB/B (nicht geprüft)",
+    "vob_paragraphs_secondary": [],
+    "principal_assessment": "insufficient_info",
+    "ag_order_documented": False,
+    "missing_documentation": [],
+    "preliminary_position": "request_more_info",
+    "reason": "Automatische Prüfung derzeit nicht verfügbar — Analyse später erneut ausführen.",
+    "stellungnahme": (
+        "Die eingereichte Mehrkostenanzeige wurde zur Prüfung entgegengenommen. "
+        "Die Prüfung dem Grunde nach steht noch aus; eine Stellungnahme folgt."
+    ),
+}
+
 # ── Public entry point ────────────────────────────────────────────────────────
 
-async def analyze_nachtrag(
+async def prepare_positions(
     nachtrag_data: dict,
     lv_positions: list[dict],
     lv_pdf_bytes: Optional[bytes] = None,
-    extra_context_text: str = "",   # text from Begründung/Kalkulation PDFs
-    stage_override: Optional[str] = None,  # "stage1" | "stage2" | None
+    extra_context_text: str = "",
+    stage_override: Optional[str] = None,
+    position_cap: Optional[int] = 20,
 ) -> dict:
     """
-    Full Mode B pipeline. Called by main.py /analyze-nachtrag endpoint.
+    Steps 1–3: positions, Stage 1 detection, Begründung context, LV matching.
 
-    nachtrag_data keys: full_text, begründung, positions, total_claimed
+    Returns {"is_stage1": True, "full_text", "begründung"} for Anzeigen, else
+    {"is_stage1": False, "matched", "begründung", "total_claimed", "full_text"}.
+    position_cap: None scores every position (batch_runner.py — the batch
+    API has no per-minute token limit).
     """
     # Step 1: get Nachtrag positions
     regex_positions = nachtrag_data.get("positions", [])
@@ -731,7 +836,10 @@ async def analyze_nachtrag(
 
     if len(regex_positions) < 2:
         # Regex found too little — Claude extraction fallback
-        extracted = await _extract_nachtrag_positions_via_claude(nachtrag_data["full_text"])
+        try:
+            extracted = await _extract_nachtrag_positions_via_claude(nachtrag_data["full_text"])
+        except llm.Unavailable:
+            extracted = {"positions": regex_positions}
         regex_positions = extracted.get("positions", [])
         begründung = extracted.get("begründung") or begründung
         if not total_claimed:
@@ -751,7 +859,7 @@ async def analyze_nachtrag(
             or (stage_override != "stage2" and len(regex_positions) == 0)
     )
     if is_stage1:
-        return await _analyze_mka(full_text, begründung)
+        return {"is_stage1": True, "full_text": full_text, "begründung": begründung}
 
     # Merge extra context into begründung if provided.
     # For large files, extract a structured summary first (one Claude call)
@@ -775,23 +883,24 @@ async def analyze_nachtrag(
     # For Zulage-heavy NTs (100+ positions), full per-position scoring
     # exceeds the 10k output tokens/min free tier limit.
     # V2: upgrade tier or batch by OZ chapter (91/92/93/94).
-    if len(matched) > 20:
+    if position_cap is not None and len(matched) > position_cap:
+        metrics.inc("g2t_positions_capped_total", len(matched) - position_cap)
         matched = sorted(
             matched,
             key=lambda m: float(m["nachtrag"].get("claimed_total") or 0),
             reverse=True
-        )[:20]
-
-    # Step 4: parallel position scoring
-    semaphore = asyncio.Semaphore(3)
-
-    async def bounded(m):
-        async with semaphore:
-            return await _score_position(m, begründung)
+        )[:position_cap]
+    return {
+        "is_stage1": False,
+        "matched": matched,
+        "begründung": begründung,
+        "total_claimed": total_claimed,
+        "full_text": full_text,
+    }
 
-    scored = list(await asyncio.gather(*[bounded(m) for m in matched]))
 
-    # Step 5: aggregate
+def aggregate_positions(scored: list[dict], total_claimed: float) -> dict:
+    """Step 5: totals and overall recommendation (nachtrag_summary)."""
     accepted_total = sum(
         _safe_float(p.get("nachtrag_claimed_total"))
         for p in scored if p.get("assessment") == "accept"
@@ -814,19 +923,95 @@ async def analyze_nachtrag(
     else:
         recommendation = "negotiate"
 
+    return {
+        "total_claimed": total_claimed,
+        "accepted_total": accepted_total,
+        "contested_total": contested_total,
+        "recommendation": recommendation,
+        "position_count": n,
+        "degraded_count": sum(1 for p in scored if p.get("degraded")),
+    }
+
+
+async def analyze_nachtrag(
+    nachtrag_data: dict,
+    lv_positions: list[dict],
+    lv_pdf_bytes: Optional[bytes] = None,
+    extra_context_text: str = "",   # text from Begründung/Kalkulation PDFs
+    stage_override: Optional[str] = None,  # "stage1" | "stage2" | None
+    checkpoint=None,                       # job_queue.Checkpoint (background jobs)
+    admit=None,                            # admission.py hook
+) -> dict:
+    """
+    Full Mode B pipeline. Called by main.py /analyze-nachtrag endpoint.
+
+    nachtrag_data keys: full_text, begründung, positions, total_claimed
+
+    checkpoint: each scored position is saved as it finishes; positions
+    already checkpointed by an interrupted run are not scored again.
+
+    API unavailable (llm.Unavailable): positions get degraded_position_scoring()
+    and the Stellungnahme a placeholder text; summary.degraded_count says how
+    many positions were not assessed by Claude. The extraction fallback
+    keeps the regex positions, the Begründung summary falls back to the raw
+    text, and an Anzeige (Stage 1) gets a placeholder marked
+    nachtrag_summary.degraded.
+
+    admit: admission.py hook, awaited with the planned requests once the
+    positions are matched (may raise 429). Claude calls made while preparing
+    — extraction fallbacks for short or PDF-only inputs — are not counted.
+    """
+    with metrics.stage("prepare_positions"):
+        prepared = await prepare_positions(
+            nachtrag_data, lv_positions, lv_pdf_bytes, extra_context_text, stage_override,
+        )
+    if prepared["is_stage1"]:
+        return await _analyze_mka(prepared["full_text"], prepared["begründung"])
+    matched = prepared["matched"]
+    begründung = prepared["begründung"]
+    total_claimed = prepared["total_claimed"]
+
+    if admit is not None:
+        # Positions + Stellungnahme (its prompt without the positions summary)
+        await admit([build_position_request(m, begründung) for m in matched] + [{
+            "system": _stell_system(),
+            "messages": [{"role": "user", "content": _STELL_PROMPT}],
+            "max_tokens": 1200,
+        }])
+
+    # Step 4: parallel position scoring
+    semaphore = asyncio.Semaphore(3)
+    done = await checkpoint.load(total=len(matched)) if checkpoint else {}
+
+    async def bounded(m):
+        item = checkpoint.key(m) if checkpoint else None
+        if item in done:
+            return done[item]
+        with metrics.stage("queue_wait"):
+            await semaphore.acquire()
+        try:
+            scored_position = await _score_position(m, begründung)
+        finally:
+            semaphore.release()
+        if checkpoint and not scored_position.get("degraded"):
+            await checkpoint.save(item, scored_position)
+        return scored_position
+
+    with metrics.stage("score_positions"):
+        scored = list(await asyncio.gather(*[bounded(m) for m in matched]))
+
+    # Step 5: aggregate
+    summary = aggregate_positions(scored, total_claimed)
+
     # Step 6: Stellungnahme
-    stellungnahme = await _generate_stellungnahme(
-        scored, total_claimed, accepted_total, contested_total, recommendation
-    )
+    with metrics.stage("stellungnahme"):
+        stellungnahme = await _generate_stellungnahme(
+            scored, total_claimed, summary["accepted_total"], summary["contested_total"],
+            summary["recommendation"],
+        )
 
     return {
-        "nachtrag_summary": {
-            "total_claimed": total_claimed,
-            "accepted_total": accepted_total,
-            "contested_total": contested_total,
-            "recommendation": recommendation,
-            "position_count": n,
-        },
+        "nachtrag_summary": summary,
         "positions": scored,
         "stellungnahme": stellungnahme,
     }
\ No newline at end of file
@@ -0,0 +1,287 @@
+"""
+ocr.py — OCR for the pages of scanned PDFs that have no text layer.
+
+Older AG contracts and hand-signed Nachträge often arrive as scans:
+extract_pages() returns a few whitespace characters per page and the upload
+used to end in HTTP 422. recognize() fills in exactly the textless pages —
+pages with a text layer keep PyMuPDF's text — and main.py feeds the result
+into the normal extract_clauses / extract_nachtrag_data path.
+
+Per textless page, in a worker process (_recognize_page):
+  render  page.get_pixmap() at OCR_DPI, grayscale. 300 dpi is Tesseract's
+          sweet spot for A4: lower loses umlauts and § signs, higher only
+          costs time.
+  hash    sha256 over the rendered image and OCR_LANGUAGE — the cache key
+  cache   OCR_CACHE_DIR/<hash[:2]>/<hash>.txt. The same scan uploaded again
+          or combined with new pages (NT resubmitted with a signed annex,
+          contract plus Nachtrag in one file) only OCRs the new pages.
+  OCR     Pixmap.pdfocr_tobytes() — the Tesseract engine built into PyMuPDF's
+          MuPDF: no subprocess, no temp images. The text is read back from
+          the one-page PDF it returns.
+
+Why a process pool: rendering and recognition are CPU-bound C code that
+holds the GIL, and pages are independent — wall time scales with
+1 / OCR_WORKERS. Each worker runs Tesseract single-threaded
+(OMP_THREAD_LIMIT=1): its OpenMP threads would otherwise compete with the
+other workers for the same cores. Workers get the PDF as a temp file path,
+not bytes — a 20 MB scan would be pickled once per page.
+
+Progress: as a background job (as_job=true) the pages are a checkpoint
+stage "ocr" — GET /jobs/{id} shows done/total pages, and a job resumed after
+a restart only recognizes the pages still missing. /health → "ocr" shows
+documents and pages in progress plus page counts by source.
+
+Requirements: Tesseract language data for OCR_LANGUAGE, e.g.
+`apt install tesseract-ocr-deu tesseract-ocr-eng` (Docker image) or the
+.traineddata files in a folder named by TESSDATA_PREFIX. PyMuPDF ships the
+engine itself. Without the data available() is False and scanned uploads
+keep the 422. benchmarks/ocr_throughput.py measures seconds per page and
+worker.
+
+Config:
+  OCR_ENABLED          1 (default) | 0
+  OCR_LANGUAGE         Tesseract languages, default deu+eng
+  OCR_DPI              render resolution, default 300
+  OCR_WORKERS          processes, default CPU count
+  OCR_MIN_PAGE_CHARS   pages with fewer non-whitespace characters count
+                       as textless (default 20)
+  OCR_CACHE_DIR        default backend/.cache/ocr
+  OCR_CACHE_MAX_PAGES  least recently used pages are pruned beyond this
+                       (default 20000, about 60 MB of text)
+  TESSDATA_PREFIX      tessdata folder; otherwise looked up via the
+                       tesseract-ocr install (fitz.get_tessdata)
+"""
+
+import asyncio
+import functools
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+
+_ENABLED = os.getenv("OCR_ENABLED", "1") == "1"
+_LANGUAGE = os.getenv("OCR_LANGUAGE", "deu+eng")
+_DPI = int(os.getenv("OCR_DPI", "300"))
+_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 2)))
+_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "20"))
+_CACHE_DIR = os.getenv(
+    "OCR_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), ".cache", "ocr"),
+)
+_CACHE_MAX_PAGES = int(os.getenv("OCR_CACHE_MAX_PAGES", "20000"))
+
+# Where a page's text came from (g2t_ocr_pages_total{source})
+_SOURCES = ("ocr", "cache", "checkpoint")
+
+_running = {"documents": 0, "pages_total": 0, "pages_done": 0}
+
+
+# ── Availability ──────────────────────────────────────────────────────────────
+
+@functools.cache
+def tessdata() -> str | None:
+    """tessdata folder holding every OCR_LANGUAGE model, or None."""
+    import fitz
+    folder = os.getenv("TESSDATA_PREFIX") or fitz.get_tessdata()
+    if not folder:
+        return None
+    languages = [lang for lang in _LANGUAGE.split("+") if lang]
+    if not all(os.path.isfile(os.path.join(folder, f"{lang}.traineddata")) for lang in languages):
+        return None
+    return folder
+
+
+_checked = False  # tessdata() resolved (it imports fitz and may shell out)
+
+
+def available() -> bool:
+    global _checked
+    if not _ENABLED:
+        return False
+    found = tessdata() is not None
+    _checked = True
+    return found
+
+
+def textless_pages(pages: list[str]) -> list[int]:
+    """Indices of pages without a usable text layer."""
+    return [i for i, text in enumerate(pages) if len("".join(text.split())) < _MIN_PAGE_CHARS]
+
+
+# ── Worker side ───────────────────────────────────────────────────────────────
+
+def _worker_init() -> None:
+    # One Tesseract thread per process — the pool already uses every core
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _ocr_pixmap(pix, language: str, folder: str) -> str:
+    import fitz
+    with fitz.open("pdf", pix.pdfocr_tobytes(language=language, tessdata=folder)) as doc:
+        return doc[0].get_text("text")
+
+
+def _recognize_page(path: str, number: int, dpi: int, language: str,
+                    folder: str, cache_dir: str) -> tuple[str, str]:
+    """Runs in a worker process. Returns (text, "cache" | "ocr")."""
+    try:
+        return _render_and_recognize(path, number, dpi, language, folder, cache_dir)
+    except Exception as exc:
+        # MuPDF errors hold SWIG objects and do not pickle back to the parent
+        raise RuntimeError(f"{type(exc).__name__}: {exc}") from None
+
+
+def _render_and_recognize(path: str, number: int, dpi: int, language: str,
+                          folder: str, cache_dir: str) -> tuple[str, str]:
+    import fitz
+    with fitz.open(path) as doc:
+        pix = doc[number].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+
+    h = hashlib.sha256(f"{language}:{pix.width}x{pix.height}:".encode())
+    h.update(pix.samples_mv)
+    digest = h.hexdigest()
+    cached = os.path.join(cache_dir, digest[:2], f"{digest}.txt")
+    try:
+        with open(cached, encoding="utf-8") as f:
+            text = f.read()
+        os.utime(cached)  # recently used — pruned last
+        return text, "cache"
+    except FileNotFoundError:
+        pass
+
+    text = _ocr_pixmap(pix, language, folder)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    tmp = f"{cached}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, cached)  # concurrent writers of the same page: last one wins, both complete
+    return text, "ocr"
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=_WORKERS, initializer=_worker_init)
+    return _pool
+
+
+def _write_temp(pdf_bytes: bytes) -> str:
+    """The upload as a temp file for the workers (see module docstring)."""
+    fd, path = tempfile.mkstemp(prefix="g2t-ocr-", suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf_bytes)
+    return path
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+# ── Page cache ────────────────────────────────────────────────────────────────
+
+def _prune_cache() -> None:
+    """Delete the least recently used pages beyond OCR_CACHE_MAX_PAGES."""
+    entries = []
+    for sub in os.scandir(_CACHE_DIR):
+        if sub.is_dir():
+            entries += [(e.stat().st_mtime, e.path) for e in os.scandir(sub.path)
+                        if e.name.endswith(".txt")]
+    if len(entries) <= _CACHE_MAX_PAGES:
+        return
+    entries.sort()
+    for _, path in entries[:len(entries) - _CACHE_MAX_PAGES]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# ── Recognition ───────────────────────────────────────────────────────────────
+
+async def recognize(pdf_bytes: bytes, pages: list[str], checkpoint=None) -> list[str]:
+    """
+    pages (extract_pages() of pdf_bytes) with every textless page replaced
+    by its OCR text. Raises ValueError when a page cannot be recognized.
+
+    checkpoint: job_queue.Checkpoint (stage "ocr") when running as a
+    background job — progress per page, pages already recognized by an
+    interrupted run are not recognized again.
+    """
+    todo = textless_pages(pages)
+    if not todo:
+        return pages
+    pages = list(pages)
+
+    done = await checkpoint.load(total=len(todo)) if checkpoint else {}
+    for i in todo:
+        if f"page-{i}" in done:
+            pages[i] = done[f"page-{i}"]
+            metrics.inc("g2t_ocr_pages_total", source="checkpoint")
+    todo = [i for i in todo if f"page-{i}" not in done]
+    if not todo:
+        return pages
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    folder = tessdata()
+    # Scans are the largest uploads — written and removed off the event loop
+    path = await asyncio.to_thread(_write_temp, pdf_bytes)
+    _running["documents"] += 1
+    _running["pages_total"] += len(todo)
+    remaining = len(todo)
+    pending: dict[asyncio.Future, int] = {}
+    recognized = 0
+    try:
+        pending = {
+            loop.run_in_executor(pool, _recognize_page, path, i, _DPI, _LANGUAGE, folder, _CACHE_DIR): i
+            for i in todo
+        }
+        with metrics.stage("ocr"):
+            while pending:
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    i = pending.pop(future)
+                    try:
+                        text, source = future.result()
+                    except Exception as exc:
+                        raise ValueError(f"page {i + 1}: {exc}") from exc
+                    pages[i] = text
+                    remaining -= 1
+                    _running["pages_done"] += 1
+                    recognized += source == "ocr"
+                    metrics.inc("g2t_ocr_pages_total", source=source)
+                    if checkpoint:
+                        await checkpoint.save(f"page-{i}", text)
+    finally:
+        for future in pending:
+            future.cancel()
+        await asyncio.to_thread(os.remove, path)
+        _running["documents"] -= 1
+        _running["pages_total"] -= len(todo)
+        _running["pages_done"] -= len(todo) - remaining
+
+    if recognized:
+        await asyncio.to_thread(_prune_cache)
+    return pages
+
+
+def stats() -> dict:
+    """Availability, work in progress and pages by source (for /health)."""
+    return {
+        "enabled": _ENABLED,
+        # None until the startup thread resolved it — /health must not do the lookup
+        "available": available() if _checked or not _ENABLED else None,
+        "language": _LANGUAGE,
+        "dpi": _DPI,
+        "workers": _WORKERS,
+        "running": dict(_running),
+        "pages": {s: int(metrics.value("g2t_ocr_pages_total", source=s)) for s in _SOURCES},
+    }
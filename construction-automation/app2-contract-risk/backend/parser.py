@@ -11,12 +11,14 @@ Design decision — why PyMuPDF over alternatives:
   PyMuPDF:    fastest, smallest footprint, reliable umlaut handling via UTF-8 text layer
 
 Scanned PDF detection: avg chars/page < 100 → no usable text layer.
-V1 returns HTTP 422 with message. OCR via Tesseract deferred to V2.
+main.py then OCRs the textless pages (ocr.py, Tesseract) and passes the
+recognized text on; without Tesseract language data it returns HTTP 422.
 """
 
 import re
 from typing import Optional
-import fitz  # PyMuPDF
+
+import metrics
 
 from clause_patterns import extract_clauses, has_risk_signals  # noqa: F401 (re-exported)
 
@@ -60,14 +62,25 @@ def extract_text(pdf_bytes: bytes) -> tuple[str, int]:
     Uses PyMuPDF page.get_text("text") which preserves paragraph structure
     better than "blocks" mode for flowing German legal text.
     """
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    pages = []
-    for page in doc:
-        pages.append(page.get_text("text"))
-    doc.close()
+    pages = extract_pages(pdf_bytes)
     return "\n".join(pages), len(pages)
 
 
+def extract_pages(pdf_bytes: bytes) -> list[str]:
+    """
+    Extract text per page. Used where page boundaries matter
+    (nachtrag_qa.py chunks documents on them).
+    """
+    import fitz  # PyMuPDF — imported on the first PDF, not at startup
+    with metrics.stage("pdf_extract"):
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        pages = []
+        for page in doc:
+            pages.append(page.get_text("text"))
+        doc.close()
+    return pages
+
+
 def is_scanned_pdf(text: str, page_count: int) -> bool:
     """
     Heuristic: if average chars per page < 100, assume scanned image PDF.
@@ -83,9 +96,11 @@ def is_scanned_pdf(text: str, page_count: int) -> bool:
 
 # ── Mode B — Nachtrag PDF ─────────────────────────────────────────────────────
 
-def extract_nachtrag_data(pdf_bytes: bytes) -> dict:
+def extract_nachtrag_data(pdf_bytes: bytes, text: Optional[str] = None) -> dict:
     """
     Extract structured data from a contractor's Nachtrag PDF.
+    text: already extracted text (OCR output of a scan) — pdf_bytes is
+    then not read again.
 
     Returns:
         full_text       str          full extracted text (for Claude fallback)
@@ -96,7 +111,8 @@ def extract_nachtrag_data(pdf_bytes: bytes) -> dict:
     The positions list is best-effort. If len < 2, nachtrag_scorer.py
     will use the Claude extraction fallback (EXTRACT_PROMPT).
     """
-    text, _ = extract_text(pdf_bytes)
+    if text is None:
+        text, _ = extract_text(pdf_bytes)
 
     begründung = _extract_begründung(text)
     positions = _extract_positions_regex(text)
@@ -0,0 +1,244 @@
+"""
+portfolio.py — Bulk screening of many contracts from one ZIP (Mode A).
+
+Use case: taking over a project with 30–80 subcontracts. Uploading them one
+by one scores every contract in isolation — and subcontracts from the same
+GC share most of their clauses verbatim.
+
+Pipeline:
+  ZIP → read_zip() (limits below) →
+  parse_all(): extract_text + extract_clauses per PDF in a process pool →
+  dedupe by clause_fingerprint() across all contracts →
+  one score_clauses() call over the unique set (same concurrency cap,
+  pre-filter and clause index as single uploads) →
+  fan the scores back out → per-contract summaries + risk matrix
+
+Claude calls therefore scale with unique clauses, not total clauses: 60
+subcontracts × 25 clauses from one template is ~25 + the deviations.
+
+Why a process pool for parsing: PyMuPDF extraction plus clause regexes are
+CPU-bound (~0.2–1 s per contract) and hold the GIL — a thread pool would
+serialize them and stall the event loop. Workers receive bytes and return
+plain dicts, so nothing unpicklable crosses the boundary.
+
+ZIP limits (zip-bomb / abuse guards — checked against the central
+directory first, then enforced while reading, since headers can lie):
+  PORTFOLIO_MAX_FILES     PDFs per ZIP (default 100)
+  UPLOAD_MAX_MB           per PDF, same as single uploads (default 20)
+  PORTFOLIO_MAX_TOTAL_MB  uncompressed total (default 500)
+  compression ratio > 100 rejects the member — PDFs barely compress
+Members are read in memory only, never extracted to disk (no path traversal).
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from parser import extract_text, is_scanned_pdf
+from clause_patterns import extract_clauses
+from fingerprint import clause_fingerprint, clause_set_fingerprint, text_fingerprint
+from risk_scorer import score_clauses, aggregate_risk_summary, planned_requests
+
+_MAX_FILES = int(os.getenv("PORTFOLIO_MAX_FILES", "100"))
+_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_MB", "20")) * 1024 * 1024
+_MAX_TOTAL_BYTES = int(os.getenv("PORTFOLIO_MAX_TOTAL_MB", "500")) * 1024 * 1024
+_MAX_RATIO = 100
+_PARSE_WORKERS = int(os.getenv("PORTFOLIO_PARSE_WORKERS", str(os.cpu_count() or 2)))
+
+RISK_CATEGORIES = (
+    "payment", "liability", "termination", "warranty",
+    "delay", "scope", "security", "other",
+)
+_LEVEL_RANK = {"low": 1, "medium": 2, "high": 3}
+
+
+# ── ZIP intake ────────────────────────────────────────────────────────────────
+
+def read_zip(data: bytes) -> list[tuple[str, bytes]]:
+    """
+    Return [(member name, pdf bytes)] for all PDFs in the archive.
+    Raises ValueError with a user-facing message when a limit is exceeded.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ValueError("Not a valid ZIP archive.")
+
+    members = [
+        m for m in archive.infolist()
+        if not m.is_dir()
+        and m.filename.lower().endswith(".pdf")
+        and not m.filename.startswith("__MACOSX/")
+        and not os.path.basename(m.filename).startswith("._")
+    ]
+    if not members:
+        raise ValueError("ZIP contains no PDF files.")
+    if len(members) > _MAX_FILES:
+        raise ValueError(f"ZIP contains {len(members)} PDFs — limit is {_MAX_FILES}.")
+    if sum(m.file_size for m in members) > _MAX_TOTAL_BYTES:
+        raise ValueError(
+            f"ZIP expands to more than {_MAX_TOTAL_BYTES // (1024 * 1024)} MB."
+        )
+
+    files, total = [], 0
+    for m in members:
+        if m.flag_bits & 0x1:
+            raise ValueError(f"{m.filename}: encrypted ZIP members are not supported.")
+        if m.file_size > _MAX_FILE_BYTES:
+            raise ValueError(
+                f"{m.filename} exceeds {_MAX_FILE_BYTES // (1024 * 1024)} MB limit."
+            )
+        if m.compress_size and m.file_size / m.compress_size > _MAX_RATIO:
+            raise ValueError(f"{m.filename}: suspicious compression ratio — rejected.")
+        with archive.open(m) as f:
+            content = f.read(_MAX_FILE_BYTES + 1)
+        total += len(content)
+        if len(content) > _MAX_FILE_BYTES or total > _MAX_TOTAL_BYTES:
+            raise ValueError(f"{m.filename}: uncompressed size exceeds the limit.")
+        files.append((m.filename, content))
+    return files
+
+
+# ── Parsing (process pool) ────────────────────────────────────────────────────
+
+def _parse_member(content: bytes) -> dict:
+    """Runs in a worker process. Bytes in, plain dict out."""
+    try:
+        text, page_count = extract_text(content)
+    except Exception as exc:
+        return {"status": "error", "detail": f"PDF could not be read: {exc}"}
+    if is_scanned_pdf(text, page_count):
+        return {"status": "scanned", "detail": "No usable text layer (scanned PDF)."}
+    clauses = extract_clauses(text)
+    if not clauses:
+        return {"status": "no_clauses", "detail": "No §-numbered clauses found."}
+    return {
+        "status": "ok",
+        "page_count": page_count,
+        "clauses": clauses,
+        "text_fp": text_fingerprint(text),
+        "clause_fp": clause_set_fingerprint(clauses),
+    }
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=_PARSE_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def parse_all(files: list[tuple[str, bytes]]) -> list[dict]:
+    """
+    Parse every PDF once — byte-identical duplicates inside the ZIP share
+    one parse. Returns one dict per file: name, session_id (MD5 of the
+    bytes, same key as /analyze-contract) and the _parse_member() fields.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    by_md5: dict[str, asyncio.Future] = {}
+    entries = []
+    for name, content in files:
+        md5 = hashlib.md5(content).hexdigest()
+        if md5 not in by_md5:
+            by_md5[md5] = loop.run_in_executor(pool, _parse_member, content)
+        entries.append((name, md5))
+    results = dict(zip(by_md5, await asyncio.gather(*by_md5.values())))
+    return [{"name": name, "session_id": md5, **results[md5]} for name, md5 in entries]
+
+
+# ── Dedupe → score → fan out ──────────────────────────────────────────────────
+
+def _risk_matrix(contracts: list[dict]) -> dict:
+    """
+    contract × risk_category → worst risk level found ("high" | "medium" |
+    "low" | None), plus per-category count of contracts with a high cell.
+    """
+    rows = []
+    for c in contracts:
+        cells: dict[str, str | None] = {cat: None for cat in RISK_CATEGORIES}
+        for clause in c["clauses"]:
+            cat = clause.get("risk_category")
+            cat = cat if cat in cells else "other"
+            level = clause.get("risk_level", "low")
+            if _LEVEL_RANK.get(level, 0) > _LEVEL_RANK.get(cells[cat], 0):
+                cells[cat] = level
+        rows.append({"name": c["name"], "session_id": c["session_id"], "cells": cells})
+    high_by_category = {
+        cat: sum(1 for r in rows if r["cells"][cat] == "high") for cat in RISK_CATEGORIES
+    }
+    return {"categories": list(RISK_CATEGORIES), "rows": rows,
+            "high_by_category": high_by_category}
+
+
+async def analyze_portfolio(
+    files: list[tuple[str, bytes]], checkpoint=None, admit=None,
+) -> tuple[dict, list[dict]]:
+    """
+    Returns (response, sessions):
+      response  per-contract summaries, risk matrix, dedupe stats
+      sessions  one entry per analyzed contract — name, session_id,
+                clauses, summary, text_fp, clause_fp — for main.py to
+                register in the single-contract caches (so /ask-contract
+                works on each)
+    checkpoint: job_queue.Checkpoint when running as a background job.
+    admit: admission.py hook, awaited with the planned requests for the
+    unique clause set before scoring.
+    """
+    parsed = await parse_all(files)
+    ok = [p for p in parsed if p["status"] == "ok"]
+
+    unique: dict[str, dict] = {}
+    total_clauses = 0
+    for p in ok:
+        for clause in p["clauses"]:
+            total_clauses += 1
+            unique.setdefault(clause_fingerprint(clause), clause)
+
+    if admit is not None:
+        await admit(planned_requests(list(unique.values())))
+    scored_unique = dict(zip(unique, await score_clauses(list(unique.values()), checkpoint=checkpoint)))
+
+    sessions, contracts = [], []
+    for p in parsed:
+        entry = {"name": p["name"], "session_id": p["session_id"], "status": p["status"]}
+        if p["status"] != "ok":
+            entry["detail"] = p["detail"]
+            contracts.append(entry)
+            continue
+        # Scoring fields from the shared result, page_start etc. from this contract
+        scored = [{**scored_unique[clause_fingerprint(c)], **c} for c in p["clauses"]]
+        summary = aggregate_risk_summary(scored)
+        entry.update(page_count=p["page_count"], clause_count=len(scored), summary=summary)
+        contracts.append(entry)
+        sessions.append({
+            "name": p["name"], "session_id": p["session_id"],
+            "clauses": scored, "summary": summary,
+            "text_fp": p["text_fp"], "clause_fp": p["clause_fp"],
+        })
+
+    response = {
+        "contracts": contracts,
+        "risk_matrix": _risk_matrix(sessions),
+        "stats": {
+            "files": len(parsed),
+            "analyzed": len(ok),
+            "failed": len(parsed) - len(ok),
+            "total_clauses": total_clauses,
+            "unique_clauses": len(unique),
+        },
+    }
+    return response, sessions
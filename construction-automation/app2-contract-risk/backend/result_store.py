@@ -0,0 +1,232 @@
+"""
+result_store.py — Compressed in-memory store for cached analysis results.
+
+main.py keeps every analysis result until restart: Mode A clause lists
+with full clause text and Claude's reason / suggestion per clause, Mode B
+position lists, and Path C Q&A sessions with every page chunk plus a BM25
+index. As live Python objects that is several times the JSON size — a few
+hundred sessions cost hundreds of MB per worker. CompressedStore holds each
+entry as one compressed JSON blob instead:
+
+  Codec       zstd (level 3) when the optional `zstandard` package is
+              installed, zlib (level 6) otherwise — RESULT_STORE_CODEC
+              overrides. Both start from the same preset dictionary
+              (_DICTIONARY): the keys and enum values every result repeats,
+              so even a small entry compresses from its first byte.
+  On access   An entry is decoded when it is read, not before. The last
+              RESULT_STORE_HOT (default 8) entries read or written stay
+              decoded (LRU) — the detail, Q&A and export requests of an
+              active session do not decode on every call.
+  Interning   Decoded values of low-cardinality keys (risk_level,
+              assessment, clause numbers, …) go through sys.intern, so
+              hot entries and concurrent requests share one string object
+              per value instead of one per clause.
+  Identity    blob(key) changes only when the entry is replaced; main.py
+              keys rendered DOCX on it (a decoded result is a new object
+              on every cold read).
+
+Values must survive a JSON round trip (tuples come back as lists) — the
+to_json / from_json hooks convert anything else, e.g. the Path C session's
+Bm25Index (nachtrag_qa.context_to_dict / context_from_dict).
+
+Per session (benchmarks/cache_memory.py, 50 sessions, cold entries):
+
+  kind                       live     zlib + dict      zstd + dict
+  contract, 18 clauses      22 KB     5.0 KB (4.3×)    5.4 KB (4.0×)
+  Nachtrag, 60 positions    78 KB    13.0 KB (6.0×)   14.3 KB (5.5×)
+  Path C session           325 KB    10.8 KB (30×)    11.2 KB (29×)
+
+Decoding a cold entry costs 0.3–5 ms. The dictionary alone saves about
+7 % on a contract entry, more on small ones.
+
+Not thread-safe by design: all callers run on the event loop (aset()
+only moves the encoding of one value off it).
+"""
+
+import asyncio
+import json
+import os
+import sys
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable
+
+try:
+    import zstandard
+except ImportError:  # optional — zlib with the same dictionary otherwise
+    zstandard = None
+
+_CODECS = ("zstd", "zlib")
+_CODEC = os.getenv("RESULT_STORE_CODEC", "zstd" if zstandard else "zlib").strip().lower()
+if _CODEC not in _CODECS:
+    raise RuntimeError(f"RESULT_STORE_CODEC must be one of {', '.join(_CODECS)} — got {_CODEC!r}")
+if _CODEC == "zstd" and zstandard is None:
+    raise RuntimeError("RESULT_STORE_CODEC=zstd needs the zstandard package")
+_ZSTD_LEVEL = 3
+_ZLIB_LEVEL = 6
+_HOT = int(os.getenv("RESULT_STORE_HOT", "8"))
+
+# Keys whose values come from a small set — interned on decode
+_INTERNED = frozenset({
+    "number", "title", "risk_level", "risk_category", "overall_risk_level",
+    "assessment", "price_assessment", "match_type", "vob_paragraph",
+    "nachtrag_unit", "unit", "recommendation", "source",
+})
+
+# Preset dictionary: fragments as results serialize them. zlib reaches the
+# last 32 KB of it and matches nearby text cheapest, so the most frequent
+# fragments come last.
+_DICTIONARY = "".join([
+    # Path C session context
+    '{"sources":["nachtrag_text","lv_text","baubeschreibung_text"],"chunks":[',
+    '{"source":"lv_text","page":1,"oz":null,"text":"',
+    '"index":{"postings":{},"idf":{},"doc_len":[],"heads":[]}}',
+    # Mode B
+    '{"nachtrag_summary":{"total_claimed":0.0,"accepted_total":0.0,"contested_total":0.0,'
+    '"position_count":0,"recommendation":"negotiate"},"stellungnahme":"',
+    '{"oz":"01.01.0010","nachtrag_description":"","nachtrag_qty":0.0,"nachtrag_unit":"m",'
+    '"nachtrag_claimed_unit_price":0.0,"nachtrag_claimed_total":0.0,"lv_oz":null,'
+    '"lv_description":null,"lv_unit_price":null,"lv_total":null,"match_type":"oz_exact",',
+    '"match_type":"text_fuzzy","match_type":"no_match","price_assessment":"justified",',
+    '"price_assessment":"overstated","price_assessment":"unjustified","price_delta_percent":null,',
+    '"vob_paragraph":"§2 Abs. 5 VOB/B","vob_reasoning":"","negotiation_position":"',
+    '"assessment":"accept","assessment":"reject","assessment":"negotiate",',
+    # Mode A summary
+    '"summary":{"overall_risk_score":0,"overall_risk_level":"HIGH","overall_risk_level":"MEDIUM",'
+    '"overall_risk_level":"LOW","high_risk_count":0,"medium_risk_count":0,"low_risk_count":0,'
+    '"top_3_risky_clauses":[],"summary_text":"","degraded_count":0}',
+    # Mode A clauses — risk_scorer.py's fixed texts, then the clause skeleton
+    '"reason":"Vorläufige regelbasierte Einstufung — KI-Analyse derzeit nicht verfügbar. ',
+    '"suggestion":"Manuelle Prüfung empfohlen; Analyse später erneut ausführen.","degraded":true',
+    '"reason":"Lokale Vorprüfung: Klauseln dieses Typs wurden bisher durchgängig als geringes Risiko bewertet.",',
+    ' des Auftragnehmers Auftraggeber Vertragsstrafe Sicherheitsleistung Vergütung Abnahme '
+    'Gewährleistung Kündigung Frist Werktage Nachtrag Leistung gemäß VOB/B § ',
+    '"risk_category":"payment","risk_category":"liability","risk_category":"termination",'
+    '"risk_category":"warranty","risk_category":"delay","risk_category":"scope","risk_category":"security",',
+    '"risk_level":"high","risk_level":"medium",',
+    '{"clauses":[{"number":"§ 1","title":"","text":"","page_start":1,"has_risk_signals":true,',
+    '{"number":"§ 2","title":"","text":"","page_start":1,"has_risk_signals":false,'
+    '"risk_level":"low","risk_category":"other",'
+    '"reason":"Keine risikorelevanten Schlüsselwörter in dieser Klausel gefunden.",'
+    '"suggestion":"Keine besonderen Maßnahmen erforderlich."},',
+]).encode("utf-8")
+
+_zstd_dict = (
+    zstandard.ZstdCompressionDict(_DICTIONARY, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+    if zstandard else None
+)
+
+_MISSING = object()
+
+
+def _compress(data: bytes) -> bytes:
+    if _CODEC == "zstd":
+        blob = zstandard.ZstdCompressor(level=_ZSTD_LEVEL, dict_data=_zstd_dict).compress(data)
+        # The bytes object keeps zstd's worst-case output allocation — copy
+        # it, or every entry holds about its uncompressed size
+        return bytes(memoryview(blob))
+    c = zlib.compressobj(_ZLIB_LEVEL, zdict=_DICTIONARY)
+    return c.compress(data) + c.flush()
+
+
+def _decompress(blob: bytes) -> bytes:
+    if _CODEC == "zstd":
+        return zstandard.ZstdDecompressor(dict_data=_zstd_dict).decompress(blob)
+    d = zlib.decompressobj(zdict=_DICTIONARY)
+    return d.decompress(blob) + d.flush()
+
+
+def _intern(obj: dict) -> dict:
+    for key, value in obj.items():
+        if key in _INTERNED and type(value) is str:
+            obj[key] = sys.intern(value)
+    return obj
+
+
+def encode(value: Any) -> tuple[bytes, int]:
+    """(compressed blob, JSON size)."""
+    data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _compress(data), len(data)
+
+
+def decode(blob: bytes) -> Any:
+    return json.loads(_decompress(blob), object_hook=_intern)
+
+
+class CompressedStore:
+    """
+    dict-like (get, [], in, len) mapping of str keys to JSON-serializable
+    values, each held as one compressed blob.
+    """
+
+    def __init__(self, to_json: Callable = None, from_json: Callable = None, hot: int = _HOT):
+        self._to_json = to_json
+        self._from_json = from_json
+        self._hot_max = hot
+        self._blobs: dict[str, tuple[bytes, int]] = {}  # key → (blob, JSON size)
+        self._hot: OrderedDict[str, Any] = OrderedDict()
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._blobs[key] = encode(self._to_json(value) if self._to_json else value)
+        self._remember(key, value)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """store[key] = value with the encoding in a worker thread — for large values."""
+        self._blobs[key] = await asyncio.to_thread(
+            lambda: encode(self._to_json(value) if self._to_json else value)
+        )
+        self._remember(key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._hot:
+            self._hot.move_to_end(key)
+            return self._hot[key]
+        entry = self._blobs.get(key)
+        if entry is None:
+            return default
+        value = decode(entry[0])
+        if self._from_json:
+            value = self._from_json(value)
+        self._remember(key, value)
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._blobs
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def alias(self, key: str, source: str) -> None:
+        """Make key an alias of source — one blob, no re-encoding."""
+        self._blobs[key] = self._blobs[source]
+        self._hot.pop(key, None)
+
+    def blob(self, key: str) -> bytes | None:
+        """The stored blob — the same object until key is written again."""
+        entry = self._blobs.get(key)
+        return entry[0] if entry else None
+
+    def stats(self) -> dict:
+        """Entries, decoded entries and stored vs. JSON bytes (for /health)."""
+        unique = {id(e[0]): e for e in self._blobs.values()}.values()
+        return {
+            "entries": len(self._blobs),
+            "hot": len(self._hot),
+            "codec": _CODEC,
+            "json_bytes": sum(size for _, size in unique),
+            "stored_bytes": sum(len(blob) for blob, _ in unique),
+        }
+
+    def _remember(self, key: str, value: Any) -> None:
+        if self._hot_max <= 0:
+            return
+        self._hot[key] = value
+        self._hot.move_to_end(key)
+        while len(self._hot) > self._hot_max:
+            self._hot.popitem(last=False)
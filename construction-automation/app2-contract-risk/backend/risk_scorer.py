@@ -4,7 +4,10 @@ risk_scorer.py — Claude haiku-4-5 risk assessment for Mode A (pre-signing VOB/
 Pipeline:
   clauses (list[dict]) →
   pre-filter with has_risk_signals() →
-  asyncio.gather() parallel Claude calls (max 10 concurrent) →
+  clause_index lookup (exact / near-duplicate reuse) →
+  prescreen classifier (confidently "low" → no call) →
+  asyncio.gather() parallel Claude calls (max 10 concurrent, hedged
+  past p90 — llm.py) →
   aggregate_risk_summary()
 
 Token optimization: clauses with no risk signals (boilerplate) get
@@ -21,19 +24,29 @@ Model: claude-haiku-4-5-20251001
 import os
 import json
 import asyncio
-from anthropic import AsyncAnthropic
-from clause_patterns import has_risk_signals  # noqa: used for pre-filter gate
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # the SDK itself is imported on first use
+    from anthropic import AsyncAnthropic
 
-def _get_client() -> AsyncAnthropic:
+from clause_patterns import has_risk_signals  # noqa: used for pre-filter gate
+import cassette
+import clause_index
+import llm
+import metrics
+import prescreen
+
+def _get_client() -> "AsyncAnthropic":
+    from anthropic import AsyncAnthropic  # ~1.5 s to import — on first use, not at startup
     key = os.getenv("ANTHROPIC_API_KEY")
     if not key:
         raise RuntimeError(
             "ANTHROPIC_API_KEY environment variable not set. "
             "Export it before starting the server."
         )
-    return AsyncAnthropic(api_key=key)
+    return AsyncAnthropic(api_key=key, http_client=cassette.async_http_client())
 
-_client: AsyncAnthropic | None = None
+_client: "AsyncAnthropic | None" = None
 
 _MODEL = "claude-haiku-4-5-20251001"
 
@@ -67,7 +80,7 @@ _PROMPT_BY_LANG = {
 Vertragsklausel {number}: {title}
 
 {text}
-
+{reference}
 Bewerte das Risiko für den Auftragnehmer gemäß {standard}.
 
 Antworte mit exakt diesem JSON-Objekt:
@@ -81,7 +94,7 @@ Antworte mit exakt diesem JSON-Objekt:
 Contract clause {number}: {title}
 
 {text}
-
+{reference}
 Assess the risk for the contractor under {standard}.
 
 Respond with exactly this JSON object:
@@ -95,7 +108,7 @@ Respond with exactly this JSON object:
 Cláusula {number}: {title}
 
 {text}
-
+{reference}
 Evalúa el riesgo para el contratista bajo {standard}.
 
 Responde con exactamente este objeto JSON:
@@ -107,6 +120,29 @@ Responde con exactamente este objeto JSON:
 }}""",
 }
 
+# Near-duplicate reference (clause_index.py): a prior score for a very similar
+# clause, passed as context so Claude stays consistent across contracts.
+_REFERENCE_BY_LANG = {
+    "de": (
+        "\nReferenz: Eine sehr ähnliche Klausel ({number}) wurde bereits bewertet "
+        "(risk_level={risk_level}, risk_category={risk_category}). Begründung: {reason}\n"
+        "Bewerte die vorliegende Klausel eigenständig — weiche ab, wenn Beträge, "
+        "Fristen oder Wortlaut ein anderes Risiko ergeben.\n"
+    ),
+    "en": (
+        "\nReference: A very similar clause ({number}) was assessed before "
+        "(risk_level={risk_level}, risk_category={risk_category}). Reason: {reason}\n"
+        "Assess this clause on its own merits — deviate where amounts, deadlines "
+        "or wording change the risk.\n"
+    ),
+    "es": (
+        "\nReferencia: Una cláusula muy similar ({number}) ya fue evaluada "
+        "(risk_level={risk_level}, risk_category={risk_category}). Motivo: {reason}\n"
+        "Evalúa esta cláusula de forma independiente — desvíate si montos, plazos "
+        "o redacción cambian el riesgo.\n"
+    ),
+}
+
 _LOW_RISK_DEFAULT = {
     "risk_level": "low",
     "risk_category": "other",
@@ -115,50 +151,118 @@ _LOW_RISK_DEFAULT = {
 }
 
 
-# ── Single clause scoring ─────────────────────────────────────────────────────
+_PRESCREEN_LOW = {
+    "risk_level": "low",
+    "risk_category": "other",
+    "reason": "Lokale Vorprüfung: Klauseln dieses Typs wurden bisher durchgängig als geringes Risiko bewertet.",
+    "suggestion": "Keine besonderen Maßnahmen erforderlich.",
+}
 
-async def _score_one(clause: dict) -> dict:
-    """
-    Score a single clause. Returns the original dict merged with risk fields.
 
-    Pre-filter: clauses without risk signals get _LOW_RISK_DEFAULT without
-    an API call. Saves ~40% tokens on a typical 20-clause contract.
+def degraded_score(clause: dict, config: dict = None) -> dict:
     """
-    global _client
-    if _client is None:
-        _client = _get_client()
+    Rule-based stand-in while the API is unavailable (llm.Unavailable).
+
+    Only clauses that passed the pre-filter get here, so the floor is
+    "medium": a clause with risk signals is never called low without
+    Claude. "high" when the clause number is on the config's
+    high_risk_clauses list and contains a signal phrase, or when it
+    contains three or more. Marked degraded: true — never written to the
+    clause index or a job checkpoint, and main.py re-analyzes the contract
+    once the API is back.
+    """
+    from clause_patterns import ACTIVE_CONFIG, is_listed_high_risk, matched_signals
+    if config is None:
+        config = ACTIVE_CONFIG
+    listed = is_listed_high_risk(clause["number"], config)
+    signals = matched_signals(clause["text"], config)
+    level = "high" if (listed and signals) or len(signals) >= 3 else "medium"
+
+    basis = []
+    if listed:
+        basis.append(f"{clause['number']} gehört zu den typischen Risikoklauseln")
+    if signals:
+        basis.append("Signalbegriffe: " + ", ".join(signals))
+    return {
+        **clause,
+        "risk_level": level,
+        "risk_category": "other",
+        "reason": (
+            "Vorläufige regelbasierte Einstufung — KI-Analyse derzeit nicht "
+            "verfügbar. " + "; ".join(basis) + "."
+        ),
+        "suggestion": "Manuelle Prüfung empfohlen; Analyse später erneut ausführen.",
+        "degraded": True,
+    }
 
-    if not clause.get("has_risk_signals", False):
-        return {**clause, **_LOW_RISK_DEFAULT}
 
-    from clause_patterns import ACTIVE_CONFIG
-    lang     = ACTIVE_CONFIG.get("language", "de")
-    standard = ACTIVE_CONFIG.get("standard", "VOB/B")
+# ── Single clause scoring ─────────────────────────────────────────────────────
+
+def prepare_clause(clause: dict, config: dict = None) -> tuple[dict | None, dict | None]:
+    """
+    Everything before the API call. Returns (scored, request):
+      scored   final result when no call is needed (pre-filter, index reuse)
+      request  messages.create() parameters otherwise
+    Shared by _score_one() and batch_runner.py.
+    """
+    if not clause.get("has_risk_signals", False):
+        return {**clause, **_LOW_RISK_DEFAULT}, None
+
+    from clause_patterns import ACTIVE_CONFIG, config_key
+    if config is None:
+        config = ACTIVE_CONFIG
+    lang     = config.get("language", "de")
+    standard = config.get("standard", "VOB/B")
+
+    cfg_key = config_key(config)
+    prior = clause_index.lookup(clause, cfg_key)
+    # Near-identical wording is not enough: different amounts, percentages
+    # or deadlines are a different risk — those only get the reference
+    if prior and prior["similarity"] >= clause_index.REUSE_THRESHOLD and prior["same_numbers"]:
+        reused = {**clause, **prior["scoring"]}
+        if not prior["exact"]:
+            reused["reused_from"] = {"number": prior["number"], "similarity": prior["similarity"]}
+        return reused, None
+
+    # Local classifier — only when no similar clause was rated medium/high
+    if not prior or prior["scoring"].get("risk_level") == "low":
+        p_low = prescreen.p_low(clause, cfg_key)
+        if p_low is not None and p_low >= prescreen.threshold(cfg_key):
+            return {**clause, **_PRESCREEN_LOW, "prescreened": {"p_low": round(p_low, 3)}}, None
+
+    reference = ""
+    if prior:
+        ref = prior["scoring"]
+        reference = _REFERENCE_BY_LANG.get(lang, _REFERENCE_BY_LANG["de"]).format(
+            number=prior["number"],
+            risk_level=ref.get("risk_level", ""),
+            risk_category=ref.get("risk_category", ""),
+            reason=ref.get("reason", "")[:300],
+        )
 
-    system = _SYSTEM_BY_LANG.get(lang, _SYSTEM_BY_LANG["de"])
     prompt = _PROMPT_BY_LANG.get(lang, _PROMPT_BY_LANG["de"]).format(
         number=clause["number"],
         title=clause["title"],
         text=clause["text"][:1500],
         standard=standard,
+        reference=reference,
     )
+    return None, {
+        "model": _MODEL,
+        "max_tokens": 400,
+        "system": _SYSTEM_BY_LANG.get(lang, _SYSTEM_BY_LANG["de"]),
+        "messages": [{"role": "user", "content": prompt}],
+    }
 
-    import anthropic as _anthropic
-    for attempt in range(3):
-        try:
-            response = await _client.messages.create(
-                model=_MODEL,
-                max_tokens=400,
-                system=system,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            break
-        except _anthropic.RateLimitError:
-            if attempt == 2:
-                raise
-            await asyncio.sleep(2 ** attempt + 1)  # 2s, 3s
-
-    raw = response.content[0].text.strip()
+
+def planned_requests(clauses: list[dict], config: dict = None) -> list[dict]:
+    """The messages.create() params score_clauses() would send (admission.py)."""
+    return [request for c in clauses if (request := prepare_clause(c, config)[1]) is not None]
+
+
+def parse_clause_response(raw: str) -> tuple[dict, bool]:
+    """Claude's raw text → (scoring fields, whether the JSON was valid)."""
+    raw = raw.strip()
 
     # Claude occasionally wraps JSON in ```json ... ``` fences — strip them
     clean = raw.strip()
@@ -188,34 +292,105 @@ async def _score_one(clause: dict) -> dict:
                     scoring[field] = inner_json.get(field, inner)
                 except json.JSONDecodeError:
                     scoring[field] = inner
+        return scoring, True
     except (json.JSONDecodeError, KeyError):
         # Malformed response: mark medium, include raw for debugging
-        scoring = {
+        return {
             "risk_level": "medium",
             "risk_category": "other",
             "reason": raw[:300],
             "suggestion": "Manuelle Überprüfung empfohlen — automatische Analyse unvollständig.",
-        }
+        }, False
 
+
+def apply_clause_response(clause: dict, raw: str, config: dict = None) -> dict:
+    """Parse a response, record valid scores in the clause index, merge."""
+    from clause_patterns import ACTIVE_CONFIG, config_key
+    scoring, valid = parse_clause_response(raw)
+    if valid:
+        clause_index.add(clause, scoring, config_key(config or ACTIVE_CONFIG))
     return {**clause, **scoring}
 
 
+async def _score_one(clause: dict, config: dict = None) -> dict:
+    """
+    Score a single clause. Returns the original dict merged with risk fields.
+
+    Pre-filter: clauses without risk signals get _LOW_RISK_DEFAULT without
+    an API call. Saves ~40% tokens on a typical 20-clause contract.
+
+    Clause index: an exact or near-identical prior clause (clause_index.py)
+    is reused without an API call; a merely similar one is passed to Claude
+    as a reference.
+
+    Prescreen: a clause the local classifier (prescreen.py) rates "low" with
+    confidence above its validated threshold skips the call as well.
+
+    The call itself goes through llm.create(): rate-limit retries, and a
+    hedged duplicate request when it runs past the observed p90. If the API
+    is unavailable (timeout, outage, open circuit breaker) the clause gets
+    degraded_score() immediately instead of failing the whole analysis.
+    """
+    global _client
+
+    scored, request = prepare_clause(clause, config)
+    if scored is not None:
+        return scored
+
+    if _client is None:
+        _client = _get_client()
+
+    try:
+        response = await llm.create(_client, request, kind="clause")
+    except llm.Unavailable:
+        return degraded_score(clause, config)
+    return apply_clause_response(clause, response.content[0].text, config)
+
+
 # ── Parallel scoring ──────────────────────────────────────────────────────────
 
-async def score_clauses(clauses: list[dict]) -> list[dict]:
+async def score_clauses(clauses: list[dict], config: dict = None, checkpoint=None) -> list[dict]:
     """
     Score all clauses in parallel with a concurrency cap.
 
     Max 10 concurrent Claude calls: avoids rate-limit errors while keeping
     latency low on typical 15–25 clause contracts (~3–5s total).
+
+    New scores are persisted to the clause index once the batch completes
+    (a failed write is counted in /health, never raised).
+
+    checkpoint: job_queue.Checkpoint for background jobs — each scored clause
+    is saved as it finishes, and clauses already in the checkpoint (from an
+    interrupted run) are not scored again. Degraded scores are not saved,
+    so a resumed job scores those clauses properly.
     """
     semaphore = asyncio.Semaphore(3)
+    done = await checkpoint.load(total=len(clauses)) if checkpoint else {}
 
     async def bounded(c: dict) -> dict:
-        async with semaphore:
-            return await _score_one(c)
-
-    return list(await asyncio.gather(*[bounded(c) for c in clauses]))
+        item = checkpoint.key(c) if checkpoint else None
+        if item in done:
+            return done[item]
+        with metrics.stage("queue_wait"):
+            await semaphore.acquire()
+        try:
+            scored = await _score_one(c, config)
+        finally:
+            semaphore.release()
+        if checkpoint and not scored.get("degraded"):
+            await checkpoint.save(item, scored)
+        return scored
+
+    with metrics.stage("score_clauses"):
+        scored = list(await asyncio.gather(*[bounded(c) for c in clauses]))
+    try:
+        await clause_index.save()
+    except Exception as exc:  # disk full, read-only volume, …
+        # The Claude calls are already paid for — a failed index write must
+        # not fail the analysis. The index stays dirty; the next save retries.
+        clause_index.record_save_error(exc)
+        metrics.inc("g2t_clause_index_save_errors_total")
+    return scored
 
 
 # ── Aggregate summary ─────────────────────────────────────────────────────────
@@ -253,6 +428,7 @@ def aggregate_risk_summary(scored: list[dict]) -> dict:
         overall_level = "LOW"
 
     top3 = sorted(high_clauses, key=lambda c: c.get("number", ""))[:3]
+    degraded = sum(1 for c in scored if c.get("degraded"))
 
     return {
         "overall_risk_score": score,
@@ -272,5 +448,7 @@ def aggregate_risk_summary(scored: list[dict]) -> dict:
             f"{len(high_clauses)} Klausel(n) mit hohem Risiko, "
             f"{len(med_clauses)} mit mittlerem Risiko. "
             f"Gesamtrisiko: {overall_level} ({score}/100)."
+            + (f" {degraded} Klausel(n) nur vorläufig regelbasiert bewertet." if degraded else "")
         ),
+        "degraded_count": degraded,
     }
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+singleflight.py — In-flight request coalescing for expensive analyses.
+
+Problem:
+  When several team members open the same contract at once, every request
+  misses the result cache (nothing is stored until the first analysis
+  finishes) and runs the full Claude pipeline in parallel. N identical
+  uploads cost N× tokens and N× rate-limit budget.
+
+Approach:
+  A process-local registry of running analyses, keyed by content hash.
+  The first caller starts the computation as a task; later callers with the
+  same key await that same task instead of starting their own.
+  The entry is removed as soon as the task finishes — completed results
+  live in the regular caches in main.py, not here.
+
+  asyncio.shield() keeps the shared task alive when one waiter disconnects:
+  cancelling one HTTP request must not cancel the analysis for the others.
+  Exceptions (including HTTPException) propagate to every waiter.
+
+Admission (coalesce_admitted): a shared analysis must not be free for
+everyone but its first caller, and one client's 429 must not fail other
+clients. The flight awaits its admit(requests) hook (admission.py) once it
+knows what it will send. Each caller is charged through its own hook:
+  leader   inside the flight, before any Claude call
+  joiner   the same requests, as soon as the leader was admitted — a
+           rejection (429) fails only that joiner; the flight goes on
+  rejected leader  the flight fails for the leader only; its joiners retry,
+           and one of them leads the next flight with its own hook
+A flight that needs no Claude call (cache, fingerprint reuse) charges
+nobody, the joiners included.
+
+Scope: single worker process. Multiple uvicorn workers each keep their own
+registry — acceptable for V1 (one Render instance).
+"""
+
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+_inflight: dict[str, asyncio.Task] = {}
+# Admission state of running coalesce_admitted() flights, by key
+_plans: dict[str, dict] = {}
+
+
+async def coalesce(key: str, factory: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run factory() once per key among concurrent callers.
+
+    key      content hash, namespaced by caller (e.g. "contract:<md5>")
+    factory  zero-arg coroutine function — only called by the first caller
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _inflight[key] = task
+        task.add_done_callback(lambda _t: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def coalesce_admitted(
+    key: str,
+    factory: Callable[[Callable[[list[dict]], Awaitable[None]]], Awaitable[T]],
+    admit: Callable[[list[dict]], Awaitable[None]] | None = None,
+) -> T:
+    """
+    coalesce() with admission charged per caller (see module docstring).
+
+    factory  one-arg coroutine function: factory(flight_admit) runs the work
+             and awaits flight_admit(requests) before sending them
+    admit    this caller's admission hook, or None (not charged)
+    """
+    while True:
+        plan = _plans.get(key)
+        task = _inflight.get(key)
+        if plan is None or task is None or task.done():
+            # A finished flight's entries go in its done-callback; until then
+            # they are stale — lead a fresh flight (it hits the caches)
+            return await _lead(key, factory, admit)
+
+        shared = asyncio.shield(task)
+        if admit is not None and not plan["admitted"].is_set():
+            admitted = asyncio.ensure_future(plan["admitted"].wait())
+            await asyncio.wait({shared, admitted}, return_when=asyncio.FIRST_COMPLETED)
+            admitted.cancel()
+        if admit is not None and plan["admitted"].is_set():
+            try:
+                await admit(plan["requests"])
+            except BaseException:
+                shared.cancel()  # this caller only — the shielded flight goes on
+                raise
+        try:
+            return await shared
+        except Exception:
+            if plan["rejected"]:
+                continue  # the leader was over budget, not this caller
+            raise
+
+
+async def _lead(key: str, factory, admit) -> T:
+    plan = {"requests": None, "admitted": asyncio.Event(), "rejected": False}
+
+    async def flight_admit(requests: list[dict]) -> None:
+        if admit is not None:
+            try:
+                await admit(requests)
+            except Exception:
+                plan["rejected"] = True
+                raise
+        plan["requests"] = requests
+        plan["admitted"].set()
+
+    task = asyncio.ensure_future(factory(flight_admit))
+    _inflight[key] = task
+    _plans[key] = plan
+
+    def forget(_t) -> None:
+        # Both entries together — a plan without its task would send joiners
+        # to a flight that no longer exists
+        if _inflight.get(key) is task:
+            del _inflight[key]
+        if _plans.get(key) is plan:
+            del _plans[key]
+
+    task.add_done_callback(forget)
+    return await asyncio.shield(task)
+
+
+def inflight_count() -> int:
+    """Number of analyses currently running (for /health)."""
+    return len(_inflight)
@@ -0,0 +1,58 @@
+"""
+ttl_cache.py — Small in-process cache with LRU eviction and per-entry TTL.
+
+The module-level dict caches in main.py grow until restart. That is fine for
+analysis results (one entry per uploaded document) but not for things keyed
+by free text — every distinct question would add an entry forever.
+
+TTLCache bounds both dimensions:
+  maxsize  least-recently-used entry is evicted once the cache is full
+  ttl      entries older than ttl seconds are treated as absent (and dropped
+           lazily on access — no background sweeper task)
+
+Not thread-safe by design: all callers run on the event loop.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        stored_at, value = item
+        if time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        item = self._data.get(key)
+        return item is not None and time.monotonic() - item[0] <= self.ttl
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Size and hit/miss counters (for /health)."""
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,151 @@
+"""
+warmup.py — Fill the clause index from a bundled clause corpus.
+
+On Render the disk is ephemeral: every deploy starts with an empty clause
+index (clause_index.py), so the first uploads pay a Claude call for every
+risk-signal clause — including the standard clauses nearly every contract
+carries. Warm-up runs a corpus of those clauses through the normal path
+(extract_clauses → score_clauses) once per CLAUSE_CONFIGS entry; whatever
+the index already holds costs nothing, everything else is scored and
+stored, so real uploads find warm entries from the first request.
+
+Corpus: WARMUP_CORPUS_DIR/<CONFIG>/*.txt (default backend/warmup_corpus),
+plain contract text as extract_clauses() reads it — table of contents
+first, then "§ 1" / "Article 1" / "Cláusula 1", title line, body. The
+bundled files are model clauses written for this repo that follow the
+structure of VOB/B §§ 1–18, AIA A201 Articles 1–15 and a Colombian public
+works contract — the standard texts themselves are licensed. Model
+wording warms exact and near-duplicate hits only for contracts that reuse
+it; for production, add the clause texts your contracts actually embed
+(the client's Besondere Vertragsbedingungen, your own templates) as
+further .txt files in the same folders.
+
+Startup: CLAUSE_WARMUP = off | active (default — the CONTRACT_COUNTRY
+config) | all | comma-separated keys. Runs in the background after the
+app is up; progress and results in /health → "warmup". Clauses scored
+degraded (API unavailable) are not stored — the next start retries them.
+
+Usage:
+    python warmup.py                        # active config
+    python warmup.py --configs all --dry-run
+    python warmup.py --configs DE_VOB,US_AIA
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from clause_patterns import ACTIVE_CONFIG, CLAUSE_CONFIGS, config_key, extract_clauses
+from risk_scorer import planned_requests, score_clauses
+
+_CORPUS_DIR = os.getenv(
+    "WARMUP_CORPUS_DIR",
+    os.path.join(os.path.dirname(__file__), "warmup_corpus"),
+)
+_STARTUP = os.getenv("CLAUSE_WARMUP", "active").strip()
+
+_status: dict = {"state": "idle", "results": []}
+
+
+def resolve_configs(spec: str) -> list[str]:
+    """'off' | 'active' | 'all' | 'DE_VOB,US_AIA' → CLAUSE_CONFIGS keys."""
+    spec = spec.strip()
+    if spec.lower() in ("", "off", "0", "false"):
+        return []
+    if spec.lower() == "active":
+        return [config_key(ACTIVE_CONFIG)]
+    if spec.lower() == "all":
+        return list(CLAUSE_CONFIGS)
+    keys = [k.strip() for k in spec.split(",") if k.strip()]
+    unknown = [k for k in keys if k not in CLAUSE_CONFIGS]
+    if unknown:
+        raise ValueError(f"Unknown clause config(s) {unknown} — expected {list(CLAUSE_CONFIGS)}")
+    return keys
+
+
+def corpus_files(key: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(_CORPUS_DIR, key, "*.txt")))
+
+
+async def warm(key: str, dry_run: bool = False) -> dict:
+    """
+    Score the corpus clauses of one config that the index cannot answer yet.
+    dry_run only counts them (no API calls).
+    """
+    config = CLAUSE_CONFIGS[key]
+    result = {"config": key, "files": 0, "clauses": 0, "risk_signals": 0,
+              "missing": 0, "scored": 0, "degraded": 0}
+    for path in corpus_files(key):
+        with open(path, encoding="utf-8") as f:
+            clauses = extract_clauses(f.read(), config)
+        missing = len(planned_requests(clauses, config))
+        result["files"] += 1
+        result["clauses"] += len(clauses)
+        result["risk_signals"] += sum(1 for c in clauses if c["has_risk_signals"])
+        result["missing"] += missing
+        if dry_run or not missing:
+            continue
+        scored = await score_clauses(clauses, config)
+        degraded = sum(1 for c in scored if c.get("degraded"))
+        result["scored"] += missing - degraded
+        result["degraded"] += degraded
+    return result
+
+
+async def run(spec: str = _STARTUP, dry_run: bool = False) -> list[dict]:
+    """Warm every config in spec, one after another. Never raises."""
+    try:
+        keys = resolve_configs(spec)
+    except ValueError as exc:
+        _status.update(state="failed", error=str(exc))
+        return []
+    if not keys:
+        return []
+    _status.update(state="running", configs=keys, results=[], started_at=time.time())
+    try:
+        for key in keys:
+            _status["results"].append(await warm(key, dry_run))
+    except Exception as exc:  # missing API key, unreadable corpus, …
+        _status.update(state="failed", error=f"{type(exc).__name__}: {exc}")
+    else:
+        _status["state"] = "done"
+    _status["seconds"] = round(time.time() - _status.pop("started_at"), 2)
+    return _status["results"]
+
+
+def enabled() -> bool:
+    try:
+        return bool(resolve_configs(_STARTUP))
+    except ValueError:
+        return True  # run() records the error in status()
+
+
+def status() -> dict:
+    return dict(_status)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill the clause index from the warm-up corpus.")
+    parser.add_argument("--configs", default="active",
+                        help="active | all | comma-separated CLAUSE_CONFIGS keys")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only count clauses the index cannot answer yet")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.configs, args.dry_run))
+    if _status.get("error"):
+        raise SystemExit(_status["error"])
+    print(f"{'config':<8}{'files':>6}{'clauses':>9}{'signals':>9}{'missing':>9}{'scored':>8}{'degraded':>10}")
+    for r in results:
+        print(f"{r['config']:<8}{r['files']:>6}{r['clauses']:>9}{r['risk_signals']:>9}"
+              f"{r['missing']:>9}{r['scored']:>8}{r['degraded']:>10}")
+    print(f"{_status.get('seconds', 0)} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+cache_memory.py — Memory per cached session: live objects vs. result_store.
+
+Builds --sessions distinct sessions of each kind the backend caches and
+measures, with tracemalloc, what holding them costs:
+
+  contract   Mode A result — 18 clauses with text, reason, suggestion + summary
+  nachtrag   Mode B result — positions with reasoning + Stellungnahme
+  qa         Path C session — page chunks + BM25 index (Nachtrag + LV PDF)
+
+  live KB    the objects as main.py used to keep them (plain dicts)
+  stored KB  the same entries in a CompressedStore without hot entries
+  encode / decode ms   per entry (decode = a cold read)
+
+Contracts are the 18 clauses of the bundled warm-up corpus
+(backend/warmup_corpus/DE_VOB) with their sentences shuffled per session —
+real prose rather than synth.py's few template sentences, which would
+compress far better than any real contract. Claude's reasons, suggestions
+and Stellungnahme text are corpus sentences with their words shuffled:
+the vocabulary of the contract without verbatim repeats of its sentences.
+
+Usage:
+    python cache_memory.py
+    python cache_memory.py --sessions 100 --positions 120
+    RESULT_STORE_CODEC=zlib python cache_memory.py --json results/cache_memory.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_BACKEND = os.path.join(_HERE, "..", "backend")
+sys.path.insert(0, _BACKEND)
+
+import synth  # noqa: E402
+import result_store  # noqa: E402
+from clause_patterns import extract_clauses  # noqa: E402
+from nachtrag_qa import build_session_context, context_from_dict, context_to_dict  # noqa: E402
+from parser import extract_pages  # noqa: E402
+from risk_scorer import _LOW_RISK_DEFAULT, aggregate_risk_summary  # noqa: E402
+
+
+def _corpus() -> tuple[list[dict], list[str]]:
+    """(DE_VOB corpus clauses, all their sentences)."""
+    clauses = []
+    for path in sorted(glob.glob(os.path.join(_BACKEND, "warmup_corpus", "DE_VOB", "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            clauses += extract_clauses(f.read())
+    sentences = [s for c in clauses for s in re.split(r"(?<=[.;:])\s+", c["text"]) if len(s) > 30]
+    return clauses, sentences
+
+
+def _prose(rng: random.Random, sentences: list[str], n: int) -> str:
+    """n corpus sentences, words shuffled within each."""
+    out = []
+    for sentence in rng.sample(sentences, n):
+        words = sentence.rstrip(".;:").split()
+        rng.shuffle(words)
+        out.append(" ".join(words).capitalize() + ".")
+    return " ".join(out)
+
+
+def contract_result(i: int, corpus: list[dict], sentences: list[str]) -> dict:
+    rng = random.Random(i)
+    scored = []
+    for base in corpus:
+        parts = re.split(r"(?<=[.;:])\s+", base["text"])
+        rng.shuffle(parts)
+        clause = {**base, "text": " ".join(parts)}
+        if clause["has_risk_signals"]:
+            clause.update(
+                risk_level=rng.choice(["high", "medium", "low"]),
+                risk_category=rng.choice(["payment", "liability", "delay", "security"]),
+                reason=_prose(rng, sentences, rng.randint(3, 5)),
+                suggestion=_prose(rng, sentences, 2),
+            )
+        else:
+            clause.update(_LOW_RISK_DEFAULT)
+        scored.append(clause)
+    return {"clauses": scored, "summary": aggregate_risk_summary(scored)}
+
+
+def nachtrag_result(i: int, n: int, sentences: list[str]) -> dict:
+    rng = random.Random(i)
+    result = synth.stellungnahme_result(n)
+    for p in result["positions"]:
+        p["reason"] = _prose(rng, sentences, rng.randint(2, 4))
+        p["vob_reasoning"] = _prose(rng, sentences, 1)
+        if p["negotiation_position"]:
+            p["negotiation_position"] = _prose(rng, sentences, 2)
+    result["stellungnahme"] = "\n\n".join(_prose(rng, sentences, 4) for _ in range(4))
+    return result
+
+
+def qa_context(i: int, n: int, lv_pages: list[str]) -> dict:
+    return build_session_context({
+        "nachtrag_text": extract_pages(synth.nachtrag_pdf(n, variant=i)),
+        "lv_text": lv_pages,
+    })
+
+
+def _measure(kind: str, make, sessions: int, to_json=None, from_json=None) -> dict:
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    values = [make(i) for i in range(sessions)]
+    live = tracemalloc.get_traced_memory()[0] - base
+
+    store = result_store.CompressedStore(to_json=to_json, from_json=from_json, hot=0)
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for i, value in enumerate(values):
+        store[str(i)] = value
+    encode_s = (time.perf_counter() - start) / sessions
+    stored = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for i in range(sessions):
+        store.get(str(i))
+    decode_s = (time.perf_counter() - start) / sessions
+    stats = store.stats()
+    return {
+        "kind": kind, "sessions": sessions,
+        "live_kb": live / sessions / 1024, "stored_kb": stored / sessions / 1024,
+        "json_kb": stats["json_bytes"] / sessions / 1024,
+        "encode_ms": encode_s * 1000, "decode_ms": decode_s * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory per cached session, live vs. compressed.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--positions", type=int, default=60, help="positions per Nachtrag")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    corpus, sentences = _corpus()
+    lv_pages = extract_pages(synth.lv_pdf(args.positions))
+    cases = [
+        ("contract", lambda i: contract_result(i, corpus, sentences), {}),
+        ("nachtrag", lambda i: nachtrag_result(i, args.positions, sentences), {}),
+        ("qa", lambda i: qa_context(i, args.positions, lv_pages),
+         {"to_json": context_to_dict, "from_json": context_from_dict}),
+    ]
+
+    results = []
+    print(f"codec {result_store._CODEC}, {args.sessions} sessions per kind\n")
+    print(f"{'kind':<10}{'live KB':>10}{'JSON KB':>10}{'stored KB':>11}{'ratio':>8}{'encode ms':>11}{'decode ms':>11}")
+    for kind, make, hooks in cases:
+        r = _measure(kind, make, args.sessions, **hooks)
+        results.append(r)
+        print(f"{kind:<10}{r['live_kb']:>10.1f}{r['json_kb']:>10.1f}{r['stored_kb']:>11.1f}"
+              f"{r['live_kb'] / r['stored_kb']:>7.1f}x{r['encode_ms']:>11.2f}{r['decode_ms']:>11.2f}", flush=True)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "codec": result_store._CODEC, "results": results}, f, indent=2)
+        print(f"\nwritten to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+fake_anthropic.py — Local stand-in for the Anthropic Messages API.
+
+The backend builds its clients with AsyncAnthropic(api_key=…), which honours
+ANTHROPIC_BASE_URL — point it here and the real pipeline (SDK retries,
+llm.py hedging and circuit breaker included) runs without a key or cost.
+
+POST /v1/messages
+  Sleeps a log-normal latency (median --latency-ms, spread --jitter), then
+  answers with one JSON object that carries the fields of every prompt the
+  backend sends: clause scoring, position scoring, Begründung summary, MKA
+  and Q&A. Risk levels / assessments are drawn at random so summaries and
+  exports see a realistic mix. usage is estimated at 3.5 chars per token.
+  With probability --error-rate the request fails instead, with
+  --error-status (529 overloaded by default; 429 adds retry-after).
+GET /stats
+  Request, error and token counts since start (or since POST /stats/reset).
+
+Usage:
+    python fake_anthropic.py --port 8765 --latency-ms 800 --jitter 0.4 --error-rate 0.02
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=fake uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+_ERROR_TYPES = {
+    429: "rate_limit_error",
+    500: "api_error",
+    503: "api_error",
+    529: "overloaded_error",
+}
+
+_config = {"latency_ms": 600.0, "jitter": 0.4, "error_rate": 0.0, "error_status": 529, "seed": None}
+_stats = {"requests": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0}
+_rng = random.Random()
+
+app = FastAPI(title="fake-anthropic")
+
+
+def configure(latency_ms: float = 600.0, jitter: float = 0.4, error_rate: float = 0.0,
+              error_status: int = 529, seed: int | None = None) -> None:
+    _config.update(latency_ms=latency_ms, jitter=jitter, error_rate=error_rate,
+                   error_status=error_status, seed=seed)
+    _rng.seed(seed)
+
+
+def _answer() -> dict:
+    level = _rng.choices(["low", "medium", "high"], weights=[5, 3, 2])[0]
+    return {
+        # Clause scoring
+        "risk_level": level,
+        "risk_category": _rng.choice(["legal", "commercial", "schedule", "technical"]),
+        "reason": "Die Klausel verschiebt das Risiko einseitig auf den Auftragnehmer; "
+                  "die Frist ist knapp bemessen und die Rechtsfolge unverhältnismäßig.",
+        "suggestion": "Frist auf 12 Werktage verlängern und Obergrenze von 5 % vereinbaren.",
+        # Position scoring
+        "assessment": _rng.choice(["accept", "negotiate", "reject"]),
+        "vob_paragraph": _rng.choice(["§2 Abs. 5 VOB/B", "§2 Abs. 6 VOB/B", "§2 Abs. 3 VOB/B"]),
+        "vob_reasoning": "Geänderte Leistung auf Anordnung des AG.",
+        "price_assessment": _rng.choice(["reasonable", "overstated"]),
+        "price_delta_percent": round(_rng.uniform(-5, 40), 1),
+        "negotiation_position": "Einheitspreis auf Basis der Urkalkulation fortschreiben.",
+        # Begründung summary / MKA
+        "ag_order_reference": "Anordnung vom 01.09.2026",
+        "schedule_impact": "Bauzeitverlängerung drei Wochen",
+        "legal_basis_primary": "§2 Abs. 5 VOB/B",
+        "cost_drivers": ["Sperrpausen", "Nachtarbeit"],
+        "summary_text": "Zusätzliche Leistungen infolge verlegter Sperrpausen.",
+        "vob_paragraph_primary": "§2 Abs. 5 VOB/B",
+        "vob_paragraphs_secondary": [],
+        "principal_assessment": "partly_justified",
+        "ag_order_documented": True,
+        "missing_documentation": ["Urkalkulation"],
+        "preliminary_position": "request_more_info",
+        "stellungnahme": "Der Nachtrag wird dem Grunde nach teilweise anerkannt.",
+        # Q&A
+        "answer": "Die Vertragsstrafe beträgt 0,3 % je Werktag, höchstens 5 %.",
+        "relevant_clauses": ["§ 11"],
+        "legal_basis": "§ 11 VOB/B",
+        "risk_flag": level,
+        "action_required": "Obergrenze prüfen.",
+        "confidence": "high",
+    }
+
+
+def _prompt_chars(body: dict) -> int:
+    system = body.get("system", "")
+    chars = len(system if isinstance(system, str) else json.dumps(system))
+    for message in body.get("messages", []):
+        content = message.get("content", "")
+        chars += len(content if isinstance(content, str) else json.dumps(content))
+    return chars
+
+
+@app.post("/v1/messages")
+async def messages(request: Request):
+    body = await request.json()
+    _stats["requests"] += 1
+
+    median = _config["latency_ms"] / 1000
+    delay = median * math.exp(_rng.gauss(0, _config["jitter"])) if _config["jitter"] else median
+    await asyncio.sleep(delay)
+
+    if _rng.random() < _config["error_rate"]:
+        _stats["errors"] += 1
+        status = _config["error_status"]
+        headers = {"retry-after": "1"} if status == 429 else {}
+        return JSONResponse(
+            {"type": "error", "error": {"type": _ERROR_TYPES.get(status, "api_error"),
+                                        "message": "fake_anthropic injected error"}},
+            status_code=status, headers=headers,
+        )
+
+    text = json.dumps(_answer(), ensure_ascii=False)
+    input_tokens = math.ceil(_prompt_chars(body) / 3.5)
+    output_tokens = min(math.ceil(len(text) / 3.5), body.get("max_tokens", 1024))
+    _stats["input_tokens"] += input_tokens
+    _stats["output_tokens"] += output_tokens
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "claude-haiku-4-5-20251001"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return _stats
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    for key in _stats:
+        _stats[key] = 0
+    return _stats
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Anthropic Messages API for benchmarks.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=600.0, help="median latency")
+    parser.add_argument("--jitter", type=float, default=0.4, help="log-normal sigma (0 = fixed)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=529, choices=sorted(_ERROR_TYPES))
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    configure(args.latency_ms, args.jitter, args.error_rate, args.error_status, args.seed)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
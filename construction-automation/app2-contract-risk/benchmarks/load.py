@@ -0,0 +1,344 @@
+"""
+load.py — End-to-end load benchmark of the backend against fake_anthropic.
+
+Per endpoint, a fresh `uvicorn main:app` process is started with
+ANTHROPIC_BASE_URL pointing at a local fake_anthropic.py, warmed up, and
+driven by a closed loop of --concurrency clients for --requests requests.
+Reported per endpoint:
+
+  p50 / p95 / p99 latency   wall-clock per request, client side
+  req/s                     successful requests / timed wall time
+  RSS idle / peak           VmRSS after startup, VmHWM at the end (Linux)
+  calls/req                 Messages API calls seen by the fake, hedges and
+                            SDK retries included
+
+The server runs with its real caches, but isolated and with limits that
+would distort a load test switched off: clause index / job DB / prescreen
+model in a temp dir, RATELIMIT_ENABLED=false (slowapi), admission control
+off, no Q&A prewarm. --mode cold (default) sends a new document variant per
+request and disables near-duplicate clause reuse and references, so every
+clause reaches the fake with a reproducible prompt; --mode warm sends the same document, measuring the cache path.
+
+Endpoints: contract, nachtrag-pdf, nachtrag-gaeb, export-report (DOCX of
+one contract analysis).
+
+Cassettes (backend/cassette.py): --cassette record saves every LLM response
+under --cassette-dir, --cassette replay serves them back without any network
+— calls/req drops to 0 and what remains is our own latency. Synthetic
+documents are deterministic, so a recording made with the same sizes, mode
+and request count replays completely. --upstream anthropic records against
+the real API (ANTHROPIC_API_KEY from the environment) instead of the fake.
+
+Usage:
+    python load.py
+    python load.py --endpoints contract --clauses 80 --requests 40 --concurrency 8
+    python load.py --latency-ms 1500 --jitter 0.6 --error-rate 0.05
+    python load.py --json results/baseline.json
+    python load.py --baseline results/baseline.json   # print deltas against it
+    python load.py --upstream anthropic --cassette record --requests 5
+    python load.py --cassette replay --requests 5
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+import synth
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_BACKEND = os.path.join(_HERE, "..", "backend")
+_CASSETTE_DIR = os.path.join(_HERE, "results", "cassettes")
+
+ENDPOINTS = ("contract", "nachtrag-pdf", "nachtrag-gaeb", "export-report")
+
+
+# ── Processes ─────────────────────────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{proc.args} exited with {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f} s")
+
+
+def _proc_kb(pid: int, field: str) -> int | None:
+    """VmRSS / VmHWM from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def _start_fake(args, port: int) -> subprocess.Popen:
+    cmd = [sys.executable, os.path.join(_HERE, "fake_anthropic.py"), "--port", str(port),
+           "--latency-ms", str(args.latency_ms), "--jitter", str(args.jitter),
+           "--error-rate", str(args.error_rate), "--error-status", str(args.error_status),
+           "--seed", "1"]
+    proc = subprocess.Popen(cmd)
+    _wait_ready(f"http://127.0.0.1:{port}/stats", proc)
+    return proc
+
+
+def _start_app(args, port: int, fake_port: int | None, workdir: str) -> subprocess.Popen:
+    os.makedirs(workdir, exist_ok=True)
+    env = {
+        **os.environ,
+        "LLM_CASSETTE_MODE": args.cassette,
+        "LLM_CASSETTE_DIR": args.cassette_dir,
+        "RATELIMIT_ENABLED": "false",
+        "ADMISSION_TOKENS_PER_MIN": "0",
+        "QA_PREWARM_SUGGESTED": "0",
+        "CLAUSE_WARMUP": "off",
+        "CLAUSE_INDEX_PATH": os.path.join(workdir, "clause_index.json"),
+        "JOB_DB_PATH": os.path.join(workdir, "jobs.sqlite"),
+        "PRESCREEN_MODEL_PATH": os.path.join(workdir, "prescreen.json"),
+    }
+    if fake_port is not None:
+        env["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{fake_port}"
+        env["ANTHROPIC_API_KEY"] = "fake-benchmark-key"
+    elif args.cassette == "replay":
+        env.setdefault("ANTHROPIC_API_KEY", "cassette-replay")
+    if args.mode == "cold":
+        # No reuse, and no reference scores in prompts: those depend on which
+        # concurrent request scored a similar clause first, and would make
+        # prompts — and cassette keys — vary between runs.
+        env["CLAUSE_REUSE_THRESHOLD"] = "1.01"
+        env["CLAUSE_REFERENCE_THRESHOLD"] = "1.01"
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+           "--port", str(port), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=_BACKEND, env=env)
+    _wait_ready(f"http://127.0.0.1:{port}/health", proc)
+    return proc
+
+
+# ── Payloads ──────────────────────────────────────────────────────────────────
+
+def _variant(args, i: int) -> int:
+    return i if args.mode == "cold" else 0
+
+
+async def _payloads(name: str, args, client: httpx.AsyncClient, n: int) -> list[tuple[str, dict]]:
+    """n (path, httpx request kwargs) — generated before the clock starts."""
+    pdf = "application/pdf"
+    if name == "contract":
+        return [("/analyze-contract", {"files": {
+            "file": (f"contract_{i}.pdf", synth.contract_pdf(args.clauses, _variant(args, i)), pdf)}})
+            for i in range(n)]
+    if name in ("nachtrag-pdf", "nachtrag-gaeb"):
+        if name == "nachtrag-pdf":
+            lv = ("lv.pdf", synth.lv_pdf(args.positions), pdf)
+        else:
+            lv = ("lv.x83", synth.lv_gaeb(args.positions), "application/xml")
+        return [("/analyze-nachtrag", {"files": {
+            "nachtrag": (f"nt_{i}.pdf", synth.nachtrag_pdf(args.positions, _variant(args, i)), pdf),
+            "original_lv": lv}})
+            for i in range(n)]
+    if name == "export-report":
+        r = await client.post("/analyze-contract", files={
+            "file": ("contract.pdf", synth.contract_pdf(args.clauses, 10_000), pdf)})
+        r.raise_for_status()
+        return [("/export-report", {"json": r.json()})] * n
+    raise ValueError(name)
+
+
+# ── Load loop ─────────────────────────────────────────────────────────────────
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))]
+
+
+async def _drive(client: httpx.AsyncClient, payloads: list[tuple[str, dict]],
+                 concurrency: int) -> tuple[list[float], dict[int, int], float]:
+    queue = list(reversed(payloads))
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+
+    async def worker():
+        while queue:
+            path, kwargs = queue.pop()
+            start = time.perf_counter()
+            try:
+                status = (await client.post(path, **kwargs)).status_code
+            except httpx.HTTPError:
+                status = 0
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return sorted(latencies), statuses, time.perf_counter() - start
+
+
+async def _bench_endpoint(name: str, args, app_port: int, fake_port: int | None, pid: int) -> dict:
+    base = f"http://127.0.0.1:{app_port}"
+    fake_stats = None
+    async with httpx.AsyncClient(base_url=base, timeout=args.timeout) as client:
+        payloads = await _payloads(name, args, client, args.warmup + args.requests)
+        rss_idle = _proc_kb(pid, "VmRSS")
+        if args.warmup:
+            await _drive(client, payloads[:args.warmup], min(args.concurrency, args.warmup))
+        if fake_port is not None:
+            await client.post(f"http://127.0.0.1:{fake_port}/stats/reset")
+        latencies, statuses, wall = await _drive(client, payloads[args.warmup:], args.concurrency)
+        if fake_port is not None:
+            fake_stats = (await client.get(f"http://127.0.0.1:{fake_port}/stats")).json()
+
+    ok = len(latencies)
+    rss_peak = _proc_kb(pid, "VmHWM")
+    return {
+        "endpoint": name,
+        "requests": args.requests,
+        "ok": ok,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "p50_s": _percentile(latencies, 0.50),
+        "p95_s": _percentile(latencies, 0.95),
+        "p99_s": _percentile(latencies, 0.99),
+        "mean_s": sum(latencies) / ok if ok else None,
+        "throughput_rps": ok / wall if wall else None,
+        "rss_idle_mb": round(rss_idle / 1024, 1) if rss_idle else None,
+        "rss_peak_mb": round(rss_peak / 1024, 1) if rss_peak else None,
+        "llm_calls_per_request": round(fake_stats["requests"] / max(ok, 1), 2) if fake_stats else None,
+        "llm_errors": fake_stats["errors"] if fake_stats else None,
+        "llm_tokens": fake_stats["input_tokens"] + fake_stats["output_tokens"] if fake_stats else None,
+    }
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+
+def _fmt(v, spec: str = ".3f") -> str:
+    return "—" if v is None else format(v, spec)
+
+
+def _print_table(results: list[dict]) -> None:
+    print(f"\n{'endpoint':<15}{'ok':>8}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'req/s':>8}"
+          f"{'RSS idle':>10}{'RSS peak':>10}{'calls/req':>11}")
+    for r in results:
+        print(f"{r['endpoint']:<15}{r['ok']:>4}/{r['requests']:<3}{_fmt(r['p50_s']):>9}"
+              f"{_fmt(r['p95_s']):>9}{_fmt(r['p99_s']):>9}{_fmt(r['throughput_rps'], '.2f'):>8}"
+              f"{_fmt(r['rss_idle_mb'], '.0f'):>8}MB{_fmt(r['rss_peak_mb'], '.0f'):>8}MB"
+              f"{_fmt(r['llm_calls_per_request'], '.2f'):>11}")
+        if set(r["statuses"]) != {"200"}:
+            print(f"{'':<15}statuses {r['statuses']}")
+
+
+def _print_deltas(results: list[dict], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["endpoint"]: r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path} (+ = slower / more)")
+    for r in results:
+        b = baseline.get(r["endpoint"])
+        if not b:
+            continue
+        parts = []
+        for key in ("p50_s", "p95_s", "p99_s", "throughput_rps", "rss_peak_mb"):
+            if r[key] is not None and b.get(key):
+                parts.append(f"{key} {100 * (r[key] - b[key]) / b[key]:+.1f} %")
+        print(f"  {r['endpoint']:<15}" + "   ".join(parts))
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_HERE,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end load benchmark with a fake LLM.")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--mode", choices=("cold", "warm"), default="cold")
+    parser.add_argument("--requests", type=int, default=20, help="timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--clauses", type=int, default=40, help="clauses per synthetic contract")
+    parser.add_argument("--positions", type=int, default=60, help="positions per synthetic Nachtrag")
+    parser.add_argument("--latency-ms", type=float, default=600.0)
+    parser.add_argument("--jitter", type=float, default=0.4)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=529)
+    parser.add_argument("--upstream", choices=("fake", "anthropic"), default="fake")
+    parser.add_argument("--cassette", choices=("off", "record", "replay", "auto"), default="off")
+    parser.add_argument("--cassette-dir", default=_CASSETTE_DIR)
+    parser.add_argument("--timeout", type=float, default=300.0, help="client timeout per request")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against an earlier --json file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="g2t-bench-")
+    fake_port = _free_port() if args.upstream == "fake" else None
+    fake = _start_fake(args, fake_port) if fake_port is not None else None
+    results = []
+    try:
+        for name in args.endpoints:
+            app_port = _free_port()
+            app = _start_app(args, app_port, fake_port, os.path.join(workdir, name))
+            try:
+                print(f"{name}: {args.warmup} warmup + {args.requests} requests, "
+                      f"concurrency {args.concurrency}, {args.mode}", flush=True)
+                results.append(asyncio.run(_bench_endpoint(name, args, app_port, fake_port, app.pid)))
+            finally:
+                _stop(app)
+    finally:
+        if fake is not None:
+            _stop(fake)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    _print_table(results)
+    if args.baseline:
+        _print_deltas(results, args.baseline)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "git": _git_rev(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nwritten to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
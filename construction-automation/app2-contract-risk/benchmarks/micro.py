@@ -0,0 +1,140 @@
+"""
+micro.py — Micro-benchmarks of the CPU-bound parsing steps.
+
+No server, no LLM: the functions that run before (or instead of) the
+Claude calls, on synthetic inputs at three sizes each.
+
+  extract_text       parser.extract_text           contract PDF, N clauses
+  extract_clauses    clause_patterns.extract_clauses  its text
+  match_positions    nachtrag_scorer._match_positions  N NT positions vs N LV
+  parse_gaeb_file    gaeb_parser.parse_gaeb_file    GAEB DA83, N positions
+  stellungnahme_docx exporter.export_stellungnahme_docx  N positions, bulk XML
+                     fast path vs. python-docx object API (bulk_xml=False)
+  risk_report_docx   exporter.export_risk_report_docx   N clauses, same pair
+
+Both exporter paths are checked for identical word/document.xml before
+they are timed.
+
+Each case is timed with an auto-sized inner loop (≥ 0.2 s per round) over
+--repeat rounds; best and median ms per call are reported — best is the
+stable number for regressions, median shows the noise.
+
+Usage:
+    python micro.py
+    python micro.py --scale 4 --repeat 7 --json results/micro.json
+    python micro.py --baseline results/micro.json
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import zipfile
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, "..", "backend"))
+
+import synth  # noqa: E402
+from clause_patterns import extract_clauses  # noqa: E402
+from exporter import export_risk_report_docx, export_stellungnahme_docx  # noqa: E402
+from gaeb_parser import parse_gaeb_file  # noqa: E402
+from nachtrag_scorer import _match_positions  # noqa: E402
+from parser import extract_nachtrag_data, extract_text  # noqa: E402
+
+
+def _time(fn, repeat: int) -> tuple[float, float]:
+    """(best, median) seconds per call."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= 0.2:
+            break
+        loops *= 2
+    rounds = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        rounds.append((time.perf_counter() - start) / loops)
+    return min(rounds), statistics.median(rounds)
+
+
+def _document_xml(docx: bytes) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(docx)) as z:
+        return z.read("word/document.xml")
+
+
+def _export_cases(name: str, export, data: dict, size: str):
+    if _document_xml(export(data)) != _document_xml(export(data, bulk_xml=False)):
+        sys.exit(f"{name}: bulk XML and object API differ at {size}")
+    yield name, f"{size}, bulk XML", lambda: export(data)
+    yield name, f"{size}, object API", lambda: export(data, bulk_xml=False)
+
+
+def _cases(scale: float):
+    """(name, size label, callable) — inputs built up front."""
+    for clauses in (18, 60, 200):
+        n = max(1, int(clauses * scale))
+        pdf = synth.contract_pdf(n)
+        text, pages = extract_text(pdf)
+        yield "extract_text", f"{n} clauses / {pages} pages", lambda pdf=pdf: extract_text(pdf)
+        yield "extract_clauses", f"{n} clauses / {len(text) // 1000} k chars", \
+            lambda text=text: extract_clauses(text)
+    for positions in (50, 200, 800):
+        n = max(2, int(positions * scale))
+        nt = extract_nachtrag_data(synth.nachtrag_pdf(n))["positions"]
+        lv = parse_gaeb_file(synth.lv_gaeb(n))
+        yield "match_positions", f"{len(nt)} × {len(lv)} positions", \
+            lambda nt=nt, lv=lv: _match_positions(nt, lv)
+    for positions in (100, 1000, 5000):
+        n = max(1, int(positions * scale))
+        xml = synth.lv_gaeb(n)
+        yield "parse_gaeb_file", f"{n} positions / {len(xml) // 1024} KB", \
+            lambda xml=xml: parse_gaeb_file(xml)
+    for rows in (20, 200, 2000):
+        n = max(1, int(rows * scale))
+        yield from _export_cases("stellungnahme_docx", export_stellungnahme_docx,
+                                 synth.stellungnahme_result(n), f"{n} positions")
+        yield from _export_cases("risk_report_docx", export_risk_report_docx,
+                                 synth.risk_report_result(n), f"{n} clauses")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the parsing steps.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply all input sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against an earlier --json file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {(r["case"], r["size"]): r for r in json.load(f)["results"]}
+
+    results = []
+    print(f"{'case':<18}{'size':<30}{'best ms':>10}{'median ms':>11}")
+    for name, size, fn in _cases(args.scale):
+        best, median = _time(fn, args.repeat)
+        results.append({"case": name, "size": size, "best_ms": best * 1000, "median_ms": median * 1000})
+        line = f"{name:<18}{size:<30}{best * 1000:>10.3f}{median * 1000:>11.3f}"
+        b = baseline.get((name, size))
+        if b:
+            line += f"   {100 * (best * 1000 - b['best_ms']) / b['best_ms']:+.1f} % vs baseline"
+        print(line, flush=True)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\nwritten to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+ocr_throughput.py — OCR throughput on a scanned contract, per worker count.
+
+A synthetic contract (synth.contract_pdf) is rasterized into a PDF without
+a text layer (synth.scanned_pdf) and run through backend/ocr.py's
+recognize() — the same process pool, page cache and Tesseract call as a
+scanned upload:
+
+  cold      empty page cache: render + hash + Tesseract for every page
+  warm      the same scan again: render + hash, text from the page cache
+  clauses   extract_clauses() on the OCR text vs. on the digital original —
+            the OCR output must still parse
+
+Reported per --workers value: seconds, seconds per page, pages per second.
+Real scans (noise, skew, stamps) recognize slower than these clean page
+images; the scaling across workers is the number to look at.
+
+Needs Tesseract language data for OCR_LANGUAGE (see backend/ocr.py).
+
+Usage:
+    python ocr_throughput.py
+    python ocr_throughput.py --clauses 200 --workers 1,2,4,8
+    python ocr_throughput.py --json results/ocr.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, "..", "backend"))
+
+import synth  # noqa: E402
+import ocr  # noqa: E402
+from clause_patterns import extract_clauses  # noqa: E402
+from parser import extract_pages  # noqa: E402
+
+
+async def _run(scan: bytes, workers: int, cache_dir: str) -> dict:
+    ocr.shutdown_pool()
+    ocr._WORKERS = workers
+    ocr._CACHE_DIR = cache_dir
+    pages = extract_pages(scan)
+    result = {"workers": workers}
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        text = "\n".join(await ocr.recognize(scan, pages))
+        result[f"{label}_s"] = time.perf_counter() - start
+    result["clauses"] = len(extract_clauses(text))
+    ocr.shutdown_pool()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR throughput on a scanned synthetic contract.")
+    parser.add_argument("--clauses", type=int, default=60, help="contract size (about 2 clauses per page)")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 2}", help="comma-separated pool sizes")
+    parser.add_argument("--scan-dpi", type=int, default=200, help="resolution of the synthetic scan")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if not ocr.available():
+        raise SystemExit(f"OCR not available — no Tesseract language data for {ocr._LANGUAGE!r} "
+                         "(TESSDATA_PREFIX, see backend/ocr.py)")
+
+    digital = synth.contract_pdf(args.clauses)
+    scan = synth.scanned_pdf(digital, args.scan_dpi)
+    page_count = len(extract_pages(scan))
+    expected = len(extract_clauses("\n".join(extract_pages(digital))))
+    print(f"{page_count} pages, {len(scan) / 1024 / 1024:.1f} MB scan, {expected} clauses in the original, "
+          f"OCR at {ocr._DPI} dpi, {ocr._LANGUAGE}\n")
+    print(f"{'workers':>8}{'cold s':>9}{'s/page':>9}{'pages/s':>9}{'warm s':>9}{'clauses':>9}")
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        with tempfile.TemporaryDirectory(prefix="g2t-ocr-bench-") as cache_dir:
+            r = asyncio.run(_run(scan, workers, cache_dir))
+        results.append(r)
+        print(f"{workers:>8}{r['cold_s']:>9.2f}{r['cold_s'] / page_count:>9.2f}"
+              f"{page_count / r['cold_s']:>9.2f}{r['warm_s']:>9.2f}{r['clauses']:>5}/{expected}", flush=True)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "pages": page_count, "expected_clauses": expected,
+                       "results": results}, f, indent=2)
+        print(f"\nwritten to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
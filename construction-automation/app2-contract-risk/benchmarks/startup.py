@@ -0,0 +1,184 @@
+"""
+startup.py — Cold-start benchmark of the backend: import profile and
+time-to-first-/health.
+
+Render restarts the process on every deploy and after idle spin-down; until
+`uvicorn main:app` answers /health, the health check fails and requests
+queue. Two measurements:
+
+  import profile   `python -X importtime -c "import main"`, self time summed
+                   per top-level package — what main.py pulls in at import,
+                   heaviest first
+  first /health    --runs fresh `uvicorn main:app` processes: seconds from
+                   spawn to the first 200 from /health, and until the
+                   background preload of the lazily imported modules
+                   (main.py, STARTUP_PRELOAD) reports done
+
+Clause index, job DB and prescreen model live in a temp dir; warm-up is off,
+so no API key is needed. Best and median over the runs are reported — the
+first run also pays the OS file cache, best is the stable number.
+
+Usage:
+    python startup.py
+    python startup.py --runs 10 --json results/startup.json
+    python startup.py --baseline results/startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_BACKEND = os.path.join(_HERE, "..", "backend")
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _env(workdir: str) -> dict:
+    return {
+        **os.environ,
+        "CLAUSE_WARMUP": "off",
+        "LLM_CASSETTE_MODE": "off",
+        "CLAUSE_INDEX_PATH": os.path.join(workdir, "clause_index.json"),
+        "JOB_DB_PATH": os.path.join(workdir, "jobs.sqlite"),
+        "PRESCREEN_MODEL_PATH": os.path.join(workdir, "prescreen.json"),
+    }
+
+
+# ── Import profile ────────────────────────────────────────────────────────────
+
+def import_profile(env: dict) -> tuple[float, list[tuple[str, float]]]:
+    """(seconds to import main, [(top-level package, self seconds)] heaviest first)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=_BACKEND, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+    total = 0.0
+    packages: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, name = m.groups()
+        if name == "main" and len(indent) == 1:
+            total = int(cumulative_us) / 1e6
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0.0) + int(self_us) / 1e6
+    packages.pop("main", None)
+    return total, sorted(packages.items(), key=lambda kv: -kv[1])
+
+
+# ── First /health ─────────────────────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _first_health(env: dict, timeout: float = 60.0) -> dict:
+    """One fresh server: seconds to the first /health 200 and to preload done."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+                             "--port", str(port), "--log-level", "warning"], cwd=_BACKEND, env=env)
+    result = {"health_s": None, "preload_s": None}
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+            try:
+                response = httpx.get(url, timeout=1.0)
+            except httpx.HTTPError:
+                time.sleep(0.005)
+                continue
+            elapsed = time.perf_counter() - start
+            if response.status_code == 200:
+                startup = response.json().get("startup") or {}
+                if result["health_s"] is None:
+                    result["health_s"] = elapsed
+                    result["ready_s"] = startup.get("ready_s")
+                # Trees without the preload have no "startup" — ready at first /health
+                if startup.get("preload", "off") in ("off", "done", "failed"):
+                    result["preload_s"] = elapsed
+                    result["preload"] = startup.get("preload", "off")
+                    result["modules_s"] = startup.get("preload_s", {})
+                    return result
+            time.sleep(0.005)
+        raise RuntimeError(f"{url} not ready after {timeout:.0f} s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import profile and time-to-first-/health of the backend.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh server processes to time")
+    parser.add_argument("--top", type=int, default=10, help="packages to list in the import profile")
+    parser.add_argument("--no-preload", action="store_true", help="start with STARTUP_PRELOAD=0")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against an earlier --json file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+
+    with tempfile.TemporaryDirectory(prefix="g2t-startup-") as workdir:
+        env = _env(workdir)
+        if args.no_preload:
+            env["STARTUP_PRELOAD"] = "0"
+
+        import_s, packages = import_profile(env)
+        print(f"import main: {import_s:.3f} s\n")
+        print(f"{'package':<24}{'self s':>9}")
+        for name, seconds in packages[:args.top]:
+            print(f"{name:<24}{seconds:>9.3f}")
+
+        runs = []
+        for i in range(args.runs):
+            runs.append(_first_health(env))
+            r = runs[-1]
+            print(f"\nrun {i + 1}: first /health {r['health_s']:.3f} s, preload {r['preload']} "
+                  f"{r['preload_s']:.3f} s" + (f"  {r['modules_s']}" if r["modules_s"] else ""), end="")
+        print("\n")
+
+    summary = {"import_s": import_s}
+    for field in ("health_s", "preload_s"):
+        values = [r[field] for r in runs]
+        summary[f"{field}_best"] = min(values)
+        summary[f"{field}_median"] = statistics.median(values)
+
+    print(f"{'':<16}{'best s':>9}{'median s':>10}")
+    for field, label in (("health_s", "first /health"), ("preload_s", "preload done")):
+        best, median = summary[f"{field}_best"], summary[f"{field}_median"]
+        line = f"{label:<16}{best:>9.3f}{median:>10.3f}"
+        b = baseline.get(f"{field}_best")
+        if b:
+            line += f"   {100 * (best - b) / b:+.1f} % vs baseline"
+        print(line)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "summary": summary, "packages": packages[:args.top],
+                       "runs": runs}, f, indent=2)
+        print(f"\nwritten to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
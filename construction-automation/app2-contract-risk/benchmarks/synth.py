@@ -0,0 +1,353 @@
+"""
+synth.py — Synthetic VOB/B contracts, NT-LV Nachträge and LVs (PDF + GAEB).
+
+Benchmarks must not depend on real contracts (confidential, *.pdf is
+gitignored) and must scale: a 5-clause contract and a 300-position NT-LV
+stress different parts of the pipeline. Everything here is deterministic
+for a given (size, variant), so runs are comparable.
+
+  contract_pdf(clauses, variant)     table of contents, § headings + German
+                                     clause text, about a third of the clauses
+                                     with risk signals
+  nachtrag_pdf(positions, variant)   Begründung + NT-LV position blocks in
+                                     the "OZ. / Kurztext / Menge Einheit EP GP"
+                                     layout parser._extract_positions_regex reads
+  lv_pdf(positions)                  original LV, same OZ layout
+  lv_gaeb(positions)                 the same LV as GAEB DA83 XML
+  scanned_pdf(pdf, dpi)              any of the PDFs as page images without
+                                     a text layer (OCR input, ocr.py)
+  risk_report_result(clauses)        /analyze-contract and /analyze-nachtrag
+  stellungnahme_result(positions)    response dicts, as the DOCX exporters read them
+
+The variant changes a project word in every clause / position, so each
+variant misses the exact clause-index hash and the result caches — use a
+fixed variant to benchmark the warm path. Nachtrag OZs match the LV: the
+first 80 % are priced-up LV positions, the rest are new Zulagen.
+
+Usage:
+    python synth.py out/ --clauses 60 --positions 200
+"""
+
+import argparse
+import os
+import random
+
+import fitz  # PyMuPDF
+from lxml import etree
+
+_PAGE_W, _PAGE_H = 595, 842
+_MARGIN = 50
+_LINE = 13
+_WRAP = 88
+
+_VOB_TITLES = [
+    "Art und Umfang der Leistung", "Vergütung", "Ausführungsunterlagen", "Ausführung",
+    "Ausführungsfristen", "Behinderung und Unterbrechung der Ausführung",
+    "Verteilung der Gefahr", "Kündigung durch den Auftraggeber",
+    "Kündigung durch den Auftragnehmer", "Haftung der Vertragsparteien", "Vertragsstrafe",
+    "Abnahme", "Mängelansprüche", "Abrechnung", "Stundenlohnarbeiten", "Zahlung",
+    "Sicherheitsleistung", "Streitigkeiten",
+]
+
+_PLAIN = [
+    "Die Leistung ist nach den anerkannten Regeln der Technik auszuführen.",
+    "Der Auftragnehmer hat die Ausführungsunterlagen rechtzeitig anzufordern.",
+    "Änderungen des Bauentwurfs sind dem Auftragnehmer schriftlich mitzuteilen.",
+    "Die Baustelle ist in einem ordnungsgemäßen Zustand zu halten.",
+    "Stoffe und Bauteile müssen den vereinbarten Güteanforderungen entsprechen.",
+    "Die Leistungen sind im Bautagebuch nachvollziehbar zu dokumentieren.",
+    "Der Auftraggeber stellt die erforderlichen Lager- und Arbeitsplätze zur Verfügung.",
+    "Die Sperrpausen der DB InfraGO sind in der Bauablaufplanung zu berücksichtigen.",
+]
+
+_RISKY = [
+    "Bei Überschreitung der Frist wird eine Vertragsstrafe von 0,3 % je Werktag fällig.",
+    "Der Auftraggeber kann den Vertrag ohne Abmahnung aus wichtigem Grund kündigen.",
+    "Die Verjährungsfrist für Mängelansprüche beträgt abweichend fünf Jahre.",
+    "Der Auftragnehmer stellt eine Sicherheitsleistung in Höhe von 10 % der Auftragssumme.",
+    "Verzugszinsen sind ausgeschlossen, soweit der Auftraggeber den Verzug nicht zu vertreten hat.",
+    "Der Auftraggeber kann Schadensersatz wegen Nichterfüllung verlangen.",
+    "Eine Bürgschaft auf Abruf ist vor Baubeginn zu übergeben.",
+    "Nach fruchtlos abgelaufener Nachfrist ist der Auftraggeber zum Rücktritt berechtigt.",
+]
+
+_ITEMS = [
+    ("Gleisschotter liefern und einbauen", "t"), ("Betonschwellen B70 verlegen", "St"),
+    ("Kabelkanal herstellen", "m"), ("Oberbau rückbauen", "m"),
+    ("Weiche EW 60-500 einbauen", "St"), ("Bahnübergang erneuern", "psch"),
+    ("Entwässerungsleitung DN 300 verlegen", "m"), ("Planumsschutzschicht herstellen", "m²"),
+    ("Schienen S54 schweißen", "St"), ("Baustelleneinrichtung vorhalten", "psch"),
+]
+
+_SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "be", "du", "fe", "go"]
+
+
+def _project_word(variant: int) -> str:
+    """Variant number → a letter-only word (digits are masked by the clause index)."""
+    word, n = "", variant + 1
+    while n:
+        n, r = divmod(n, len(_SYLLABLES))
+        word += _SYLLABLES[r]
+    return word.capitalize() + "feld"
+
+
+def _money(value: float) -> str:
+    """German number format: 12345.5 → '12.345,50'."""
+    s = f"{value:,.2f}"
+    return s.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+class _Writer:
+    """Line-by-line PDF text writer with page breaks."""
+
+    def __init__(self):
+        self.doc = fitz.open()
+        self._new_page()
+
+    def _new_page(self):
+        self.page = self.doc.new_page(width=_PAGE_W, height=_PAGE_H)
+        self.y = _MARGIN + 10
+
+    def line(self, text: str = ""):
+        if self.y > _PAGE_H - _MARGIN:
+            self._new_page()
+        if text:
+            self.page.insert_text((_MARGIN, self.y), text, fontsize=10)
+        self.y += _LINE
+
+    def paragraph(self, text: str):
+        words, current = text.split(), ""
+        for word in words:
+            if current and len(current) + 1 + len(word) > _WRAP:
+                self.line(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        self.line(current)
+
+    def bytes(self) -> bytes:
+        data = self.doc.tobytes(garbage=3, deflate=True)
+        self.doc.close()
+        return data
+
+
+# ── Contract ──────────────────────────────────────────────────────────────────
+
+def contract_pdf(clauses: int = 18, variant: int = 0) -> bytes:
+    rng = random.Random(clauses * 7919 + variant)
+    project = _project_word(variant)
+    w = _Writer()
+    w.paragraph(f"Bauvertrag Streckenausbau {project} — Besondere Vertragsbedingungen")
+    w.paragraph("Es gilt die VOB/B in der bei Vertragsschluss gültigen Fassung.")
+    w.line()
+    # Table of contents first, as in real contracts — it is the densest §
+    # block, so the parser's start detection lands before § 1.
+    w.line("Inhaltsverzeichnis")
+    for n in range(1, clauses + 1):
+        w.line(f"§ {n} {_VOB_TITLES[(n - 1) % len(_VOB_TITLES)]} " + "." * 20 + f" {n // 8 + 2}")
+    w.line()
+    for n in range(1, clauses + 1):
+        title = _VOB_TITLES[(n - 1) % len(_VOB_TITLES)]
+        w.line(f"§ {n}")
+        w.line(title)
+        sentences = [f"Diese Regelung gilt für das Bauvorhaben {project}."]
+        sentences += rng.sample(_PLAIN, rng.randint(3, 6))
+        if rng.random() < 0.35:
+            sentences.insert(rng.randint(1, len(sentences)), rng.choice(_RISKY))
+        w.paragraph(" ".join(sentences))
+        w.line()
+    return w.bytes()
+
+
+# ── Nachtrag / LV ─────────────────────────────────────────────────────────────
+
+def _oz(i: int) -> str:
+    return f"{i // 100 + 1:02d}.{(i // 10) % 10 + 1:02d}.{(i % 10 + 1) * 10:04d}"
+
+
+def _lv_rows(positions: int) -> list[dict]:
+    rng = random.Random(positions)
+    rows = []
+    for i in range(positions):
+        name, unit = _ITEMS[i % len(_ITEMS)]
+        qty = 1.0 if unit == "psch" else float(rng.randint(5, 900))
+        up = round(rng.uniform(8, 2500), 2)
+        rows.append({"oz": _oz(i), "description": f"{name} Abschnitt {i + 1}",
+                     "qty": qty, "unit": unit, "unit_price": up, "total": round(qty * up, 2)})
+    return rows
+
+
+def _position_block(w: _Writer, oz: str, description: str, qty: float, unit: str,
+                    up: float, total: float) -> None:
+    w.line(f"{oz}.")
+    w.line(description)
+    w.line("Ausführung gemäß Ril 820 und Baubeschreibung, einschließlich Nebenleistungen.")
+    w.line(f"{_money(qty).replace(',00', ',000')} {unit} {_money(up)} {_money(total)}")
+    w.line()
+
+
+def lv_pdf(positions: int = 100) -> bytes:
+    w = _Writer()
+    w.paragraph("Leistungsverzeichnis — Los 1 Oberbau")
+    w.line()
+    for r in _lv_rows(positions):
+        _position_block(w, r["oz"], r["description"], r["qty"], r["unit"], r["unit_price"], r["total"])
+    return w.bytes()
+
+
+def nachtrag_pdf(positions: int = 100, variant: int = 0) -> bytes:
+    rng = random.Random(positions * 31 + variant)
+    project = _project_word(variant)
+    lv = _lv_rows(positions)
+    changed = lv[: max(2, int(positions * 0.8))]
+    w = _Writer()
+    w.paragraph(f"Nachtragsangebot NA {variant + 1} — Bauvorhaben {project}")
+    w.paragraph(
+        "Begründung: Auf Anordnung des Auftraggebers vom 01.09.2026 wurden geänderte und "
+        "zusätzliche Leistungen erforderlich. Die Sperrpausen wurden verlegt, die "
+        "Bauzeit verlängert sich um drei Wochen. Grundlage ist § 2 Abs. 5 und 6 VOB/B."
+    )
+    w.line()
+    w.line("Nachtragspositionen")
+    total = 0.0
+    for r in changed:
+        up = round(r["unit_price"] * rng.uniform(1.0, 1.4), 2)
+        qty = r["qty"] if r["unit"] == "psch" else float(round(r["qty"] * rng.uniform(0.8, 1.5)))
+        total += qty * up
+        _position_block(w, r["oz"], f"{r['description']} {project}", qty, r["unit"], up, round(qty * up, 2))
+    for j in range(positions - len(changed)):
+        up = round(rng.uniform(500, 9000), 2)
+        total += up
+        _position_block(w, f"99.01.{(j + 1) * 10:04d}", f"Zulage Nachtarbeit {project} {j + 1}",
+                        1.0, "psch", up, up)
+    w.line(f"Gesamtbetrag Nachtrag: {_money(total)} EUR")
+    return w.bytes()
+
+
+def lv_gaeb(positions: int = 100) -> bytes:
+    """The lv_pdf() positions as GAEB DA83 XML (Titel → Gruppe → Position)."""
+    root = _el("GAEB")
+    info = _el("GAEBInfo", root)
+    _el("Version", info, "3.2")
+    body = _el("BoQBody", _el("BoQ", _el("Award", root)))
+    levels: dict[tuple, object] = {}
+    for r in _lv_rows(positions):
+        titel, gruppe, pos = r["oz"].split(".")
+        if (titel,) not in levels:
+            levels[(titel,)] = _el("BoQItem", body)
+            _el("Itemno", levels[(titel,)], titel)
+        if (titel, gruppe) not in levels:
+            levels[(titel, gruppe)] = _el("BoQItem", levels[(titel,)])
+            _el("Itemno", levels[(titel, gruppe)], gruppe)
+        item = _el("BoQItem", levels[(titel, gruppe)])
+        _el("Itemno", item, pos)
+        _el("Qty", item, f"{r['qty']:.3f}")
+        _el("QU", item, r["unit"])
+        _el("UP", item, f"{r['unit_price']:.2f}")
+        _el("IT", item, f"{r['total']:.2f}")
+        _el("Text", _el("Description", item), r["description"])
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8")
+
+
+_GAEB_NS = "http://www.gaeb.de/GAEB_DA_XML/DA83/3.2"
+
+
+# ── Scans ─────────────────────────────────────────────────────────────────────
+
+def scanned_pdf(pdf: bytes, dpi: int = 200) -> bytes:
+    """
+    Every page replaced by a grayscale image of itself — what a scanner
+    produces, minus its noise and skew (real scans OCR slower and worse).
+    """
+    src = fitz.open(stream=pdf, filetype="pdf")
+    out = fitz.open()
+    for page in src:
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        new = out.new_page(width=page.rect.width, height=page.rect.height)
+        new.insert_image(new.rect, pixmap=pix)
+    data = out.tobytes(deflate=True)
+    out.close()
+    src.close()
+    return data
+
+
+# ── Analysis results (exporter input) ─────────────────────────────────────────
+
+def risk_report_result(clauses: int = 18) -> dict:
+    rng = random.Random(clauses)
+    rows = []
+    for n in range(1, clauses + 1):
+        level = rng.choices(["high", "medium", "low"], weights=[2, 3, 5])[0]
+        rows.append({
+            "number": f"§ {n}", "title": _VOB_TITLES[(n - 1) % len(_VOB_TITLES)],
+            "risk_level": level, "risk_category": rng.choice(["legal", "commercial", "schedule"]),
+            "page_start": n // 3 + 1,
+            "reason": rng.choice(_RISKY) if level != "low" else "",
+            "suggestion": "Frist verlängern und Obergrenze vereinbaren." if level == "high" else "",
+        })
+    high = [c for c in rows if c["risk_level"] == "high"]
+    return {"clauses": rows, "summary": {
+        "overall_risk_level": "HIGH" if high else "MEDIUM", "overall_risk_score": 62,
+        "high_risk_count": len(high),
+        "medium_risk_count": sum(c["risk_level"] == "medium" for c in rows),
+        "summary_text": "Der Vertrag enthält mehrere einseitige Risikoverlagerungen.",
+        "top_3_risky_clauses": high[:3],
+    }}
+
+
+def stellungnahme_result(positions: int = 100) -> dict:
+    rng = random.Random(positions)
+    rows, claimed = [], 0.0
+    for r in _lv_rows(positions):
+        total = round(r["total"] * rng.uniform(1.0, 1.4), 2)
+        claimed += total
+        assessment = rng.choice(["accept", "negotiate", "reject"])
+        rows.append({
+            "oz": r["oz"], "nachtrag_description": r["description"],
+            "assessment": assessment, "vob_paragraph": "§2 Abs. 5 VOB/B",
+            "nachtrag_claimed_total": total,
+            "reason": "Geänderte Leistung auf Anordnung des AG.\nMengenmehrung nicht belegt.",
+            "negotiation_position": "" if assessment == "accept"
+            else "Einheitspreis auf Basis der Urkalkulation fortschreiben.",
+        })
+    return {"positions": rows, "stellungnahme": "Der Nachtrag wird teilweise anerkannt.\n\n"
+            "Die Mehrkosten sind nachzuweisen.", "nachtrag_summary": {
+        "total_claimed": round(claimed, 2), "accepted_total": round(claimed * 0.4, 2),
+        "contested_total": round(claimed * 0.6, 2), "position_count": positions,
+        "recommendation": "negotiate",
+    }}
+
+
+def _el(tag: str, parent=None, text=None):
+    qname = f"{{{_GAEB_NS}}}{tag}"
+    el = etree.Element(qname) if parent is None else etree.SubElement(parent, qname)
+    if text is not None:
+        el.text = text
+    return el
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic benchmark documents.")
+    parser.add_argument("out", help="Output directory")
+    parser.add_argument("--clauses", type=int, default=18)
+    parser.add_argument("--positions", type=int, default=100)
+    parser.add_argument("--variant", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    contract = contract_pdf(args.clauses, args.variant)
+    files = {
+        f"contract_{args.clauses}.pdf": contract,
+        f"contract_{args.clauses}_scan.pdf": scanned_pdf(contract),
+        f"nachtrag_{args.positions}.pdf": nachtrag_pdf(args.positions, args.variant),
+        f"lv_{args.positions}.pdf": lv_pdf(args.positions),
+        f"lv_{args.positions}.x83": lv_gaeb(args.positions),
+    }
+    for name, data in files.items():
+        with open(os.path.join(args.out, name), "wb") as f:
+            f.write(data)
+        print(f"{name:<24} {len(data) / 1024:>8.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+// Writes <file>.br and <file>.gz next to every compressible build output.
+// backend/static_files.py serves them by Accept-Encoding (brotli at max
+// quality here, where time is cheap — the backend only compresses what is
+// missing, in a worker thread after startup). Node's zlib only, no extra
+// dependency.
+//
+// Usage: node scripts/precompress.mjs [dist]
+
+import { brotliCompressSync, gzipSync, constants } from 'node:zlib'
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs'
+import { extname, join } from 'node:path'
+
+const COMPRESSIBLE = new Set(['.js', '.mjs', '.css', '.html', '.svg', '.json', '.map', '.txt', '.xml', '.webmanifest'])
+const MIN_BYTES = 256
+
+function* files(dir) {
+  for (const entry of readdirSync(dir, { withFileTypes: true })) {
+    const path = join(dir, entry.name)
+    if (entry.isDirectory()) yield* files(path)
+    else yield path
+  }
+}
+
+const root = process.argv[2] ?? 'dist'
+let before = 0
+let after = 0
+for (const path of files(root)) {
+  if (!COMPRESSIBLE.has(extname(path).toLowerCase()) || statSync(path).size < MIN_BYTES) continue
+  const data = readFileSync(path)
+  const br = brotliCompressSync(data, {
+    params: { [constants.BROTLI_PARAM_QUALITY]: 11, [constants.BROTLI_PARAM_SIZE_HINT]: data.length },
+  })
+  writeFileSync(`${path}.br`, br)
+  writeFileSync(`${path}.gz`, gzipSync(data, { level: 9 }))
+  before += data.length
+  after += br.length
+}
+console.log(`precompressed ${root}: ${(before / 1024).toFixed(1)} KB → ${(after / 1024).toFixed(1)} KB brotli`)
@@ -12,13 +12,17 @@ function riskChip(level) {
   return { label: 'Low Risk', cls: 'bg-green-950 text-green-400 border-green-800' }
 }
 
-// POST JSON → download DOCX blob
-async function downloadDocx(endpoint, payload, filename) {
-  const res = await fetch(endpoint, {
-    method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify(payload),
-  })
+// Download DOCX blob — by session id (rendered and cached server-side);
+// POSTs the result JSON only when the server no longer has the session
+async function downloadDocx(endpoint, sessionId, payload, filename) {
+  let res = sessionId ? await fetch(`${endpoint}/${encodeURIComponent(sessionId)}`) : null
+  if (!res || res.status === 404) {
+    res = await fetch(endpoint, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(payload),
+    })
+  }
   if (!res.ok) throw new Error(`Export failed: ${res.status}`)
   const blob = await res.blob()
   const url = URL.createObjectURL(blob)
@@ -48,7 +52,8 @@ export default function App() {
     const fd = new FormData()
     fd.append('file', file)
     try {
-      const res = await fetch('/analyze-contract', { method: 'POST', body: fd })
+      // compact: clause texts are fetched per clause when opened (ClauseDetail)
+      const res = await fetch('/analyze-contract?compact=true', { method: 'POST', body: fd })
       if (!res.ok) {
         const body = await res.json().catch(() => ({}))
         throw new Error(body.detail ?? `HTTP ${res.status}`)
@@ -62,7 +67,7 @@ export default function App() {
 
   async function exportReport() {
     try {
-      await downloadDocx('/export-report', modeA.result, 'risk_report.docx')
+      await downloadDocx('/export-report', modeA.sessionId, modeA.result, 'risk_report.docx')
     } catch (e) {
       alert(`Export failed: ${e.message}`)
     }
@@ -95,7 +100,7 @@ export default function App() {
 
   async function exportStellung() {
     try {
-      await downloadDocx('/export-stellungnahme', modeB.result, 'stellungnahme.docx')
+      await downloadDocx('/export-stellungnahme', modeB.result?.session_id, modeB.result, 'stellungnahme.docx')
     } catch (e) {
       alert(`Export failed: ${e.message}`)
     }
@@ -218,6 +223,7 @@ function ModeAView({ state, chip, onFile, onSelect, onExport, onReset }) {
                 clauses={state.result.clauses ?? []}
                 selectedIdx={state.selectedIdx}
                 onSelect={onSelect}
+                sessionId={state.sessionId}
               />
             </div>
             {state.sessionId && (
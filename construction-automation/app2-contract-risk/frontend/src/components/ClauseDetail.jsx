@@ -1,3 +1,5 @@
+import { useState, useEffect } from 'react'
+
 const RISK_COLORS = {
   high: {
     bg: 'bg-red-950',
@@ -19,9 +21,22 @@ const RISK_COLORS = {
   },
 }
 
-export default function ClauseDetail({ clause }) {
+export default function ClauseDetail({ clause, sessionId }) {
   const c = RISK_COLORS[clause.risk_level] ?? RISK_COLORS.low
 
+  // Compact analysis responses omit clause text — load it when the clause is opened
+  const [text, setText] = useState(clause.text)
+  useEffect(() => {
+    setText(clause.text)
+    if (clause.text !== undefined || !sessionId) return
+    let cancelled = false
+    fetch(`/session/${encodeURIComponent(sessionId)}/clause/${encodeURIComponent(clause.number)}`)
+      .then((res) => (res.ok ? res.json() : null))
+      .then((full) => { if (!cancelled && full) setText(full.text) })
+      .catch(() => {})
+    return () => { cancelled = true }
+  }, [clause, sessionId])
+
   return (
     <div className="p-6 space-y-5 fade-in">
       {/* Header */}
@@ -39,11 +54,11 @@ export default function ClauseDetail({ clause }) {
       </div>
 
       {/* Full clause text */}
-      {clause.text && (
+      {text && (
         <div className="bg-[#161b22] border border-[#30363d] rounded-lg p-4">
           <p className="text-[10px] text-[#484f58] uppercase tracking-wider mb-2">Clause text</p>
           <pre className="text-[#8b949e] text-xs font-clause whitespace-pre-wrap leading-relaxed">
-            {clause.text}
+            {text}
           </pre>
         </div>
       )}
@@ -3,7 +3,7 @@ import ClauseDetail from './ClauseDetail.jsx'
 
 const RISK_ORDER = { high: 0, medium: 1, low: 2 }
 
-export default function SplitPane({ clauses, selectedIdx, onSelect }) {
+export default function SplitPane({ clauses, selectedIdx, onSelect, sessionId }) {
   // Sort once: high → medium → low. Stable sort preserves original order within a tier.
   const sorted = [...clauses].sort(
     (a, b) => (RISK_ORDER[a.risk_level] ?? 3) - (RISK_ORDER[b.risk_level] ?? 3)
@@ -19,7 +19,7 @@ export default function SplitPane({ clauses, selectedIdx, onSelect }) {
       {/* Right panel — 60% */}
       <div className="flex-1 overflow-y-auto">
         {sorted[selectedIdx] ? (
-          <ClauseDetail clause={sorted[selectedIdx]} />
+          <ClauseDetail clause={sorted[selectedIdx]} sessionId={sessionId} />
         ) : (
           <div className="flex items-center justify-center h-full text-[#484f58] text-sm">
             Select a clause
@@ -10,6 +10,7 @@ export default defineConfig({
       '/ask-nachtrag': 'http://localhost:8000',
       '/init-nachtrag-session': 'http://localhost:8000',
       '/export': 'http://localhost:8000',
+      '/session': 'http://localhost:8000',
       '/health': 'http://localhost:8000',
     },
   },
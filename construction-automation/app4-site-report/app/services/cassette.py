@@ -0,0 +1,182 @@
+"""
+app/services/cassette.py — Record / replay of Anthropic API calls at the HTTP layer.
+
+Same module as app2-contract-risk/backend/cassette.py: with a cassette
+recorded once, claude_service runs offline, deterministically and at full
+speed, so regression runs and benchmarks time our code, not the API.
+
+Modes (LLM_CASSETTE_MODE):
+  off      default — the client is built exactly as without this module
+  record   every call goes to the API; 2xx responses are saved
+  replay   responses come from disk, no network. A call without a cassette
+           gets a 404 not_found_error (→ HTTP 502 from generate_report_text)
+  auto     replay when recorded, otherwise record
+
+Request key: SHA-256 of method, path and the JSON body with sorted keys.
+Headers (API key, SDK version) are not part of it; any prompt change is a miss.
+
+Storage: LLM_CASSETTE_DIR/<key[:2]>/<key>.json (default .cache/cassettes in
+the app root) with status, content type and response body — not the
+request, which carries the site report.
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import time
+
+import anthropic
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_MODES = ("off", "record", "replay", "auto")
+_MODE = os.getenv("LLM_CASSETTE_MODE", "off").strip().lower() or "off"
+_DIR = os.getenv(
+    "LLM_CASSETTE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", ".cache", "cassettes"),
+)
+if _MODE not in _MODES:
+    raise RuntimeError(f"LLM_CASSETTE_MODE must be one of {', '.join(_MODES)} — got {_MODE!r}")
+
+# The SDK's HTTP package: httpx up to anthropic 0.x, its httpx2 fork from 1.x.
+# Transports have to come from the same package as the SDK's client class.
+_httpx = importlib.import_module(anthropic.DefaultHttpxClient.__mro__[1].__module__.partition(".")[0])
+
+_stats = {"replayed": 0, "recorded": 0, "missed": 0}
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False)
+    except ValueError:
+        canonical = body.decode("utf-8", "replace")
+    return hashlib.sha256(f"{method} {path}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def _file(key: str) -> str:
+    return os.path.join(_DIR, key[:2], f"{key}.json")
+
+
+def _load(key: str) -> dict | None:
+    try:
+        with open(_file(key), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(key: str, request, response) -> None:
+    try:
+        model = json.loads(request.content).get("model", "")
+    except ValueError:
+        model = ""
+    entry = {
+        "path": request.url.path,
+        "model": model,
+        "status": response.status_code,
+        "content_type": response.headers.get("content-type", "application/json"),
+        "body": response.content.decode("utf-8"),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    path = _file(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# ── Transports ────────────────────────────────────────────────────────────────
+
+def _lookup(request):
+    """(key, replayed response or None)."""
+    key = request_key(request.method, request.url.path, request.content)
+    if _MODE in ("replay", "auto"):
+        entry = _load(key)
+        if entry is not None:
+            _stats["replayed"] += 1
+            return key, _httpx.Response(
+                entry["status"],
+                headers={"content-type": entry["content_type"]},
+                content=entry["body"].encode("utf-8"),
+                request=request,
+            )
+        if _MODE == "replay":
+            _stats["missed"] += 1
+            return key, _httpx.Response(404, request=request, json={
+                "type": "error",
+                "error": {
+                    "type": "not_found_error",
+                    "message": f"No cassette for request {key[:12]} in {_DIR} (LLM_CASSETTE_MODE=replay)",
+                },
+            })
+    return key, None
+
+
+def _record(key: str, request, response):
+    if 200 <= response.status_code < 300:
+        _save(key, request, response)
+        _stats["recorded"] += 1
+    return response
+
+
+class _Transport(_httpx.BaseTransport):
+    def __init__(self, inner):
+        self._inner = inner
+
+    def handle_request(self, request):
+        request.read()
+        key, replayed = _lookup(request)
+        if replayed is not None:
+            return replayed
+        response = self._inner.handle_request(request)
+        response.read()
+        return _record(key, request, response)
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class _AsyncTransport(_httpx.AsyncBaseTransport):
+    def __init__(self, inner):
+        self._inner = inner
+
+    async def handle_async_request(self, request):
+        await request.aread()
+        key, replayed = _lookup(request)
+        if replayed is not None:
+            return replayed
+        response = await self._inner.handle_async_request(request)
+        await response.aread()
+        return _record(key, request, response)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def enabled() -> bool:
+    return _MODE != "off"
+
+
+def async_http_client():
+    """http_client for AsyncAnthropic — None (SDK default) when cassettes are off."""
+    if not enabled():
+        return None
+    return anthropic.DefaultAsyncHttpxClient(transport=_AsyncTransport(_httpx.AsyncHTTPTransport()))
+
+
+def http_client():
+    """http_client for the synchronous Anthropic client."""
+    if not enabled():
+        return None
+    return anthropic.DefaultHttpxClient(transport=_Transport(_httpx.HTTPTransport()))
+
+
+def stats() -> dict:
+    return {"mode": _MODE, "dir": _DIR, **_stats}
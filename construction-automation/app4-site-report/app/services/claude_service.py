@@ -3,6 +3,7 @@ import os
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from app.models.report_request import ReportRequest
+from app.services import cassette
 
 # Fallback import
 try:
@@ -12,7 +13,10 @@ except ImportError:
 
 load_dotenv()
 
-client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+client = anthropic.Anthropic(
+    api_key=os.environ["ANTHROPIC_API_KEY"],
+    http_client=cassette.http_client(),
+)
 
 
 async def generate_report_text(request: ReportRequest) -> str: